@@ -1,5 +1,6 @@
 from functools import reduce
-from operator  import add, mul
+from math      import prod
+from operator  import mul
 
 '''
 If Python 2 support is really required, then we at the very least don't want
@@ -20,15 +21,7 @@ def _any(arg):
     return any(arg)
 
 def prodpow(bases, exponents):
-    res = []
-    for row in exponents:
-        _ = 1
-        for base, exponent in zip(bases, row):
-            _ *= base ** exponent
-        
-        res.append(_)
-    
-    return res
+    return [prod(map(pow, bases, row)) for row in exponents]
 
 def get_backend(backend):
     if isinstance(backend, str):
@@ -39,6 +32,73 @@ def get_backend(backend):
     
     return backend
 
+def get_backend_fallback(backend):
+    '''
+    Like :func:`get_backend`, but falls back to the ``math`` module
+    (i.e. pure Python) when NumPy is implied and cannot be imported.
+    '''
+    try:
+        return get_backend(backend)
+    
+    except ImportError:
+        if backend is not None:
+            raise
+        
+        import math
+        return math
+
+def is_array_backend(backend):
+    return hasattr(backend, 'asarray')
+
+def prodpow_many(bases, exponents, backend = None):
+    '''
+    :func:`prodpow` for many rows of `bases` at once, e.g. the mass action
+    rates (without the rate constants) of all reactions in many states.
+    
+    Parameters
+    ==================
+    bases: 2D array_like
+        One row per state, one column per species.
+    exponents: 2D array_like
+        One row per reaction, one column per species.
+    backend: module or str, optional
+        Defaults to NumPy, falling back to :func:`prodpow` when NumPy is
+        missing. Pass ``'math'`` to force the pure Python implementation.
+    
+    Returns
+    ==================
+    An array (nested lists for the pure Python implementation) with one
+    row per state and one column per reaction.
+    '''
+    backend = get_backend_fallback(backend)
+    if not is_array_backend(backend):
+        return [prodpow(row, exponents) for row in bases]
+    
+    bases = backend.asarray(bases, dtype = float)
+    exponents = backend.asarray(exponents, dtype = float)
+    if (bases > 0).all():
+        # All of it in one matrix product.
+        return backend.exp(backend.log(bases) @ exponents.T)
+    
+    zero, negative = bases == 0, bases < 0
+    if negative.any() and (exponents % 1).any():
+        # Negative bases with fractional exponents: leave the NaNs to ``**``.
+        result = backend.ones((bases.shape[0], exponents.shape[0]))
+        for j in backend.flatnonzero(exponents.any(axis = 0)):
+            result *= bases[:, j, None] ** exponents[None, :, j]
+        
+        return result
+    
+    # Magnitudes in log space as above, with zero bases and the signs of
+    # negative bases counted by matrix products of their own.
+    magnitudes = backend.where(zero, 1.0, backend.abs(bases))
+    result = backend.exp(backend.log(magnitudes) @ exponents.T)
+    zero = zero.astype(float)
+    result[(zero @ (exponents > 0).T) > 0] = 0.0
+    result[(zero @ (exponents < 0).T) > 0] = backend.inf
+    result[(negative.astype(float) @ (exponents % 2).T) % 2 == 1] *= -1
+    return result
+
 def int_div(p, q):
     '''
     Integer division that rounds towards 0, like the first arg
@@ -54,7 +114,7 @@ def reducemap(args, reduce_op, map_op):
     return reduce(reduce_op, map(map_op, *args))
 
 def vec_dot(vec_1, vec_2):
-    return reducemap((vec_1, vec_2), add, mul)
+    return sum(map(mul, vec_1, vec_2))
 
 def mat_dot_vec(iter_mat, iter_vec, iter_term = None):
     if iter_term is None:
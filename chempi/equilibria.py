@@ -0,0 +1,271 @@
+'''
+Equilibrium speciation of aqueous solutions, for many compositions (or pH
+values) at once.
+
+The species are formed from a set of components (e.g. ``H+``, ``CO3-2``,
+``Ca+2``), with ``log10 c_i = log10 K_i + sum_j A_ij log10 x_j`` for the
+free component concentrations ``x_j``. The unknowns are the logarithms of
+``x``, found by Newton iterations on the mass balances (and optionally the
+charge balance), which are well behaved over the many orders of magnitude
+concentrations span. Concentrations are used in place of activities.
+'''
+from collections import namedtuple
+from math        import log
+
+from ._util       import get_backend
+from .util.pyutil import NoConvergence
+
+SpeciationResult = namedtuple('SpeciationResult', ['concentrations', 'free', 'iterations'])
+SpeciationResult.__doc__ = '''
+Result of :meth:`Speciation.solve`: the equilibrium ``concentrations`` of
+all the species (in the order of ``Speciation.species``), the ``log10`` of
+the ``free`` component concentrations (in the order of
+``Speciation.components``, usable as ``guess`` for a neighbouring problem),
+and the number of Newton ``iterations`` of each point.
+'''
+
+LN10 = log(10)
+
+# Largest change of a (natural) log concentration per Newton step.
+MAX_LOG_STEP = 5.0
+
+class Speciation:
+    '''
+    Equilibria between components and the species formed from them.
+    
+    Parameters
+    ==================
+    components: iterable of str
+        The components, which are species themselves (with ``K = 1``).
+    species: mapping
+        Other species, as ``name: (composition, log10_K)`` with
+        ``composition`` a dict of component to stoichiometric coefficient,
+        e.g. ``'OH-': ({'H+': -1}, -14)``.
+    charges: mapping, optional
+        Charges of the species (components included), defaulting to the
+        ones parsed from the names with
+        :func:`chempi.util.parsing.formula_to_composition`.
+    
+    Examples:
+    ==================
+    >>> acetate = Speciation(['H+', 'CH3COO-'], {
+    ...     'CH3COOH': ({'H+': 1, 'CH3COO-': 1}, 4.76),
+    ...     'OH-': ({'H+': -1}, -14),
+    ... })
+    >>> result = acetate.solve({'H+': 0.1, 'CH3COO-': 0.1})
+    >>> print(round(-result.free[0], 2))  # pH of 0.1 M acetic acid
+    2.88
+    '''
+    def __init__(self, components, species = None, charges = None):
+        self.components = list(components)
+        species = dict(species or {})
+        self.species = self.components + list(species)
+        if len(set(self.species)) != len(self.species):
+            raise ValueError('Species names must be unique (and differ from the components).')
+        
+        index = {c: j for j, c in enumerate(self.components)}
+        self.stoich = [[int(i == j) for j in range(len(self.components))] for i in range(len(self.components))]
+        self.log10_K = [0.0] * len(self.components)
+        for name, (composition, log10_K) in species.items():
+            row = [0] * len(self.components)
+            for component, coeff in composition.items():
+                if component not in index:
+                    raise KeyError(f'Unknown component {component!r} in the composition of {name!r}.')
+                
+                row[index[component]] = coeff
+            
+            self.stoich.append(row)
+            self.log10_K.append(float(log10_K))
+        
+        if charges is None:
+            from .util.parsing import formula_to_composition
+            
+            charges = {name: formula_to_composition(name).get(0, 0) for name in self.species}
+        
+        self.charges = [charges.get(name, 0) for name in self.species]
+    
+    @property
+    def nc(self):
+        return len(self.components)
+    
+    @property
+    def ns(self):
+        return len(self.species)
+    
+    def _per_point(self, np, values, n_points):
+        '''
+        `values` (a mapping over the components, or an array with one
+        column per component) as an ``(n_points, nc)`` array, NaN where
+        missing.
+        '''
+        out = np.full((n_points, self.nc), np.nan)
+        if hasattr(values, 'items'):
+            for component, v in values.items():
+                out[:, self.components.index(component)] = v
+        
+        else:
+            out[:] = np.asarray(values, dtype = float).reshape(-1, self.nc)
+        
+        return out
+    
+    def solve(
+            self, totals, fixed = None, charge_balance = None, guess = None,
+            warm_start = True, rtol = 1e-10, atol = 1e-20, max_iter = 100, backend = None):
+        '''
+        Solves for the equilibrium of one or many points.
+        
+        Parameters
+        ==================
+        totals: mapping or array_like
+            Total (analytical) concentrations of the components, as a
+            mapping of component to a value or to one value per point, or
+            as an ``(n_points, nc)`` array.
+        fixed: mapping, optional
+            Components with a known ``log10`` free concentration, e.g.
+            ``{'H+': -pH}``, per point or for all of them. Their totals are
+            ignored.
+        charge_balance: str, optional
+            Component (typically ``'H+'``) whose mass balance is replaced by
+            electroneutrality, i.e. whose total is ignored.
+        guess: array_like, optional
+            ``log10`` free concentrations to start from, e.g. the ``free``
+            of the result of a neighbouring problem. Defaults to the totals.
+        warm_start: bool
+            Whether points that don't converge are retried from the solution
+            of their closest converged neighbour (in the order given, as
+            along a titration), for as long as that makes progress.
+        rtol, atol: float
+            A balance is satisfied when off by less than ``rtol`` times the
+            sum of the magnitudes of its terms, plus ``atol``.
+        max_iter: int
+            Newton iterations per attempt.
+        backend: module or str, optional
+            NumPy (the default) or a compatible module.
+        
+        Returns
+        ==================
+        A :class:`SpeciationResult`, without the leading axis when all of
+        `totals`, `fixed` and `guess` are given for a single point.
+        
+        Raises
+        ==================
+        NoConvergence
+            If any point doesn't converge.
+        '''
+        np = get_backend(backend)
+        
+        sizes = [np.size(v) for v in (totals.values() if hasattr(totals, 'items') else [])]
+        sizes += [np.size(v) for v in (fixed or {}).values()]
+        if not hasattr(totals, 'items'):
+            sizes.append(np.size(totals) // self.nc)
+        
+        if guess is not None:
+            sizes.append(np.size(guess) // self.nc)
+        
+        n_points = max(sizes + [1])
+        single = all(
+            np.ndim(v) == 0 for v in list(totals.values() if hasattr(totals, 'items') else []) + list((fixed or {}).values())
+        ) and (hasattr(totals, 'items') or np.ndim(totals) == 1) and (guess is None or np.ndim(guess) == 1)
+        
+        A = np.asarray(self.stoich, dtype = float)
+        log_K = LN10 * np.asarray(self.log10_K)
+        T = self._per_point(np, totals, n_points)
+        u_fixed = LN10 * self._per_point(np, fixed or {}, n_points)
+        fixed_mask = ~np.isnan(u_fixed[0])
+        if charge_balance is not None and fixed_mask[self.components.index(charge_balance)]:
+            raise ValueError(f'{charge_balance} cannot be both fixed and charge balanced.')
+        
+        free_idx = np.flatnonzero(~fixed_mask)
+        
+        # One balance per free component: rows of weights over the species.
+        weights = A.T.copy()
+        if charge_balance is not None:
+            weights[self.components.index(charge_balance)] = self.charges
+        
+        balance_rows = weights[free_idx]
+        needs_total = np.ones(self.nc, dtype = bool)
+        needs_total[fixed_mask] = False
+        if charge_balance is not None:
+            needs_total[self.components.index(charge_balance)] = False
+            T[:, self.components.index(charge_balance)] = 0
+        
+        if np.isnan(T[:, needs_total]).any():
+            missing = [c for c, needed in zip(self.components, needs_total) if needed and np.isnan(T[:, self.components.index(c)]).any()]
+            raise ValueError(f'Missing totals for {", ".join(missing)}.')
+        
+        T_free = T[:, free_idx]
+        
+        if guess is None:
+            u = np.log(np.maximum(np.abs(np.nan_to_num(T)), 1e-7))
+        
+        else:
+            u = LN10 * np.broadcast_to(np.asarray(guess, dtype = float).reshape(-1, self.nc), (n_points, self.nc)).copy()
+        
+        if charge_balance is not None and guess is None:
+            u[:, self.components.index(charge_balance)] = -7 * LN10
+        
+        u[:, fixed_mask] = u_fixed[:, fixed_mask]
+        
+        iterations = np.zeros(n_points, dtype = int)
+        converged = np.zeros(n_points, dtype = bool)
+        A_free = A[:, free_idx]
+        
+        def newton(points):
+            '''
+            Newton iterations on the given points, in place.
+            '''
+            active = points
+            for _ in range(max_iter):
+                if not len(active):
+                    break
+                
+                log_c = np.minimum(log_K + u[active] @ A.T, 700)
+                c = np.exp(log_c)
+                residual = c @ balance_rows.T - T_free[active]
+                scale = np.abs(c) @ np.abs(balance_rows).T + np.abs(T_free[active])
+                done = (np.abs(residual) <= rtol * scale + atol).all(axis = 1)
+                converged[active[done]] = True
+                active, residual, c = active[~done], residual[~done], c[~done]
+                if not len(active):
+                    break
+                
+                # d(residual_j)/d(u_k) = sum_i w_ji c_i A_ik
+                jac = np.einsum('ji,mi,ik->mjk', balance_rows, c, A_free)
+                try:
+                    step = -np.linalg.solve(jac, residual[..., None])[..., 0]
+                
+                except np.linalg.LinAlgError:
+                    step = -(np.linalg.pinv(jac) @ residual[..., None])[..., 0]
+                
+                largest = np.abs(step).max(axis = 1, keepdims = True)
+                step *= np.minimum(1, MAX_LOG_STEP / np.maximum(largest, 1e-300))
+                u[active[:, None], free_idx] += step
+                iterations[active] += 1
+        
+        newton(np.arange(n_points))
+        
+        while warm_start and not converged.all() and converged.any():
+            # Seed each failed point from its closest converged neighbour.
+            positions = np.flatnonzero(converged)
+            failed = np.flatnonzero(~converged)
+            after = np.clip(np.searchsorted(positions, failed), 0, len(positions) - 1)
+            before = np.clip(after - 1, 0, len(positions) - 1)
+            closest = np.where(np.abs(positions[before] - failed) <= np.abs(positions[after] - failed), positions[before], positions[after])
+            u[failed[:, None], free_idx] = u[closest[:, None], free_idx]
+            newton(failed)
+            if not converged[failed].any():
+                break
+        
+        if not converged.all():
+            failed = np.flatnonzero(~converged)
+            raise NoConvergence(
+                f'{len(failed)} of {n_points} points did not converge within {max_iter} '
+                f'iterations (e.g. point {failed[0]}).'
+            )
+        
+        c = np.exp(log_K + u @ A.T)
+        free = u / LN10
+        if single:
+            return SpeciationResult(c[0], free[0], int(iterations[0]))
+        
+        return SpeciationResult(c, free, iterations)
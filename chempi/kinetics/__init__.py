@@ -0,0 +1,4 @@
+'''
+Time integration of kinetic networks.
+'''
+from ._integrate import IntegrationResult, DenseOutput, integrate
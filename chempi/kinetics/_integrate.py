@@ -0,0 +1,528 @@
+'''
+Adaptive integration of (stiff) ODE systems, e.g. the mass action kinetics
+of a :class:`chempi.reactionsystem.ReactionSystem`, for many initial
+conditions at once.
+
+Every trajectory has its own time and step size, but all the active ones
+are advanced together, so the right-hand side and the Jacobian are called
+once per step with a ``(states, n)`` array instead of once per trajectory.
+'''
+from collections import namedtuple
+
+from .._util import get_backend
+
+IntegrationResult = namedtuple('IntegrationResult', ['t', 'y', 'stats', 'status', 't_events', 'y_events', 'sol'])
+IntegrationResult.__doc__ = '''
+Result of :func:`integrate`.
+
+``t`` and ``y`` are ``t_eval`` and the ``(states, len(t_eval), n)`` states
+there (NaN past the point where a trajectory stopped), or without
+``t_eval`` one array of accepted step times and one of states per
+trajectory. ``stats`` maps ``'n_steps'``, ``'n_rejected'``, ``'n_rhs'`` and
+``'n_jac'`` to per trajectory counts, and ``status`` is ``0`` (reached the
+end), ``1`` (stopped by a terminal event) or ``-1`` (failed, i.e. the step
+size underflowed or ``max_steps`` was reached). ``t_events`` and
+``y_events`` hold, per event and trajectory, the times and states where
+the event occurred. ``sol`` is a :class:`DenseOutput` with
+``dense_output=True``, and ``None`` otherwise.
+'''
+
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10
+
+class _RK45:
+    '''
+    Explicit Runge-Kutta 5(4) of Dormand and Prince, with its free 4th
+    order interpolant.
+    '''
+    error_order = 4
+    uses_jacobian = False
+    
+    C = [0, 1/5, 3/10, 4/5, 8/9, 1]
+    A = [
+        [],
+        [1/5],
+        [3/40, 9/40],
+        [44/45, -56/15, 32/9],
+        [19372/6561, -25360/2187, 64448/6561, -212/729],
+        [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    ]
+    B = [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84]
+    E = [-71/57600, 0, 71/16695, -71/1920, 17253/339200, -22/525, 1/40]
+    P = [
+        [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+        [0, 0, 0, 0],
+        [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+        [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+        [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+        [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+        [0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+    ]
+    
+    def __init__(self, np):
+        self.np = np
+        self._B = np.asarray(self.B)
+        self._E = np.asarray(self.E)
+        self._P = np.asarray(self.P)
+    
+    def step(self, rhs, t, y, h, f0, jac):
+        '''
+        Returns ``(y_new, f_new, error, interpolation_data)``.
+        '''
+        np = self.np
+        hc = h[:, None]
+        K = np.empty((7,) + y.shape)
+        K[0] = f0
+        for s in range(1, 6):
+            dy = sum(a * K[i] for i, a in enumerate(self.A[s]))
+            K[s] = rhs(t + self.C[s] * h, y + hc * dy)
+        
+        y_new = y + hc * np.tensordot(self._B, K[:6], axes = 1)
+        K[6] = f_new = rhs(t + h, y_new)
+        error = hc * np.tensordot(self._E, K, axes = 1)
+        Q = np.einsum('kmn,kp->mnp', K, self._P)
+        return y_new, f_new, error, (y, Q)
+    
+    def interpolate(self, h, data, x):
+        y_old, Q = data
+        powers = x[:, None] ** self.np.arange(1, 5)
+        return y_old + h[:, None] * self.np.einsum('mnp,mp->mn', Q, powers)
+
+class _Rosenbrock23:
+    '''
+    L-stable Rosenbrock (W-)method of order 2 with an embedded order 3
+    error estimate (Shampine and Reichelt, the method of MATLAB's
+    ``ode23s``), with its free interpolant. It takes three solves with one
+    ``I - h*d*J`` per step and no Newton iterations.
+    '''
+    error_order = 2
+    uses_jacobian = True
+    
+    d = 1 / (2 + 2 ** 0.5)
+    e32 = 6 + 2 ** 0.5
+    
+    def __init__(self, np, autonomous):
+        self.np = np
+        self.autonomous = autonomous
+    
+    def step(self, rhs, t, y, h, f0, jac):
+        np = self.np
+        hc = h[:, None]
+        W = np.eye(y.shape[1]) - (h * self.d)[:, None, None] * jac
+        W_inv = np.linalg.inv(W)
+        solve = lambda b: np.einsum('mij,mj->mi', W_inv, b)
+        
+        if self.autonomous:
+            T = 0
+        
+        else:
+            dt = 1.4901161193847656e-08 * np.maximum(np.abs(t), 1.0)
+            T = hc * self.d * (rhs(t + dt, y) - f0) / dt[:, None]
+        
+        k1 = solve(f0 + T)
+        f1 = rhs(t + 0.5 * h, y + 0.5 * hc * k1)
+        k2 = solve(f1 - k1) + k1
+        y_new = y + hc * k2
+        f_new = rhs(t + h, y_new)
+        k3 = solve(f_new - self.e32 * (k2 - f1) - 2 * (k1 - f0) + T)
+        error = hc / 6 * (k1 - 2 * k2 + k3)
+        return y_new, f_new, error, (y, k1, k2)
+    
+    def interpolate(self, h, data, x):
+        y_old, k1, k2 = data
+        x = x[:, None]
+        denominator = 1 - 2 * self.d
+        return y_old + h[:, None] * (x * (1 - x) / denominator * k1 + x * (x - 2 * self.d) / denominator * k2)
+
+_METHODS = {
+    'rk45': _RK45,
+    'rosenbrock': _Rosenbrock23,
+}
+
+def _rms(np, v, scale):
+    return np.sqrt(((v / scale) ** 2).mean(axis = 1))
+
+def _fd_jacobian(np, rhs, t, y, f0, atol):
+    '''
+    Forward difference Jacobian of many states, with a single call of
+    `rhs` on all the perturbed states.
+    '''
+    m, n = y.shape
+    delta = 1.4901161193847656e-08 * np.maximum(np.abs(y), atol)
+    perturbed = y[:, None, :] + delta[:, None, :] * np.eye(n)
+    f = rhs(np.repeat(t, n), perturbed.reshape(m * n, n)).reshape(m, n, n)
+    return ((f - f0[:, None, :]) / delta[:, :, None]).transpose(0, 2, 1)
+
+def _ranges(np, starts, stops):
+    '''
+    ``(owner, k)`` for every ``k in range(starts[i], stops[i])``, with
+    ``owner`` the position ``i``.
+    '''
+    counts = stops - starts
+    owner = np.repeat(np.arange(len(starts)), counts)
+    first = np.cumsum(counts) - counts
+    return owner, np.repeat(starts, counts) + np.arange(counts.sum()) - np.repeat(first, counts)
+
+class DenseOutput:
+    '''
+    Continuous solution of every trajectory of :func:`integrate`, from the
+    interpolants of the accepted steps.
+    '''
+    def __init__(self, np, method, owners, t_old, h, data, n_states, single):
+        self._np = np
+        self._method = method
+        order = np.lexsort((t_old, owners))
+        self._t_old = t_old[order]
+        self._h = h[order]
+        self._data = tuple(d[order] for d in data)
+        self._offsets = np.searchsorted(owners[order], np.arange(n_states + 1))
+        self._single = single
+    
+    def __call__(self, t):
+        '''
+        States at the time(s) `t`, with shape ``(states, len(t), n)``
+        (without the leading axis for a single initial condition, and
+        without the time axis for a scalar `t`). Times outside of the
+        integrated interval are extrapolated from the first or last step.
+        '''
+        np = self._np
+        scalar = np.ndim(t) == 0
+        t = np.atleast_1d(np.asarray(t, dtype = float))
+        n_states = len(self._offsets) - 1
+        segments = np.empty((n_states, len(t)), dtype = int)
+        for b in range(n_states):
+            lo, hi = self._offsets[b], self._offsets[b + 1]
+            if lo == hi:
+                raise ValueError(f'Trajectory {b} has no accepted steps.')
+            
+            found = np.searchsorted(self._t_old[lo:hi], t, side = 'right') - 1
+            segments[b] = lo + np.clip(found, 0, hi - lo - 1)
+        
+        segments = segments.ravel()
+        h = self._h[segments]
+        x = (np.tile(t, n_states) - self._t_old[segments]) / h
+        y = self._method.interpolate(h, tuple(d[segments] for d in self._data), x)
+        y = y.reshape(n_states, len(t), -1)
+        if scalar:
+            y = y[:, 0]
+        
+        return y[0] if self._single else y
+
+def integrate(
+        rhs, t_span, y0, method = 'rk45', jac = None, rtol = 1e-6, atol = 1e-12,
+        t_eval = None, dense_output = False, events = (), first_step = None,
+        max_step = float('inf'), max_steps = 100000, autonomous = False, backend = None):
+    '''
+    Integrates ``dy/dt = rhs(t, y)`` from ``t_span[0]`` to ``t_span[1]`` for
+    one or many initial conditions, with adaptive steps.
+    
+    Parameters
+    ==================
+    rhs: callable
+        ``rhs(t, y)`` with `t` of shape ``(m,)`` and `y` of shape ``(m, n)``,
+        returning the ``(m, n)`` derivatives, e.g. ``lambda t, y: rsys.rhs(y)``.
+    t_span: pair of floats
+        Start and (later) end time, shared by all the trajectories.
+    y0: array_like
+        Initial state of shape ``(n,)``, or ``(states, n)`` for many.
+    method: str
+        ``'rk45'`` (explicit Dormand-Prince 5(4), for non-stiff problems) or
+        ``'rosenbrock'`` (implicit Rosenbrock 2(3), L-stable, for stiff
+        problems such as most kinetic networks).
+    jac: callable, optional
+        ``jac(t, y)`` returning the ``(m, n, n)`` Jacobians, used by
+        ``'rosenbrock'``. Defaults to forward differences (`n` extra
+        right-hand side evaluations per Jacobian).
+    rtol, atol: float
+        Relative and absolute tolerances of the local error.
+    t_eval: array_like, optional
+        Increasing times at which to store the states (interpolated).
+    dense_output: bool
+        Whether to return the continuous solution as well.
+    events: sequence of callables
+        ``event(t, y)`` returning ``(m,)`` values, whose zeros are located.
+        As for SciPy, an event may have the attributes ``terminal`` (stop
+        the trajectory at its first occurrence) and ``direction`` (only
+        count zeros crossed upwards for ``1``, downwards for ``-1``).
+    first_step: float, optional
+        Defaults to an estimate from the initial derivatives.
+    max_step: float
+        Upper bound of the step size.
+    max_steps: int
+        Steps (accepted or rejected) after which a trajectory is given up.
+    autonomous: bool
+        Whether `rhs` doesn't depend on `t`, which saves ``'rosenbrock'``
+        one evaluation per step.
+    backend: module or str, optional
+        NumPy (the default) or a compatible module.
+    
+    Returns
+    ==================
+    An :class:`IntegrationResult`.
+    
+    Examples:
+    ==================
+    >>> import numpy as np
+    >>> decay = lambda t, y: -y * [1.0, 2.0]
+    >>> result = integrate(decay, (0, 1), [[1.0, 1.0], [2.0, 2.0]], t_eval = [1.0], rtol = 1e-10)
+    >>> np.allclose(result.y[:, -1], [[np.exp(-1), np.exp(-2)], [2 * np.exp(-1), 2 * np.exp(-2)]])
+    True
+    >>> result.status.tolist()
+    [0, 0]
+    '''
+    np = get_backend(backend)
+    if method not in _METHODS:
+        raise ValueError(f'Unknown method {method!r}, use one of {", ".join(map(repr, _METHODS))}.')
+    
+    t0, t_end = map(float, t_span)
+    if not t_end > t0:
+        raise ValueError('t_span must be increasing.')
+    
+    stepper = _RK45(np) if method == 'rk45' else _Rosenbrock23(np, autonomous)
+    y = np.array(y0, dtype = float)
+    single = y.ndim == 1
+    y = np.atleast_2d(y)
+    m, n = y.shape
+    
+    n_rhs = np.zeros(m, dtype = int)
+    n_jac = np.zeros(m, dtype = int)
+    n_steps = np.zeros(m, dtype = int)
+    n_rejected = np.zeros(m, dtype = int)
+    
+    def counted_rhs(idx):
+        def f(t, y):
+            n_rhs[idx] += 1
+            return np.asarray(rhs(t, y), dtype = float).reshape(y.shape)
+        
+        return f
+    
+    t = np.full(m, t0)
+    f = counted_rhs(np.arange(m))(t, y)
+    
+    # Initial steps, as in Hairer, Norsett and Wanner (II.4).
+    if first_step is None:
+        scale = atol + rtol * np.abs(y)
+        d0, d1 = _rms(np, y, scale), _rms(np, f, scale)
+        h0 = np.where((d0 < 1e-5) | (d1 < 1e-5), 1e-6, 0.01 * d0 / np.maximum(d1, 1e-300))
+        h0 = np.minimum(h0, t_end - t0)
+        f1 = counted_rhs(np.arange(m))(t + h0, y + h0[:, None] * f)
+        d2 = _rms(np, f1 - f, scale) / h0
+        d12 = np.maximum(d1, d2)
+        h1 = np.where(d12 <= 1e-15, np.maximum(1e-6, h0 * 1e-3),
+                      (0.01 / np.maximum(d12, 1e-300)) ** (1 / (stepper.error_order + 1)))
+        h = np.minimum(100 * h0, h1)
+    
+    else:
+        h = np.full(m, float(first_step))
+    
+    h = np.minimum(h, max_step)
+    
+    J = None
+    if stepper.uses_jacobian:
+        J = np.empty((m, n, n))
+        stale = np.ones(m, dtype = bool)
+    
+    status = np.zeros(m, dtype = int)
+    active = np.ones(m, dtype = bool)
+    
+    if t_eval is not None:
+        t_eval = np.asarray(t_eval, dtype = float)
+        if (np.diff(t_eval) <= 0).any():
+            raise ValueError('t_eval must be strictly increasing.')
+        
+        y_out = np.full((m, len(t_eval), n), np.nan)
+        y_out[:, t_eval == t0] = y[:, None]
+    
+    else:
+        chunks = [(np.arange(m), t.copy(), y.copy())]
+    
+    dense_chunks = []
+    events = list(events)
+    terminal = [bool(getattr(event, 'terminal', False)) for event in events]
+    direction = [getattr(event, 'direction', 0) for event in events]
+    g = [np.asarray(event(t, y), dtype = float) for event in events]
+    event_chunks = [[] for _ in events]
+    
+    while active.any():
+        idx = np.flatnonzero(active)
+        out_of_steps = n_steps[idx] + n_rejected[idx] >= max_steps
+        if out_of_steps.any():
+            status[idx[out_of_steps]] = -1
+            active[idx[out_of_steps]] = False
+            idx = idx[~out_of_steps]
+            if not len(idx):
+                break
+        
+        t_i, y_i, f_i = t[idx], y[idx], f[idx]
+        h_i = np.minimum(np.minimum(h[idx], max_step), t_end - t_i)
+        too_small = h_i < 10 * np.spacing(np.abs(t_i))
+        if too_small.any():
+            status[idx[too_small]] = -1
+            active[idx[too_small]] = False
+            keep = ~too_small
+            idx, t_i, y_i, f_i, h_i = idx[keep], t_i[keep], y_i[keep], f_i[keep], h_i[keep]
+            if not len(idx):
+                break
+        
+        step_rhs = counted_rhs(idx)
+        if J is not None:
+            refresh = idx[stale[idx]]
+            if len(refresh):
+                if jac is None:
+                    J[refresh] = _fd_jacobian(np, counted_rhs(refresh), t[refresh], y[refresh], f[refresh], atol)
+                    n_rhs[refresh] += n - 1
+                
+                else:
+                    J[refresh] = np.asarray(jac(t[refresh], y[refresh]), dtype = float).reshape(len(refresh), n, n)
+                
+                n_jac[refresh] += 1
+                stale[refresh] = False
+        
+        y_new, f_new, error, data = stepper.step(step_rhs, t_i, y_i, h_i, f_i, None if J is None else J[idx])
+        scale = atol + rtol * np.maximum(np.abs(y_i), np.abs(y_new))
+        error_norm = _rms(np, error, scale)
+        accepted = error_norm <= 1
+        
+        with np.errstate(divide = 'ignore'):
+            factor = SAFETY * error_norm ** (-1 / (stepper.error_order + 1))
+        
+        factor = np.where(accepted, np.clip(factor, MIN_FACTOR, MAX_FACTOR), np.clip(factor, MIN_FACTOR, SAFETY))
+        factor[~np.isfinite(error_norm)] = MIN_FACTOR
+        h[idx] = h_i * factor
+        n_rejected[idx[~accepted]] += 1
+        
+        if not accepted.any():
+            continue
+        
+        # Accepted steps, numbered locally by `a`.
+        a = np.flatnonzero(accepted)
+        ids, t_old, h_a = idx[a], t_i[a], h_i[a]
+        # The last step lands on t_end exactly, despite rounding.
+        t_new = np.where(h_a == t_end - t_old, t_end, t_old + h_a)
+        y_acc, f_acc = y_new[a], f_new[a]
+        data_a = tuple(d[a] for d in data)
+        n_steps[ids] += 1
+        
+        # Events: zeros within the step are located by bisection on the
+        # interpolant, and terminal ones cut the step short.
+        t_stop = t_new.copy()
+        stopped = np.zeros(len(a), dtype = bool)
+        found = []
+        for e, event in enumerate(events):
+            g_old = g[e][ids]
+            g_new = np.asarray(event(t_new, y_acc), dtype = float)
+            crossed = (np.sign(g_old) != np.sign(g_new)) & (g_old != 0)
+            if direction[e] > 0:
+                crossed &= g_new > g_old
+            
+            elif direction[e] < 0:
+                crossed &= g_new < g_old
+            
+            c = np.flatnonzero(crossed)
+            roots = t_new[c]
+            if len(c):
+                lo, hi = np.zeros(len(c)), np.ones(len(c))
+                g_lo = g_old[c]
+                sub = tuple(d[c] for d in data_a)
+                for _ in range(52):
+                    mid = 0.5 * (lo + hi)
+                    g_mid = np.asarray(event(t_old[c] + mid * h_a[c], stepper.interpolate(h_a[c], sub, mid)), dtype = float)
+                    same = np.sign(g_mid) == np.sign(g_lo)
+                    lo, hi = np.where(same, mid, lo), np.where(same, hi, mid)
+                    g_lo = np.where(same, g_mid, g_lo)
+                
+                roots = t_old[c] + hi * h_a[c]
+                if terminal[e]:
+                    earlier = roots < t_stop[c]
+                    t_stop[c[earlier]] = roots[earlier]
+                    stopped[c] = True
+            
+            found.append((c, roots))
+            g[e][ids] = g_new
+        
+        for e, (c, roots) in enumerate(found):
+            keep = roots <= t_stop[c]
+            c, roots = c[keep], roots[keep]
+            if len(c):
+                x = (roots - t_old[c]) / h_a[c]
+                y_roots = stepper.interpolate(h_a[c], tuple(d[c] for d in data_a), x)
+                event_chunks[e].append((ids[c], roots, y_roots))
+        
+        if stopped.any():
+            s = np.flatnonzero(stopped)
+            x = (t_stop[s] - t_old[s]) / h_a[s]
+            y_acc = y_acc.copy()
+            y_acc[s] = stepper.interpolate(h_a[s], tuple(d[s] for d in data_a), x)
+            status[ids[s]] = 1
+            active[ids[s]] = False
+        
+        if t_eval is not None:
+            starts = np.searchsorted(t_eval, t_old, side = 'right')
+            stops = np.searchsorted(t_eval, t_stop, side = 'right')
+            owner, k = _ranges(np, starts, stops)
+            if len(k):
+                x = (t_eval[k] - t_old[owner]) / h_a[owner]
+                y_out[ids[owner], k] = stepper.interpolate(h_a[owner], tuple(d[owner] for d in data_a), x)
+        
+        else:
+            chunks.append((ids, t_stop, y_acc))
+        
+        if dense_output:
+            dense_chunks.append((ids, t_old, h_a, data_a))
+        
+        t[ids], y[ids], f[ids] = t_stop, y_acc, f_acc
+        if J is not None:
+            stale[ids] = True
+        
+        finished = t_stop >= t_end
+        active[ids[finished]] = False
+    
+    def grouped(chunks, width):
+        '''
+        Concatenated ``(owner, time, state)`` chunks, as per trajectory arrays.
+        '''
+        if not chunks:
+            return [np.empty(0) for _ in range(m)], [np.empty((0, width)) for _ in range(m)]
+        
+        owners = np.concatenate([c[0] for c in chunks])
+        times = np.concatenate([c[1] for c in chunks])
+        states = np.concatenate([c[2] for c in chunks])
+        order = np.lexsort((times, owners))
+        bounds = np.searchsorted(owners[order], np.arange(m + 1))
+        return (
+            [times[order[lo:hi]] for lo, hi in zip(bounds[:-1], bounds[1:])],
+            [states[order[lo:hi]] for lo, hi in zip(bounds[:-1], bounds[1:])],
+        )
+    
+    if t_eval is not None:
+        t_out, y_res = t_eval, (y_out[0] if single else y_out)
+    
+    else:
+        t_out, y_res = grouped(chunks, n)
+        if single:
+            t_out, y_res = t_out[0], y_res[0]
+    
+    t_events, y_events = [], []
+    for e in range(len(events)):
+        times, states = grouped(event_chunks[e], n)
+        t_events.append(times[0] if single else times)
+        y_events.append(states[0] if single else states)
+    
+    sol = None
+    if dense_output and dense_chunks:
+        sol = DenseOutput(
+            np, stepper,
+            np.concatenate([c[0] for c in dense_chunks]),
+            np.concatenate([c[1] for c in dense_chunks]),
+            np.concatenate([c[2] for c in dense_chunks]),
+            tuple(np.concatenate([c[3][i] for c in dense_chunks]) for i in range(len(dense_chunks[0][3]))),
+            m, single
+        )
+    
+    stats = {'n_steps': n_steps, 'n_rejected': n_rejected, 'n_rhs': n_rhs, 'n_jac': n_jac}
+    if single:
+        stats = {k: int(v[0]) for k, v in stats.items()}
+        status = int(status[0])
+    
+    return IntegrationResult(t_out, y_res, stats, status, t_events, y_events, sol)
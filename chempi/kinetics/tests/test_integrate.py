@@ -0,0 +1,98 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from chempi.kinetics import integrate
+from chempi.reactionsystem import ReactionSystem
+
+RATES = np.array([1.0, 2.0, 0.5])
+
+def decay(t, y):
+    return -RATES * y
+
+def _exact(y0, t):
+    return np.asarray(y0)[:, None, :] * np.exp(-np.outer(t, RATES))[None]
+
+@pytest.mark.parametrize('method', ['rk45', 'rosenbrock'])
+def test_batched_decay(method):
+    y0 = np.array([[1.0, 1.0, 1.0], [2.0, 0.5, 3.0], [0.0, 1e-3, 1e3]])
+    t_eval = np.linspace(0, 2, 9)
+    result = integrate(decay, (0, 2), y0, method = method, t_eval = t_eval, rtol = 1e-8, atol = 1e-12)
+    assert result.status.tolist() == [0, 0, 0]
+    assert result.y.shape == (3, 9, 3)
+    assert np.allclose(result.y, _exact(y0, t_eval), rtol = 1e-5, atol = 1e-10)
+    assert (result.stats['n_steps'] > 0).all()
+
+@pytest.mark.parametrize('method', ['rk45', 'rosenbrock'])
+def test_batched_matches_single(method):
+    y0 = np.array([[1.0, 1.0, 1.0], [2.0, 0.5, 3.0]])
+    batched = integrate(decay, (0, 1), y0, method = method, rtol = 1e-8)
+    for b in range(len(y0)):
+        single = integrate(decay, (0, 1), y0[b], method = method, rtol = 1e-8)
+        assert single.status == 0
+        assert np.allclose(batched.t[b], single.t, rtol = 1e-12)
+        assert np.allclose(batched.y[b], single.y, rtol = 1e-12)
+        assert batched.stats['n_steps'][b] == single.stats['n_steps']
+        assert single.t[0] == 0 and single.t[-1] == 1
+
+def test_stiff_reaction_system():
+    # Robertson's problem.
+    rsys = ReactionSystem(['A', 'B', 'C'])
+    rsys.add_reaction({'A': 1}, {'B': 1}, param = 0.04)
+    rsys.add_reaction({'B': 2}, {'B': 1, 'C': 1}, param = 3e7)
+    rsys.add_reaction({'B': 1, 'C': 1}, {'A': 1, 'C': 1}, param = 1e4)
+    result = rsys.integrate((0, 40), [[1.0, 0.0, 0.0]] * 2, t_eval = [40.0], rtol = 1e-6, atol = 1e-10)
+    assert result.status.tolist() == [0, 0]
+    assert np.allclose(result.y[:, -1], [0.7158271, 9.185535e-6, 0.2841637], rtol = 1e-3)
+    assert np.allclose(result.y[:, -1].sum(axis = 1), 1)
+    assert (result.stats['n_steps'] < 1000).all()
+    assert (result.stats['n_jac'] > 0).all()
+
+@pytest.mark.parametrize('method', ['rk45', 'rosenbrock'])
+def test_events(method):
+    half = lambda t, y: y[:, 0] - 0.5
+    half.terminal = True
+    tenth = lambda t, y: y[:, 1] - 0.1
+    rising = lambda t, y: y[:, 1] - 0.1
+    rising.direction = 1
+    y0 = np.array([[1.0, 1.0, 1.0], [2.0, 1.0, 1.0]])
+    t_eval = np.linspace(0, 2, 5)
+    result = integrate(decay, (0, 2), y0, method = method, events = [half, tenth, rising], t_eval = t_eval, rtol = 1e-10)
+    assert result.status.tolist() == [1, 1]
+    t_half = np.log([2.0, 4.0])
+    for b in range(2):
+        assert np.allclose(result.t_events[0][b], [t_half[b]], rtol = 1e-6)
+        assert np.allclose(result.y_events[0][b][:, 0], 0.5, rtol = 1e-6)
+        assert len(result.t_events[2][b]) == 0
+    
+    # y[1] reaches 0.1 at log(10) / 2, before the terminal event of the
+    # second trajectory only.
+    assert len(result.t_events[1][0]) == 0
+    assert np.allclose(result.t_events[1][1], [np.log(10) / 2], rtol = 1e-6)
+    # No states past the terminal events.
+    assert np.isnan(result.y[0, t_eval > t_half[0]]).all()
+    assert not np.isnan(result.y[0, t_eval <= t_half[0]]).any()
+
+def test_dense_output():
+    y0 = np.array([[1.0, 1.0, 1.0], [2.0, 0.5, 3.0]])
+    t = np.linspace(0, 1, 7)
+    result = integrate(decay, (0, 1), y0, method = 'rosenbrock', dense_output = True, rtol = 1e-8)
+    assert result.sol(t).shape == (2, 7, 3)
+    assert np.allclose(result.sol(t), _exact(y0, t), rtol = 1e-5)
+    assert result.sol(0.5).shape == (2, 3)
+    assert integrate(decay, (0, 1), y0).sol is None
+
+def test_max_steps():
+    result = integrate(decay, (0, 100), [[1.0, 1.0, 1.0]], max_steps = 5)
+    assert result.status.tolist() == [-1]
+    assert result.stats['n_steps'][0] + result.stats['n_rejected'][0] == 5
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        integrate(decay, (0, 1), [1.0, 1.0, 1.0], method = 'euler')
+    
+    with pytest.raises(ValueError):
+        integrate(decay, (1, 0), [1.0, 1.0, 1.0])
+    
+    with pytest.raises(ValueError):
+        integrate(decay, (0, 1), [1.0, 1.0, 1.0], t_eval = [0.5, 0.2])
@@ -0,0 +1,10 @@
+"""
+Linear algebra helpers, e.g. for balancing chemical equations.
+"""
+from ._linalg import Matrix, Vector
+from .exception import (
+    LinalgException, UninvertibleMatrixError, LSTSQNonconvergenceError,
+    LinalgOPError, VectorOPError, MatrixOPError
+)
+from ._nullspace import nullspace, balancing_coefficients, balance_compositions
+from ._lstsq import LstsqResult, lstsq
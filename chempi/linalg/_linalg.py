@@ -6,7 +6,10 @@ will be helpful for stuff like balancing chemical
 equations and such.
 """
 
-from _util import coerce
+from array   import array
+from numbers import Number
+
+from .._util import coerce, get_backend_fallback, is_array_backend
 from .exception import *
 
 # Save local copies of errors
@@ -19,181 +22,507 @@ LSTSQNonconvergenceError = LSTSQNonconvergenceError
 
 NumericType = int | float | complex
 
-class Vector:
-    def __init__(self, vecv: list[list[NumericType]]) -> None:
-        if not all(len(vecv[i]) == len(vecv[0]) for i in range(1, len(vecv))):
-            raise ValueError(
-                "Vector must have rows of length 1 "
-                "if it has more than one row."
-            )
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+def _buffer(values):
+    """
+    Flat storage for `values` when NumPy isn't used: an `array.array`
+    for ints or floats, and a plain list for anything else (complex
+    numbers, fractions, symbols...).
+    """
+    if all(type(v) is int for v in values):
+        try:
+            return array('q', values)
         
-        self.vecv = vecv
-        return
+        except OverflowError:
+            return list(values)
     
-    def __coerce__(self, other):
-        if not isinstance(other, Vector):
-            other = Vector(other)
-        pass
+    if all(type(v) in (int, float) for v in values):
+        return array('d', values)
+    
+    return list(values)
 
-    def conjugate(self):
-        ret = self.vecv[:]
-        for i in range(len(ret)):
-            for j in range(len(ret[0])):
-                ret[i][j] = ret[i][j].conjugate()
-        
-        return Vector(ret)
+def _indices(idx, size):
+    """
+    `(start, step, length)` of an int or slice index along one axis.
+    """
+    if isinstance(idx, slice):
+        rng = range(size)[idx]
+        return rng.start, rng.step, len(rng)
     
-    @property
-    def T(self):
-        """
-        Transposes the vector
-        """
-        return Vector(list(map(list, zip(*self.vecv))))
+    return range(size)[idx], 1, None
+
+class _Row:
+    """
+    Row `i` of a Matrix or Vector, as given by `m[i]`. Like the row lists
+    of old, it supports `row[j]` (and slices) and `len`, but reads and
+    writes go to the buffer of the array.
+    """
+    __slots__ = ('_parent', '_i')
     
-    @property
-    def H(self):
-        return self.conjugate().T
+    def __init__(self, parent, i):
+        self._parent = parent
+        self._i = i
     
-    def __add__(self, other):
-        coerce(self, other)
+    def __len__(self):
+        return self._parent._shape[1]
+    
+    def __iter__(self):
+        for j in range(len(self)):
+            yield self._parent._get(self._i, j)
+    
+    def __getitem__(self, j):
+        if isinstance(j, slice):
+            return [self._parent._get(self._i, k) for k in range(len(self))[j]]
         
-        if len(self.vecv) != len(other.vecv) or len(self.vecv[0]) != len(other.vecv[0]):
-            raise VectorOPError(
-                "Cannot add vectors with incompatible dimensions.")
+        return self._parent._get(self._i, range(len(self))[j])
+    
+    def __setitem__(self, j, value):
+        if isinstance(j, slice):
+            value = [list(value)]
         
-        ret = self.vecv[:]
-        for idx in range(len(self.vecv)):
-            for jdx in range(len(self.vecv[0])):
-                ret[idx][jdx] += other.vecv[idx][jdx]
+        self._parent[self._i, j] = value
+    
+    def tolist(self):
+        return list(self)
+    
+    def __eq__(self, other):
+        if isinstance(other, (_Row, list, tuple)):
+            return list(self) == list(other)
         
-        return Vector(ret)
+        return NotImplemented
     
-    def __sub__(self, other):
-        coerce(self, other)
+    __hash__ = None
+    
+    def __repr__(self):
+        return repr(self.tolist())
 
-        if len(self.vecv) != len(other.vecv) or len(self.vecv[0]) != len(other.vecv[0]):
-            raise VectorOPError(
-                "Cannot subtract vectors with incompatible dimensions.")
+class _Dense:
+    """
+    Two dimensional array stored in a flat, contiguous buffer (a NumPy
+    array when available, see :func:`chempi._util.get_backend_fallback`,
+    and an `array.array` otherwise) together with an offset, a shape and
+    strides, so that slices, transposes and conjugate transposes are views
+    sharing the buffer instead of copies. Writing to a view writes to the
+    original.
+    
+    The buffer is widened (ints to floats to complex numbers, or to a list
+    of arbitrary objects without NumPy) when in-place operations or
+    assignments need it, for all the views sharing it at once.
+    """
+    _op_error = LinalgOPError
+    _plural = "arrays"
+    
+    def __init__(self, values, backend = None) -> None:
+        if isinstance(values, _Dense):
+            backend = values._backend if backend is None else backend
+            values = values.tolist()
         
-        ret = self.vecv[:]
-        for idx in range(len(self.vecv)):
-            for jdx in range(len(self.vecv[0])):
-                ret[idx][jdx] -= other.vecv[idx][jdx]
+        elif isinstance(values, (list, tuple)):
+            if not all(len(values[i]) == len(values[0]) for i in range(1, len(values))):
+                raise ValueError(
+                    f"{type(self).__name__} must have all rows exactly "
+                    "the same size."
+                )
         
-        return Vector(ret)
-    
-    def __mul__(self, other):
-        ret = self.vecv[:]
-        if isinstance(type(other), NumericType):
-            for idx in range(len(self.vecv)):
-                for jdx in range(len(self.vecv[0])):
-                    ret[idx][jdx] *= other
+        backend = get_backend_fallback(backend)
+        if is_array_backend(backend):
+            arr = backend.array(values)
+            if arr.ndim != 2:
+                raise ValueError(f"{type(self).__name__} must be 2-dimensional.")
             
-            return Vector(ret)
+            shape = arr.shape
+            data = arr.ravel()
         
-        return NotImplemented
+        else:
+            shape = (len(values), len(values[0]) if len(values) else 0)
+            data = _buffer([v for row in values for v in row])
         
-    def __iadd__(self, other):
-        self = self + other
-        return self
+        self._set_view([data], 0, shape, (shape[1], 1), False, backend)
     
-    def __isub__(self, other):
-        self = self - other
-        return self
+    def _set_view(self, store, offset, shape, strides, conj, backend):
+        # `store` holds the buffer, so that widening it (see `_promote`)
+        # reaches every view.
+        self._store = store
+        self._offset = offset
+        self._shape = tuple(shape)
+        self._strides = tuple(strides)
+        self._conj = conj
+        self._backend = backend
     
-    def __imul__(self, other):
-        self = self * other
-        return self
-
-    def __radd__(self, other):
-        return self.__add__(other)
+    def _view(self, offset, shape, strides, conj = None, cls = None):
+        ret = object.__new__(cls or type(self))
+        ret._set_view(self._store, offset, shape, strides, self._conj if conj is None else conj, self._backend)
+        return ret
     
-    def __rsub__(self, other):
-        return self.__sub__(other)
+    @classmethod
+    def _from_array(cls, arr, backend):
+        ret = object.__new__(cls)
+        ret._set_view([arr.ravel()], 0, arr.shape, (arr.shape[1], 1), False, backend)
+        return ret
     
-    def __rmul__(self, other):
-        return self.__mul__(other)
-
-    def __repr__(self):
-        return f"Vector({self.vecv})"
+    @classmethod
+    def _from_flat(cls, values, shape, backend):
+        ret = object.__new__(cls)
+        ret._set_view([_buffer(values)], 0, shape, (shape[1], 1), False, backend)
+        return ret
     
-    __str__ = __repr__
-
-class Matrix:
-    def __init__(self, matv: list[list[NumericType]]) -> None:
-        if not all(len(matv[i]) == len(matv[0]) for i in range(1, len(matv))):
-            raise ValueError(
-                "Matrix must have all rows exactly "
-                "the same size."
-            )
+    @property
+    def _data(self):
+        return self._store[0]
+    
+    @property
+    def _vectorized(self):
+        return is_array_backend(self._backend)
+    
+    def _promote(self, values):
+        """
+        Widens the buffer so that it can hold `values` (scalars, or dtypes
+        for NumPy) without truncating them.
+        """
+        data = self._data
+        if self._vectorized:
+            dtype = self._backend.result_type(data.dtype, *values)
+            if dtype != data.dtype:
+                self._store[0] = data.astype(dtype)
+            
+            return
+        
+        if isinstance(data, list):
+            return
+        
+        kinds = {type(v) for v in values}
+        if data.typecode == 'q' and kinds <= {int, bool} and all(_INT64_MIN <= v <= _INT64_MAX for v in values):
+            return
+        
+        if kinds <= {int, bool, float} and not (data.typecode == 'q' and kinds <= {int, bool}):
+            if data.typecode == 'q':
+                self._store[0] = array('d', data)
+            
+            return
         
-        self.matv = matv
-        return
+        self._store[0] = list(data)
     
-    def __coerce__(self, other):
-        if not isinstance(other, Matrix):
-            other = Matrix(other)
-        pass
+    def _array(self):
+        """
+        NumPy view of the data, only valid for the NumPy backend. The
+        conjugate is taken lazily, i.e. copied, when reading from a
+        conjugated view.
+        """
+        itemsize = self._data.itemsize
+        arr = self._backend.lib.stride_tricks.as_strided(
+            self._data[self._offset:],
+            shape = self._shape,
+            strides = tuple(s * itemsize for s in self._strides)
+        )
+        return arr.conj() if self._conj else arr
     
-    def conjugate(self):
-        ret = self.matv[:]
-        for idx in range(len(ret)):
-            for jdx in range(len(ret[0])):
-                ret[idx][jdx] = ret[idx][jdx].conjugate()
-
-        return Matrix(ret)
+    def _write_array(self, values):
+        itemsize = self._data.itemsize
+        arr = self._backend.lib.stride_tricks.as_strided(
+            self._data[self._offset:],
+            shape = self._shape,
+            strides = tuple(s * itemsize for s in self._strides)
+        )
+        arr[...] = self._backend.conj(values) if self._conj else values
+    
+    def _pos(self, i, j):
+        return self._offset + i * self._strides[0] + j * self._strides[1]
+    
+    def _get(self, i, j):
+        v = self._data[self._pos(i, j)]
+        return v.conjugate() if self._conj else v
+    
+    def _set(self, i, j, v):
+        self._data[self._pos(i, j)] = v.conjugate() if self._conj else v
+    
+    def _flat(self):
+        """
+        Values of the (non NumPy) array, in row-major order.
+        """
+        rows, cols = self._shape
+        return [self._get(i, j) for i in range(rows) for j in range(cols)]
+    
+    @property
+    def shape(self):
+        return self._shape
     
     @property
     def rows(self):
-        return len(self)
+        return self._shape[0]
     
     @property
     def cols(self):
-        return len(self[0])
+        return self._shape[1]
+    
+    def __len__(self):
+        return self._shape[0]
+    
+    def __iter__(self):
+        for i in range(self._shape[0]):
+            yield self[i]
+    
+    def tolist(self):
+        """
+        Copy of the data as nested lists.
+        """
+        if self._vectorized:
+            return self._array().tolist()
+        
+        rows, cols = self._shape
+        return [[self._get(i, j) for j in range(cols)] for i in range(rows)]
+    
+    def copy(self):
+        """
+        Contiguous copy of the (possibly strided) view.
+        """
+        if self._vectorized:
+            return self._from_array(self._backend.array(self._array()), self._backend)
+        
+        return self._from_flat(self._flat(), self._shape, self._backend)
+    
+    def __array__(self, dtype = None, copy = None):
+        arr = self._array() if self._vectorized else get_backend_fallback(None).array(self.tolist())
+        return arr.astype(dtype) if dtype is not None else arr
+    
+    def conjugate(self):
+        """
+        Complex conjugate of the array, as a view.
+        """
+        return self._view(self._offset, self._shape, self._strides, conj = not self._conj)
     
     @property
     def T(self):
         """
-        Transposes the matrix
+        Transposes the array, as a view.
         """
-        return Matrix(list(map(list, zip(*self.matv))))
+        return self._view(self._offset, self._shape[::-1], self._strides[::-1])
     
     @property
     def H(self):
         """
-        Gets the complex transposition of the matrix
+        Gets the complex transposition of the array, as a view.
         """
         return self.conjugate().T
     
-    def __len__(self):
-        return len(self.matv)
-    
-    def __getitem__(self, *arg):
+    def __getitem__(self, idx):
         """
-        Support for indexing matrices.
-        More complex indexing support will be added
-        in the future.
-
-        Right now, the only available syntax
-        is the regular ol' Python container
-        syntax as a 1- or 2-elem tuple, without slice support.
+        Supports indexing with a row index or a `(row, column)` tuple,
+        where each index may be an int or a slice. An int gives the row
+        (so that `m[i][j]` works), and two ints the element; otherwise the
+        result is a (2-dimensional) view, e.g. `m[1:]` are all the rows but
+        the first and `m[:, 1]` is the second column.
         """
-        if isinstance(arg[0], int):
-            return self.matv[arg[0]]
+        if not isinstance(idx, tuple):
+            if not isinstance(idx, slice):
+                return _Row(self, range(self._shape[0])[idx])
+            
+            idx = (idx, slice(None))
         
-        return self.matv[arg[0][0]][arg[0][1]]
+        if len(idx) != 2:
+            raise IndexError(f"{type(self).__name__} takes at most 2 indices.")
+        
+        (i, i_step, rows), (j, j_step, cols) = (
+            _indices(idx[0], self._shape[0]),
+            _indices(idx[1], self._shape[1])
+        )
+        if rows is None and cols is None:
+            return self._get(i, j)
+        
+        return self._view(
+            self._pos(i, j) if (rows != 0 and cols != 0) else self._offset,
+            (1 if rows is None else rows, 1 if cols is None else cols),
+            (self._strides[0] * i_step, self._strides[1] * j_step)
+        )
     
     def __setitem__(self, idx, value):
         """
-        Minimal working support for Matrix.__setitem__
-        Right now, syntax expressions are very lackluster,
-        but updates will be made in the future.
+        Assigns an element, or a view (see `__getitem__`) from a scalar
+        or from values of the same shape.
         """
-        assert len(idx) == 2 # DO NOT BREAK BY ACCIDENT
-        self[idx] = value
-        pass
+        if not isinstance(idx, tuple):
+            idx = (idx, slice(None))
+            if not isinstance(value, (_Dense, Number)):
+                value = [list(value)]
+        
+        target = self[idx]
+        if not isinstance(target, _Dense):
+            i, j = idx
+            self._promote([value])
+            self._set(range(self._shape[0])[i], range(self._shape[1])[j], value)
+            return
+        
+        target._assign(value)
+    
+    def _assign(self, value):
+        if not isinstance(value, (_Dense, Number)):
+            value = type(self)(value, self._backend)
+        
+        if isinstance(value, _Dense) and value._shape != self._shape:
+            raise self._op_error(
+                f"Cannot assign {value._shape[0]}x{value._shape[1]} values "
+                f"to a {self._shape[0]}x{self._shape[1]} view."
+            )
+        
+        if self._vectorized:
+            self._promote([value._data.dtype if isinstance(value, _Dense) else value])
+            self._write_array(value._array() if isinstance(value, _Dense) else value)
+            return
+        
+        self._promote(value._flat() if isinstance(value, _Dense) else [value])
+        rows, cols = self._shape
+        for i in range(rows):
+            for j in range(cols):
+                self._set(i, j, value._get(i, j) if isinstance(value, _Dense) else value)
+    
+    def __coerce__(self, other):
+        if not isinstance(other, _Dense):
+            other = type(self)(other, self._backend)
+        
+        return self, other
+    
+    def _elementwise(self, other, op, verb, inplace = False):
+        if not isinstance(other, Number):
+            _, other = coerce(self, other)
+            if other._shape != self._shape:
+                raise self._op_error(
+                    f"Cannot {verb} {self._plural} with incompatible dimensions.")
+        
+        if self._vectorized:
+            result = op(self._array(), other._array() if isinstance(other, _Dense) else other)
+            if inplace:
+                self._promote([result.dtype])
+                self._write_array(result)
+                return self
+            
+            return self._from_array(result, self._backend)
+        
+        if isinstance(other, _Dense):
+            values = list(map(op, self._flat(), other._flat()))
+        
+        else:
+            values = [op(v, other) for v in self._flat()]
+        
+        if inplace:
+            self._promote(values)
+            rows, cols = self._shape
+            for n, v in enumerate(values):
+                self._set(*divmod(n, cols), v)
+            
+            return self
+        
+        return self._from_flat(values, self._shape, self._backend)
+    
+    def __add__(self, other):
+        return self._elementwise(other, lambda a, b: a + b, "add")
+    
+    def __sub__(self, other):
+        return self._elementwise(other, lambda a, b: a - b, "subtract")
+    
+    def __mul__(self, other):
+        if isinstance(other, Number):
+            return self._elementwise(other, lambda a, b: a * b, "multiply")
+        
+        return NotImplemented
+    
+    def __truediv__(self, other):
+        if isinstance(other, Number):
+            return self._elementwise(other, lambda a, b: a / b, "divide")
+        
+        return NotImplemented
+    
+    def __neg__(self):
+        return self * -1
+    
+    def __iadd__(self, other):
+        return self._elementwise(other, lambda a, b: a + b, "add", inplace = True)
+    
+    def __isub__(self, other):
+        return self._elementwise(other, lambda a, b: a - b, "subtract", inplace = True)
+    
+    def __imul__(self, other):
+        if isinstance(other, Number):
+            return self._elementwise(other, lambda a, b: a * b, "multiply", inplace = True)
+        
+        return NotImplemented
+    
+    def __itruediv__(self, other):
+        if isinstance(other, Number):
+            return self._elementwise(other, lambda a, b: a / b, "divide", inplace = True)
+        
+        return NotImplemented
+    
+    def __radd__(self, other):
+        return self.__add__(other)
+    
+    def __rsub__(self, other):
+        return self._elementwise(other, lambda a, b: b - a, "subtract")
+    
+    def __rmul__(self, other):
+        return self.__mul__(other)
+    
+    def __matmul__(self, other):
+        if not isinstance(other, _Dense):
+            _, other = coerce(self, other)
+        
+        (n, k), (k_other, m) = self._shape, other._shape
+        if k != k_other:
+            raise MatrixOPError(
+                f"Cannot multiply a {n}x{k} by a {k_other}x{m} array.")
+        
+        cls = Vector if 1 in (n, m) and (isinstance(self, Vector) or isinstance(other, Vector)) else Matrix
+        if self._vectorized:
+            return cls._from_array(self._array() @ other._array(), self._backend)
+        
+        # Rows of `self` and columns of `other`, each gathered once.
+        a = self._flat()
+        b = other.T._flat()
+        values = [
+            sum((x * y for x, y in zip(a[i*k:(i + 1)*k], b[j*k:(j + 1)*k])), 0)
+            for i in range(n) for j in range(m)
+        ]
+        return cls._from_flat(values, (n, m), self._backend)
+    
+    def __rmatmul__(self, other):
+        _, other = coerce(self, other)
+        return other @ self
     
     def __repr__(self):
-        return f"Matrix({self.matv})"
+        return f"{type(self).__name__}({self.tolist()})"
+    
+    __str__ = __repr__
+
+class Vector(_Dense):
+    """
+    Row or column vector, stored as a `1xn` or `nx1` array.
+    """
+    _op_error = VectorOPError
+    _plural = "vectors"
+    
+    @property
+    def vecv(self):
+        """
+        Copy of the values as nested lists; assigning nested lists
+        replaces them.
+        """
+        return self.tolist()
+    
+    @vecv.setter
+    def vecv(self, values):
+        self.__init__(values, self._backend)
+
+class Matrix(_Dense):
+    _op_error = MatrixOPError
+    _plural = "matrices"
+    
+    @property
+    def matv(self):
+        """
+        Copy of the values as nested lists; assigning nested lists
+        replaces them.
+        """
+        return self.tolist()
     
-    __str__ = __repr__
\ No newline at end of file
+    @matv.setter
+    def matv(self, values):
+        self.__init__(values, self._backend)
@@ -0,0 +1,302 @@
+"""
+Linear least squares, e.g. for fitting equilibrium constants to
+titration data.
+"""
+
+from collections import namedtuple
+from math        import copysign, fsum, sqrt
+
+from .._util    import get_backend_fallback, is_array_backend
+from ._linalg   import _Dense, Matrix, Vector
+from .exception import LinalgOPError, LSTSQNonconvergenceError, UninvertibleMatrixError
+
+LstsqResult = namedtuple('LstsqResult', ['x', 'residuals', 'rank'])
+
+def _householder_qr(cols, m, n, rcond):
+    """
+    In-place Householder QR of the matrix given as a list of `n` columns
+    of length `m`. Returns a solver for right-hand sides (given as columns),
+    which applies the reflectors and back-substitutes.
+    """
+    reflectors = []
+    for j in range(n):
+        x = cols[j][j:]
+        norm = sqrt(fsum(v * v for v in x))
+        if norm == 0:
+            reflectors.append(None)
+            continue
+        
+        alpha = -copysign(norm, x[0])
+        v = x
+        v[0] -= alpha
+        v_norm2 = fsum(a * a for a in v)
+        reflectors.append((v, v_norm2))
+        
+        cols[j][j:] = [alpha] + [0.0] * (m - j - 1)
+        for col in cols[j + 1:]:
+            s = 2 * fsum(a * b for a, b in zip(v, col[j:])) / v_norm2
+            col[j:] = [b - s * a for a, b in zip(v, col[j:])]
+    
+    diag = [abs(cols[j][j]) for j in range(n)]
+    if n and min(diag) <= rcond * max(diag):
+        raise UninvertibleMatrixError(
+            "Matrix is rank deficient, use method='svd' for a minimum norm solution.")
+    
+    def solve(rhs):
+        solutions, residuals = [], []
+        for b in rhs:
+            b = list(b)
+            for j, reflector in enumerate(reflectors):
+                if reflector is not None:
+                    v, v_norm2 = reflector
+                    s = 2 * fsum(a * c for a, c in zip(v, b[j:])) / v_norm2
+                    b[j:] = [c - s * a for a, c in zip(v, b[j:])]
+            
+            x = [0.0] * n
+            for i in range(n - 1, -1, -1):
+                x[i] = (b[i] - fsum(cols[k][i] * x[k] for k in range(i + 1, n))) / cols[i][i]
+            
+            solutions.append(x)
+            residuals.append(fsum(c * c for c in b[n:]))
+        
+        return solutions, residuals
+    
+    return solve, n
+
+def _jacobi_svd(cols, m, n, max_sweeps = 60):
+    """
+    One-sided Jacobi SVD of the matrix given as a list of `n` columns of
+    length `m`, with `m >= n`. Returns `(u_cols, sigmas, v_cols)`.
+    """
+    u = [list(col) for col in cols]
+    v = [[float(i == j) for i in range(n)] for j in range(n)]
+    eps = 2.0 ** -52
+    
+    for _ in range(max_sweeps):
+        rotated = False
+        for p in range(n - 1):
+            for q in range(p + 1, n):
+                up, uq = u[p], u[q]
+                alpha = fsum(a * a for a in up)
+                beta = fsum(b * b for b in uq)
+                gamma = fsum(a * b for a, b in zip(up, uq))
+                if abs(gamma) <= eps * sqrt(alpha * beta):
+                    continue
+                
+                rotated = True
+                zeta = (beta - alpha) / (2 * gamma)
+                t = copysign(1.0, zeta) / (abs(zeta) + sqrt(1 + zeta * zeta))
+                c = 1 / sqrt(1 + t * t)
+                s = c * t
+                u[p] = [c * a - s * b for a, b in zip(up, uq)]
+                u[q] = [s * a + c * b for a, b in zip(up, uq)]
+                vp, vq = v[p], v[q]
+                v[p] = [c * a - s * b for a, b in zip(vp, vq)]
+                v[q] = [s * a + c * b for a, b in zip(vp, vq)]
+        
+        if not rotated:
+            break
+    
+    else:
+        raise LSTSQNonconvergenceError(f"Jacobi SVD did not converge in {max_sweeps} sweeps.")
+    
+    sigmas = [sqrt(fsum(a * a for a in col)) for col in u]
+    u = [[a / sigma for a in col] if sigma else col for col, sigma in zip(u, sigmas)]
+    return u, sigmas, v
+
+def _svd_solver(cols, m, n, rcond):
+    """
+    Minimum norm least squares solver based on the SVD of the matrix given
+    as a list of `n` columns of length `m`.
+    """
+    if m >= n:
+        u, sigmas, v = _jacobi_svd(cols, m, n)
+    
+    else:
+        # A = U S V^T  <=>  A^T = V S U^T
+        rows = [[col[i] for col in cols] for i in range(m)]
+        v, sigmas, u = _jacobi_svd(rows, n, m)
+    
+    cutoff = rcond * max(sigmas, default = 0.0)
+    kept = [(u_col, sigma, v_col) for u_col, sigma, v_col in zip(u, sigmas, v) if sigma > cutoff]
+    
+    def solve(rhs):
+        solutions, residuals = [], []
+        for b in rhs:
+            x = [0.0] * n
+            projected = [0.0] * m
+            for u_col, sigma, v_col in kept:
+                coeff = fsum(a * c for a, c in zip(u_col, b))
+                x = [xi + coeff / sigma * vi for xi, vi in zip(x, v_col)]
+                projected = [pi + coeff * ui for pi, ui in zip(projected, u_col)]
+            
+            solutions.append(x)
+            residuals.append(fsum((c - p) ** 2 for c, p in zip(b, projected)))
+        
+        return solutions, residuals
+    
+    return solve, len(kept)
+
+def _numpy_solver(np, a, method, rcond):
+    m, n = a.shape
+    if method == 'qr':
+        q, r = np.linalg.qr(a)
+        diag = np.abs(np.diag(r))
+        if n and diag.min() <= rcond * diag.max():
+            raise UninvertibleMatrixError(
+                "Matrix is rank deficient, use method='svd' for a minimum norm solution.")
+        
+        def solve(b):
+            x = np.linalg.solve(r, q.T @ b)
+            return x, ((b - a @ x) ** 2).sum(axis = 0)
+        
+        return solve, n
+    
+    u, sigmas, vt = np.linalg.svd(a, full_matrices = False)
+    kept = sigmas > rcond * (sigmas.max() if len(sigmas) else 0.0)
+    u, sigmas, vt = u[:, kept], sigmas[kept], vt[kept]
+    
+    def solve(b):
+        coeffs = u.T @ b
+        return vt.T @ (coeffs / sigmas[:, None]), ((b - u @ coeffs) ** 2).sum(axis = 0)
+    
+    return solve, int(kept.sum())
+
+def lstsq(a, b, weights = None, method = 'qr', rcond = 1e-12, refine = 0, rtol = 1e-12, backend = None):
+    """
+    Solves `a @ x ~= b` in the least squares sense.
+    
+    Parameters
+    ==================
+    a: Matrix or nested lists
+        `m x n` real matrix.
+    b: Vector, Matrix or lists
+        `m` values (a row or column Vector, or a flat list), or an `m x k`
+        matrix whose `k` columns are solved for at once, sharing the
+        factorization of `a`.
+    weights: sequence of `m` floats, optional
+        Minimizes `sum(w_i * r_i**2)` instead of the plain sum of squared
+        residuals `r_i` (e.g. inverse variances of the measurements).
+    method: str
+        `'qr'` (Householder QR, requires `a` to have full column rank) or
+        `'svd'`, giving the minimum norm solution for rank deficient or
+        under-determined systems.
+    rcond: float
+        Relative cutoff for the diagonal of R, or for the singular values.
+    refine: int
+        Maximum number of iterative refinement steps, each solving for the
+        correction from the current residuals.
+    rtol: float
+        Refinement stops once the corrections are this small relative to
+        the solution.
+    backend: module or str, optional
+        Defaults to NumPy, falling back to pure Python when NumPy is missing.
+        Pass ``'math'`` to force the pure Python implementation.
+    
+    Returns
+    ==================
+    A ``(x, residuals, rank)`` named tuple, where `x` is an `n x k` Matrix
+    (a Vector for a single right-hand side) and `residuals` holds the
+    (weighted) sum of squared residuals of each column.
+    
+    Raises
+    ==================
+    UninvertibleMatrixError
+        For a rank deficient `a` with `method='qr'`.
+    LSTSQNonconvergenceError
+        If `refine` steps don't bring the corrections below `rtol`.
+    
+    Examples:
+    ==================
+    >>> # Fit y = c0 + c1*t
+    >>> x, residuals, rank = lstsq([[1, 0], [1, 1], [1, 2]], [1, 3, 5], backend = 'math')
+    >>> [round(c, 12) for c in x.vecv[0] + x.vecv[1]]
+    [1.0, 2.0]
+    """
+    if method not in ('qr', 'svd'):
+        raise ValueError(f"Unknown method {method!r}, use 'qr' or 'svd'.")
+    
+    backend = get_backend_fallback(backend)
+    vectorized = is_array_backend(backend)
+    if isinstance(b, Vector):
+        # Row or column, either is a single right-hand side.
+        b = b.T if b.rows == 1 else b
+        single = b.cols == 1
+    
+    else:
+        single = not isinstance(b, _Dense) and not (len(b) and hasattr(b[0], '__len__'))
+    
+    if vectorized:
+        # Matrix and Vector expose their buffers through __array__.
+        a_w = backend.asarray(a, dtype = float)
+        b_w = backend.asarray(b, dtype = float)
+        b_w = b_w.reshape(len(b_w), -1)
+    
+    else:
+        a_w = [[float(v) for v in row] for row in (a.tolist() if hasattr(a, 'tolist') else a)]
+        b_w = [[float(v) for v in row] if hasattr(row, '__len__') else [float(row)]
+               for row in (b.tolist() if hasattr(b, 'tolist') else b)]
+    
+    m, n = len(a_w), len(a_w[0]) if len(a_w) else 0
+    if len(b_w) != m:
+        raise LinalgOPError(f"Cannot fit {len(b_w)} values with a {m}x{n} matrix.")
+    
+    if method == 'qr' and m < n:
+        raise LinalgOPError("The system is under-determined, use method='svd'.")
+    
+    if weights is not None:
+        if len(weights) != m:
+            raise LinalgOPError(f"Expected {m} weights, got {len(weights)}.")
+        
+        if vectorized:
+            scales = backend.sqrt(backend.asarray(weights, dtype = float))[:, None]
+            a_w, b_w = a_w * scales, b_w * scales
+        
+        else:
+            scales = [sqrt(w) for w in weights]
+            a_w = [[scale * v for v in row] for scale, row in zip(scales, a_w)]
+            b_w = [[scale * v for v in row] for scale, row in zip(scales, b_w)]
+    
+    if vectorized:
+        solve, rank = _numpy_solver(backend, a_w, method, rcond)
+        x, residuals = solve(b_w)
+        residual = lambda x: b_w - a_w @ x
+        norms = lambda x: backend.sqrt((x ** 2).sum(axis = 0)).tolist()
+        add = lambda x, dx: x + dx
+    
+    else:
+        # Column-wise storage, both for the matrix and the solutions.
+        a_cols = [list(col) for col in zip(*a_w)]
+        b_cols = [list(col) for col in zip(*b_w)]
+        solve, rank = (_householder_qr if method == 'qr' else _svd_solver)(
+            [col[:] for col in a_cols], m, n, rcond)
+        x, residuals = solve(b_cols)
+        
+        def residual(x):
+            # fsum keeps the residuals accurate enough for the refinement to help.
+            return [
+                [fsum([b_col[i]] + [-a_col[i] * xj for a_col, xj in zip(a_cols, x_col)]) for i in range(m)]
+                for b_col, x_col in zip(b_cols, x)
+            ]
+        
+        norms = lambda x: [sqrt(fsum(v * v for v in x_col)) for x_col in x]
+        add = lambda x, dx: [[a + d for a, d in zip(x_col, d_col)] for x_col, d_col in zip(x, dx)]
+    
+    if refine:
+        for _ in range(refine):
+            dx, _ = solve(residual(x))
+            x = add(x, dx)
+            if all(d <= rtol * s for d, s in zip(norms(dx), norms(x))):
+                break
+        
+        else:
+            raise LSTSQNonconvergenceError(
+                f"Iterative refinement did not converge within {refine} steps.")
+        
+        residuals = (residual(x) ** 2).sum(axis = 0) if vectorized else [fsum(v * v for v in col) for col in residual(x)]
+    
+    cls = Vector if single else Matrix
+    if vectorized:
+        return LstsqResult(cls._from_array(backend.ascontiguousarray(x), backend), residuals.tolist(), rank)
+    
+    return LstsqResult(cls([list(row) for row in zip(*x)], backend), residuals, rank)
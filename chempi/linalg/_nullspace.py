@@ -0,0 +1,191 @@
+"""
+Exact integer nullspaces, e.g. for balancing chemical equations.
+
+Everything is done with Python integers using fraction-free
+(Bareiss) elimination, so there is neither rounding nor the cost of
+`fractions.Fraction` arithmetic.
+"""
+
+from fractions import Fraction
+from functools import reduce
+from math      import gcd, lcm
+
+from .exception import LinalgOPError, UninvertibleMatrixError
+
+def _integer_rows(matrix):
+    """
+    Rows of `matrix` as lists of ints, scaling rows with fractional
+    entries by the lcm of their denominators.
+    """
+    if hasattr(matrix, 'tolist'):
+        matrix = matrix.tolist()
+    
+    rows = []
+    for row in matrix:
+        row = [Fraction(v) for v in row]
+        scale = reduce(lcm, (v.denominator for v in row), 1)
+        rows.append([int(v * scale) for v in row])
+    
+    if rows and not all(len(row) == len(rows[0]) for row in rows):
+        raise ValueError("Matrix must have all rows exactly the same size.")
+    
+    return rows
+
+def _bareiss_rref(rows, n_cols):
+    """
+    Fraction-free Gauss-Jordan elimination, in place. Each step updates
+    every other row as `(p*a_ij - a_ic*a_rj) / p_prev`, where the division
+    is exact (Bareiss), so the entries stay integers of bounded size.
+    
+    Returns the pivot columns; the pivot entries all end up equal.
+    """
+    pivots = []
+    prev = 1
+    r = 0
+    for c in range(n_cols):
+        if r == len(rows):
+            break
+        
+        for p in range(r, len(rows)):
+            if rows[p][c]:
+                break
+        
+        else:
+            continue
+        
+        rows[r], rows[p] = rows[p], rows[r]
+        pivot_row = rows[r]
+        piv = pivot_row[c]
+        
+        for i, row in enumerate(rows):
+            if i == r:
+                continue
+            
+            factor = row[c]
+            if factor:
+                rows[i] = [(piv * a - factor * b) // prev for a, b in zip(row, pivot_row)]
+            
+            elif piv != prev:
+                rows[i] = [piv * a // prev for a in row]
+        
+        prev = piv
+        pivots.append(c)
+        r += 1
+    
+    return pivots
+
+def _primitive(vector):
+    """
+    `vector` divided by the gcd of its entries.
+    """
+    g = reduce(gcd, vector, 0)
+    return [v // g for v in vector] if g > 1 else vector
+
+def nullspace(matrix):
+    """
+    Basis of the nullspace of an integer (or rational) matrix.
+    
+    Parameters
+    ==================
+    matrix: Matrix, nested lists or array
+        Entries must be exact, i.e. ints or fractions.
+    
+    Returns
+    ==================
+    A list of integer vectors (lists), one per free column, each with its
+    entries' gcd divided out.
+    
+    Examples:
+    ==================
+    >>> nullspace([[1, 1, 0], [0, 1, 1]])
+    [[1, -1, 1]]
+    """
+    rows = _integer_rows(matrix)
+    if not rows:
+        raise LinalgOPError("Cannot find the nullspace of an empty matrix.")
+    
+    n_cols = len(rows[0])
+    pivots = _bareiss_rref(rows, n_cols)
+    pivot_set = set(pivots)
+    
+    basis = []
+    for free in range(n_cols):
+        if free in pivot_set:
+            continue
+        
+        # x_free = d and x_pivot = -a_free * d / a_pivot, with d the common
+        # multiple of the pivots (which normally all coincide).
+        d = reduce(lcm, (abs(rows[k][c]) for k, c in enumerate(pivots)), 1)
+        vector = [0] * n_cols
+        vector[free] = d
+        for k, c in enumerate(pivots):
+            vector[c] = -rows[k][free] * d // rows[k][c]
+        
+        basis.append(_primitive(vector))
+    
+    return basis
+
+def balancing_coefficients(matrix):
+    """
+    Smallest positive integer vector `x` with `matrix @ x == 0`.
+    
+    For a chemical equation, `matrix` has one row per element (and charge)
+    and one column per species, the columns of the products being negated.
+    
+    Raises
+    ==================
+    UninvertibleMatrixError
+        If only the trivial solution exists, i.e. the equation cannot be
+        balanced.
+    LinalgOPError
+        If the system is under-determined (several independent solutions,
+        e.g. two reactions mixed together), or if the unique solution
+        can't be made positive (some species don't take part, or belong on
+        the other side).
+    
+    Examples:
+    ==================
+    >>> # H2 + O2 -> H2O
+    >>> balancing_coefficients([[2, 0, -2], [0, 2, -1]])
+    [2, 1, 2]
+    """
+    basis = nullspace(matrix)
+    if not basis:
+        raise UninvertibleMatrixError("The system only has the trivial solution.")
+    
+    if len(basis) > 1:
+        raise LinalgOPError(
+            f"The system is under-determined ({len(basis)} independent solutions).")
+    
+    vector = basis[0]
+    if all(v < 0 for v in vector):
+        vector = [-v for v in vector]
+    
+    if not all(v > 0 for v in vector):
+        raise LinalgOPError(f"No positive solution exists (found {vector}).")
+    
+    return vector
+
+def balance_compositions(reactants, products):
+    """
+    Balancing coefficients for reactants and products given as composition
+    dicts (e.g. from :func:`chempi.util.parsing.formula_to_composition`).
+    
+    Returns
+    ==================
+    A `(reactant_coefficients, product_coefficients)` tuple of lists.
+    
+    Examples:
+    ==================
+    >>> # CH4 + O2 -> CO2 + H2O
+    >>> balance_compositions([{6: 1, 1: 4}, {8: 2}], [{6: 1, 8: 2}, {1: 2, 8: 1}])
+    ([1, 2], [1, 2])
+    """
+    reactants, products = list(reactants), list(products)
+    keys = sorted({k for comp in reactants + products for k in comp})
+    matrix = [
+        [comp.get(k, 0) for comp in reactants] + [-comp.get(k, 0) for comp in products]
+        for k in keys
+    ]
+    vector = balancing_coefficients(matrix)
+    return vector[:len(reactants)], vector[len(reactants):]
@@ -0,0 +1,94 @@
+import pytest
+
+from chempi.linalg import Matrix, Vector, MatrixOPError
+
+def _backends():
+    try:
+        import numpy
+    
+    except ImportError:
+        return ['math']
+    
+    return ['math', numpy]
+
+@pytest.fixture(params = _backends(), ids = lambda b: getattr(b, '__name__', b))
+def backend(request):
+    return request.param
+
+def test_inplace_division_promotes_ints(backend):
+    m = Matrix([[1, 2], [3, 4]], backend)
+    m /= 2
+    assert m.tolist() == [[0.5, 1.0], [1.5, 2.0]]
+
+def test_inplace_addition_promotes_ints(backend):
+    m = Matrix([[1, 2], [3, 4]], backend)
+    m += 0.5
+    assert m.tolist() == [[1.5, 2.5], [3.5, 4.5]]
+
+def test_setitem_promotes_ints(backend):
+    m = Matrix([[1, 2], [3, 4]], backend)
+    m[0, 0] = 2.5
+    assert m[0, 0] == 2.5
+    assert m.tolist() == [[2.5, 2], [3, 4]]
+
+def test_inplace_complex_promotes_floats(backend):
+    m = Matrix([[1.0, 2.0]], backend)
+    m += 1j
+    assert m.tolist() == [[1 + 1j, 2 + 1j]]
+
+def test_promotion_reaches_views(backend):
+    m = Matrix([[1, 2], [3, 4]], backend)
+    column = m[:, 1]
+    column[0, 0] = 0.25
+    assert m[0, 1] == 0.25
+    m[1, 1] = 0.75
+    assert column.tolist() == [[0.25], [0.75]]
+
+def test_ints_stay_ints(backend):
+    m = Matrix([[1, 2], [3, 4]], backend)
+    m += 1
+    m *= 2
+    assert m.tolist() == [[4, 6], [8, 10]]
+    assert all(isinstance(v, int) for row in m.tolist() for v in row)
+
+def test_row_indexing(backend):
+    m = Matrix([[1, 2, 3], [4, 5, 6]], backend)
+    assert m[1][2] == 6
+    assert m[-1][0] == 4
+    assert m[0] == [1, 2, 3]
+    assert m[0][1:] == [2, 3]
+    assert len(m[0]) == 3
+    assert [list(row) for row in m] == [[1, 2, 3], [4, 5, 6]]
+    with pytest.raises(IndexError):
+        m[2]
+
+def test_row_assignment(backend):
+    m = Matrix([[1, 2], [3, 4]], backend)
+    m[0][1] = 7
+    m[1] = [8, 9.5]
+    assert m.tolist() == [[1, 7], [8, 9.5]]
+
+def test_row_slice_is_view(backend):
+    m = Matrix([[1, 2], [3, 4], [5, 6]], backend)
+    tail = m[1:]
+    assert tail.shape == (2, 2)
+    tail[0, 0] = 0
+    assert m[1][0] == 0
+
+def test_matv_vecv(backend):
+    m = Matrix([[1, 2], [3, 4]], backend)
+    values = m.matv
+    values[0][0] = 10
+    assert m[0][0] == 1
+    m.matv = [[5, 6], [7, 8]]
+    assert m.tolist() == [[5, 6], [7, 8]]
+    v = Vector([[1, 2, 3]], backend)
+    assert v.vecv == [[1, 2, 3]]
+    v.vecv = [[1], [2]]
+    assert v.shape == (2, 1)
+
+def test_matmul_dimensions(backend):
+    a = Matrix([[1, 2], [3, 4]], backend)
+    assert (a @ Vector([[1], [1]], backend)).tolist() == [[3], [7]]
+    with pytest.raises(MatrixOPError):
+        a @ Matrix([[1, 2, 3]], backend)
@@ -0,0 +1,45 @@
+import pytest
+
+from chempi.linalg import LinalgOPError, Matrix, Vector, lstsq
+
+def _backends():
+    try:
+        import numpy
+    
+    except ImportError:
+        return ['math']
+    
+    return ['math', numpy]
+
+@pytest.fixture(params = _backends(), ids = lambda b: getattr(b, '__name__', b))
+def backend(request):
+    return request.param
+
+A = [[1, 0], [1, 1], [1, 2]]
+Y = [1, 3, 5]
+
+def _close(values, expected):
+    return all(abs(v - e) < 1e-10 for v, e in zip(values, expected))
+
+@pytest.mark.parametrize('method', ['qr', 'svd'])
+@pytest.mark.parametrize('make_b', [
+    lambda backend: Y,
+    lambda backend: Vector([[y] for y in Y], backend),
+    lambda backend: Vector([Y], backend),
+], ids = ['list', 'column', 'row'])
+def test_single_right_hand_side(backend, method, make_b):
+    x, residuals, rank = lstsq(Matrix(A, backend), make_b(backend), method = method, backend = backend)
+    assert isinstance(x, Vector)
+    assert x.shape == (2, 1)
+    assert _close([row[0] for row in x.tolist()], [1, 2])
+    assert rank == 2
+    assert len(residuals) == 1
+
+def test_many_right_hand_sides(backend):
+    x, residuals, _ = lstsq(A, [[1, 2], [3, 2], [5, 2]], backend = backend)
+    assert isinstance(x, Matrix)
+    assert _close(x.tolist()[0] + x.tolist()[1], [1, 2, 2, 0])
+
+def test_mismatched_lengths(backend):
+    with pytest.raises(LinalgOPError):
+        lstsq(A, Vector([[1, 2]], backend), backend = backend)
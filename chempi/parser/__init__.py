@@ -1,4 +1,8 @@
 from .core import __compat__, __diag__
+from .core import (
+    And, Forward, Group, Literal, MatchFirst, ParseElementEnhance, ParseExpression,
+    ParserElement, Regex, Token)
+from .exceptions import ParseBaseException, ParseException, ParseFatalException
 from .results import *
 
 __author__ = 'CrSb0001 <crsb505@gmail.com>' # update to something other than private (not personal) email
@@ -4,19 +4,23 @@ Helper utilities for parsing chemical formulas.
 from __future__ import annotations # For sys.version < (3, 11, 0)
 
 from abc       import ABC, abstractmethod
-from collections import deque
+from collections import OrderedDict, deque
 from enum      import Enum
 from functools import cached_property
 
 from typing import (
-    Any, Callable, Generator, NamedTuple, Optional, Sequence, TextIO, Union)
+    Any, Callable, Generator, Iterable, NamedTuple, Optional, Sequence, TextIO, Union)
 
 import copy
-# import re
+import inspect
+import re
 import sys
+import threading
+import warnings
 # ...
 
-from .results import ParseResults, _ParseResultsWithOffset
+from .exceptions import ParseBaseException, ParseException, ParseFatalException
+from .results    import ParseResults, _ParseResultsWithOffset
 
 
 class __config_flags(ABC):
@@ -116,7 +120,7 @@ ParseImplReturnType = tuple[int, Any]
 PostParseReturnType = Union[ParseResults, Sequence[ParseResults]]
 
 ParseCondition = Union[Callable[[], bool], Callable[[ParseResults], bool], Callable[[int, ParseResults], bool], Callable[[str, int, ParseResults], bool]]
-ParseAction = Callable[[None]]
+ParseAction = Callable[..., Any]
 ParseFailAction = Callable[[str, int, 'ParserElement', Exception], None]
 
 DebugStartAction = Callable[[str, int, 'ParserElement', bool], None]
@@ -133,11 +137,132 @@ class _ParseActionIndexError(Exception):
         self.msg: str = msg
         self.exc: BaseException = exc
 
+PackratStats = NamedTuple(
+    'PackratStats', [('hits', int), ('misses', int), ('evictions', int), ('size', int)]
+)
+
+class _PackratCache:
+    '''
+    Least-recently-used cache of parse results and exceptions, keyed on
+    ``(element, instring, loc, call_pre_parse, do_actions)``.
+    
+    A `size` of None means the cache is unbounded.
+    '''
+    not_in_cache = object()
+    
+    __slots__ = ('size', 'hits', 'misses', 'evictions', '_data')
+    
+    def __init__(self, size: Optional[int] = 128) -> None:
+        self.size = size
+        self._data: OrderedDict = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+    
+    def get(self, key):
+        value = self._data.get(key, self.not_in_cache)
+        if value is self.not_in_cache:
+            self.misses += 1
+        
+        else:
+            self.hits += 1
+            self._data.move_to_end(key)
+        
+        return value
+    
+    def set(self, key, value) -> None:
+        self._data[key] = value
+        if self.size is not None and len(self._data) > self.size:
+            self._data.popitem(last = False)
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = self.misses = self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+class _LRUMemo:
+    '''
+    Memo for bounded left recursion. Entries of recursions still being
+    expanded stay active; finished ones are kept in a least-recently-used
+    store of at most `capacity` entries.
+    '''
+    __slots__ = ('_capacity', '_active', '_memory')
+    
+    def __init__(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._active: dict = {}
+        self._memory: OrderedDict = OrderedDict()
+    
+    def __getitem__(self, key):
+        try:
+            return self._active[key]
+        
+        except KeyError:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+    
+    def __setitem__(self, key, value) -> None:
+        self._memory.pop(key, None)
+        self._active[key] = value
+    
+    def __delitem__(self, key) -> None:
+        try:
+            value = self._active.pop(key)
+        
+        except KeyError:
+            pass
+        
+        else:
+            while len(self._memory) >= self._capacity:
+                self._memory.popitem(last = False)
+            
+            self._memory[key] = value
+    
+    def __len__(self) -> int:
+        return len(self._active) + len(self._memory)
+    
+    def clear(self) -> None:
+        self._active.clear()
+        self._memory.clear()
+
+class _UnboundedMemo(dict):
+    '''
+    Memo for unbounded left recursion, which never forgets an entry.
+    '''
+    def __delitem__(self, key) -> None:
+        pass
+
+def _trim_arity(func: ParseAction) -> Callable[[str, int, ParseResults], Any]:
+    '''
+    Adapts a parse action taking any of ``()``, ``(toks)``, ``(loc, toks)``
+    or ``(s, loc, toks)`` to the full ``(s, loc, toks)`` signature.
+    '''
+    try:
+        params = inspect.signature(func).parameters.values()
+    
+    except (TypeError, ValueError): # builtins without signatures take the tokens
+        return lambda s, loc, toks: func(toks)
+    
+    if any(p.kind == p.VAR_POSITIONAL for p in params):
+        return func
+    
+    nargs = sum(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) and p.default is p.empty for p in params)
+    nargs = min(nargs, 3)
+    return lambda s, loc, toks: func(*(s, loc, toks)[3 - nargs:])
+
 class ParserElement(ABC):
     DEFAULT_WHITE_CHARS: str = '\x09\x0a\x0d\x20'
     VERBOSE_STACKTRASE: bool = False
     _literal_string_class: type | None = None
     
+    _packrat_enabled: bool = False
+    packrat_cache: _PackratCache = _PackratCache(0)
+    
+    _left_recursion_enabled: bool = False
+    recursion_lock = threading.RLock()
+    recursion_memos: Union[_LRUMemo, _UnboundedMemo] = _UnboundedMemo()
+    
     @staticmethod
     def set_def_whitespace_chars(chars: str) -> None:
         '''Method to override the set DEFAULT_WHITE_CHARS, which are [\x09, \x0a, \x0d, \x20].'''
@@ -145,7 +270,7 @@ class ParserElement(ABC):
         
         # Update default whitespace for all parser expressions defined in the module.
         for expr in _builtin_exprs: # type: ignore
-            if expr.copy_default_white_chars:
+            if expr.copy_DEFAULT_WHITE_CHARS:
                 expr.white_chars = set(chars)
     
     @classmethod
@@ -236,4 +361,890 @@ class ParserElement(ABC):
         return copy_
 
     def recurse(self):
-        return self
\ No newline at end of file
+        return self
+    
+    def _generate_default_name(self) -> str:
+        return type(self).__name__
+    
+    @property
+    def name(self) -> str:
+        if self.custom_name is not None:
+            return self.custom_name
+        
+        if self._default_name is None:
+            self._default_name = self._generate_default_name()
+        
+        return self._default_name
+    
+    def set_name(self, name: str) -> ParserElement:
+        self.custom_name = name
+        self.errmsg = f'Expected {name}'
+        return self
+    
+    def __str__(self) -> str:
+        return self.name
+    
+    def __repr__(self) -> str:
+        return str(self)
+    
+    def set_parse_action(self, *fns: ParseAction, **kwargs) -> ParserElement:
+        '''
+        Replaces the parse actions of this element. Actions may take any of
+        ``()``, ``(toks)``, ``(loc, toks)`` or ``(s, loc, toks)`` and may
+        return new tokens, or None to keep the tokens they were given.
+        '''
+        self.parse_action = [_trim_arity(fn) for fn in fns]
+        self.call_during_try = kwargs.get('call_during_try', False)
+        return self
+    
+    def add_parse_action(self, *fns: ParseAction, **kwargs) -> ParserElement:
+        self.parse_action += [_trim_arity(fn) for fn in fns]
+        self.call_during_try = self.call_during_try or kwargs.get('call_during_try', False)
+        return self
+    
+    def streamline(self) -> ParserElement:
+        self.streamlined = True
+        self._default_name = None
+        return self
+    
+    def _first_chars(self) -> Optional[frozenset]:
+        '''
+        Characters that a match must start with (after skipping whitespace),
+        or None if unknown. Used by :class:`MatchFirst` to reject
+        alternatives without trying them.
+        '''
+        return None
+    
+    def _same_whitespace(self, other: ParserElement) -> bool:
+        return (
+            self.skip_whitespace == other.skip_whitespace
+            and self.white_chars == other.white_chars
+            and not other.ignore_exprs
+        )
+    
+    def _skip_ignorables(self, instring: str, loc: int) -> int:
+        exprs_found = True
+        while exprs_found:
+            exprs_found = False
+            for expr in self.ignore_exprs:
+                try:
+                    while True:
+                        loc, _ = expr._parse(instring, loc)
+                        exprs_found = True
+                
+                except ParseException:
+                    pass
+        
+        return loc
+    
+    def pre_parse(self, instring: str, loc: int) -> int:
+        if self.ignore_exprs:
+            loc = self._skip_ignorables(instring, loc)
+        
+        if self.skip_whitespace:
+            white_chars = self.white_chars
+            instrlen    = len(instring)
+            while loc < instrlen and instring[loc] in white_chars:
+                loc += 1
+        
+        return loc
+    
+    def parse_impl(self, instring: str, loc: int, do_actions: bool = True) -> ParseImplReturnType:
+        return loc, []
+    
+    def post_parse(self, instring: str, loc: int, tokens):
+        return tokens
+    
+    def _parse_no_cache(self, instring: str, loc: int, do_actions: bool = True, call_pre_parse: bool = True) -> tuple[int, ParseResults]:
+        if call_pre_parse and self.call_preparse:
+            pre_loc = self.pre_parse(instring, loc)
+        
+        else:
+            pre_loc = loc
+        
+        tokens_start = pre_loc
+        try:
+            try:
+                loc, tokens = self.parse_impl(instring, pre_loc, do_actions)
+            
+            except IndexError:
+                if self.may_index_error or pre_loc >= len(instring):
+                    raise ParseException(instring, len(instring), self.errmsg, self)
+                
+                raise
+        
+        except ParseBaseException as err:
+            if self.fail_action:
+                self.fail_action(instring, tokens_start, self, err)
+            
+            raise
+        
+        tokens = self.post_parse(instring, loc, tokens)
+        if self.results_name is None and self.modal_results:
+            ret_tokens = ParseResults._unnamed(tokens)
+        
+        else:
+            ret_tokens = ParseResults(tokens, self.results_name, as_list = self.save_as_list, modal = self.modal_results)
+        
+        if self.parse_action and (do_actions or self.call_during_try):
+            for fn in self.parse_action:
+                try:
+                    tokens = fn(instring, tokens_start, ret_tokens)
+                
+                except IndexError as exc:
+                    raise _ParseActionIndexError('exception raised in parse action', exc) from exc
+                
+                if tokens is not None and tokens is not ret_tokens and self.results_name is None and self.modal_results:
+                    ret_tokens = ParseResults._unnamed(tokens)
+                
+                elif tokens is not None and tokens is not ret_tokens:
+                    ret_tokens = ParseResults(
+                        tokens,
+                        self.results_name,
+                        as_list = self.save_as_list and isinstance(tokens, (ParseResults, list)),
+                        modal   = self.modal_results
+                    )
+        
+        return loc, ret_tokens
+    
+    def _parse_cache(self, instring: str, loc: int, do_actions: bool = True, call_pre_parse: bool = True) -> tuple[int, ParseResults]:
+        cache = ParserElement.packrat_cache
+        key   = (self, instring, loc, call_pre_parse, do_actions)
+        value = cache.get(key)
+        
+        if value is cache.not_in_cache:
+            try:
+                value = self._parse_no_cache(instring, loc, do_actions, call_pre_parse)
+            
+            except ParseBaseException as exc:
+                cache.set(key, exc.copy())
+                raise
+            
+            cache.set(key, (value[0], value[1].copy()))
+            return value
+        
+        if isinstance(value, Exception):
+            raise value.copy()
+        
+        return value[0], value[1].copy()
+    
+    _parse = _parse_no_cache
+    
+    @staticmethod
+    def reset_cache() -> None:
+        '''Clears the packrat cache and its statistics, and the left recursion memo.'''
+        ParserElement.packrat_cache.clear()
+        ParserElement.recursion_memos.clear()
+    
+    @staticmethod
+    def enable_packrat(cache_size_limit: Optional[int] = 128, force: bool = False) -> None:
+        '''
+        Enables packrat parsing, which memoizes the result (or exception)
+        of every ``(element, loc, do_actions)`` attempt so that alternatives
+        sharing a prefix don't re-parse it.
+        
+        Parameters
+        ================
+        cache_size_limit: Maximum number of memoized entries, the least
+            recently used ones being evicted first. None means unbounded.
+        force: Replace the cache even if packrat parsing is already enabled.
+        
+        The cache is reset at the start of every :meth:`parse_string`.
+        '''
+        if force:
+            ParserElement.disable_memoization()
+        
+        elif ParserElement._left_recursion_enabled:
+            raise RuntimeError('Packrat and left recursion are not compatible')
+        
+        elif ParserElement._packrat_enabled:
+            return
+        
+        ParserElement._packrat_enabled = True
+        ParserElement.packrat_cache = _PackratCache(cache_size_limit)
+        ParserElement._parse = ParserElement._parse_cache
+    
+    @staticmethod
+    def disable_memoization() -> None:
+        '''Disables both packrat parsing and left recursion support.'''
+        ParserElement.reset_cache()
+        ParserElement._packrat_enabled = False
+        ParserElement.packrat_cache = _PackratCache(0)
+        ParserElement._parse = ParserElement._parse_no_cache
+        ParserElement._left_recursion_enabled = False
+        ParserElement.recursion_memos = _UnboundedMemo()
+    
+    @staticmethod
+    def enable_left_recursion(cache_size_limit: Optional[int] = None, force: bool = False) -> None:
+        '''
+        Enables support for left-recursive grammars, where a :class:`Forward`
+        is grown from a failing seed one match at a time, each expansion
+        reusing the memoized previous one. This keeps parsing of chains
+        such as ``expr <<= Group(expr + '+' + term) | term`` linear.
+        
+        Parameters
+        ================
+        cache_size_limit: Number of finished recursion results to remember,
+            None meaning unbounded.
+        force: Disable packrat parsing instead of raising if it is enabled.
+        '''
+        if force:
+            ParserElement.disable_memoization()
+        
+        elif ParserElement._packrat_enabled:
+            raise RuntimeError('Packrat and left recursion are not compatible')
+        
+        if cache_size_limit is None:
+            ParserElement.recursion_memos = _UnboundedMemo()
+        
+        elif cache_size_limit > 0:
+            ParserElement.recursion_memos = _LRUMemo(capacity = cache_size_limit)
+        
+        else:
+            raise ValueError(f'Memo size of {cache_size_limit} must be positive or None')
+        
+        ParserElement._left_recursion_enabled = True
+    
+    @staticmethod
+    def packrat_stats() -> PackratStats:
+        '''Hits, misses and evictions of the packrat cache since it was last reset.'''
+        cache = ParserElement.packrat_cache
+        return PackratStats(cache.hits, cache.misses, cache.evictions, len(cache))
+    
+    def parse_string(self, instring: str, parse_all: bool = False) -> ParseResults:
+        '''
+        Parses `instring` from its start, returning the matched tokens.
+        With `parse_all`, trailing text other than whitespace is an error.
+        '''
+        ParserElement.reset_cache()
+        if not self.streamlined:
+            self.streamline()
+        
+        if not self.keep_tabs:
+            instring = instring.expandtabs()
+        
+        try:
+            loc, tokens = self._parse(instring, 0)
+            if parse_all:
+                loc = self.pre_parse(instring, loc)
+                if loc < len(instring):
+                    raise ParseException(instring, loc, 'Expected end of text', self)
+        
+        except ParseBaseException as exc:
+            if ParserElement.VERBOSE_STACKTRASE:
+                raise
+            
+            raise exc.with_traceback(None)
+        
+        return tokens
+    
+    def _scan_buffer(self, instring: str, loc: int, limit: int, overlap: bool) -> Generator:
+        '''
+        Yields ``(tokens, start, end, next_loc)`` for the matches starting
+        before `limit`, and finally the location scanning stopped at.
+        '''
+        pre_parse = self.pre_parse
+        parse     = self._parse
+        instrlen  = len(instring)
+        while loc < limit:
+            pre_loc = pre_parse(instring, loc)
+            if pre_loc >= limit and limit < instrlen:
+                # The match would start past `limit`, leave it to the next
+                # buffer rather than let it run into the end of this one.
+                loc = pre_loc
+                break
+            
+            try:
+                next_loc, tokens = parse(instring, pre_loc, call_pre_parse = False)
+            
+            except ParseException:
+                loc = pre_loc + 1
+                continue
+            
+            if next_loc <= loc:
+                loc = pre_loc + 1
+                continue
+            
+            if overlap:
+                resume = pre_loc + 1
+            
+            else:
+                resume = next_loc
+            
+            yield tokens, pre_loc, next_loc, resume
+            loc = resume
+        
+        yield loc
+    
+    def scan_string(self, instring: str, max_matches: int = _MAX_INT, overlap: bool = False) -> Generator[tuple[ParseResults, int, int], None, None]:
+        '''
+        Scans `instring` for matches of this element, yielding
+        ``(tokens, start, end)`` for each of them.
+        '''
+        if not self.streamlined:
+            self.streamline()
+        
+        if not self.keep_tabs:
+            instring = instring.expandtabs()
+        
+        ParserElement.reset_cache()
+        matches = 0
+        for match_ in self._scan_buffer(instring, 0, len(instring), overlap):
+            if matches >= max_matches or isinstance(match_, int):
+                return
+            
+            yield match_[:3]
+            matches += 1
+    
+    def search_string(self, instring: str, max_matches: int = _MAX_INT) -> ParseResults:
+        '''
+        All the matches of :meth:`scan_string` as one :class:`ParseResults`.
+        '''
+        return ParseResults([tokens for tokens, _, _ in self.scan_string(instring, max_matches)])
+    
+    def scan_stream(
+        self,
+        stream: Union[TextIO, Iterable[str]],
+        max_matches: int = _MAX_INT,
+        overlap: bool = False,
+        chunk_size: int = 1 << 16,
+        max_match_length: int = 1 << 12
+    ) -> Generator[tuple[ParseResults, int, int], None, None]:
+        '''
+        Like :meth:`scan_string`, but reads the text incrementally from a
+        file-like object (in chunks of `chunk_size` characters) or from an
+        iterable of strings, yielding ``(tokens, start, end)`` with offsets
+        into the whole stream.
+        
+        Only the unscanned tail of the text is kept in memory. A match may
+        cross chunk boundaries as long as it (including any lookahead done
+        while matching) spans at most `max_match_length` characters: a scan
+        is only attempted once that many characters past its start are
+        buffered, or the stream is exhausted. Tabs are not expanded, and
+        parse actions see locations relative to the current buffer.
+        '''
+        if not self.streamlined:
+            self.streamline()
+        
+        if hasattr(stream, 'read'):
+            chunks = iter(lambda: stream.read(chunk_size), '')
+        
+        else:
+            chunks = iter(stream)
+        
+        buffer, base, loc, matches, eof = '', 0, 0, 0, False
+        while not eof:
+            parts = [buffer[loc:]]
+            size  = len(parts[0])
+            while size <= max_match_length:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    eof = True
+                    break
+                
+                parts.append(chunk)
+                size += len(chunk)
+            
+            base  += loc
+            buffer = ''.join(parts)
+            limit  = len(buffer) if eof else len(buffer) - max_match_length
+            
+            # Cached entries refer to the previous buffer.
+            ParserElement.reset_cache()
+            for match_ in self._scan_buffer(buffer, 0, limit, overlap):
+                if matches >= max_matches:
+                    return
+                
+                if isinstance(match_, int):
+                    loc = match_
+                    break
+                
+                tokens, start, end, _ = match_
+                yield tokens, base + start, base + end
+                matches += 1
+    
+    def search_stream(self, stream: Union[TextIO, Iterable[str]], max_matches: int = _MAX_INT, **kwargs) -> Generator[ParseResults, None, None]:
+        '''
+        Lazily yields the tokens of each match of :meth:`scan_stream`.
+        '''
+        for tokens, _, _ in self.scan_stream(stream, max_matches, **kwargs):
+            yield tokens
+    
+    def _literal(self, other) -> ParserElement:
+        if isinstance(other, str_type):
+            return (ParserElement._literal_string_class or Literal)(other)
+        
+        if not isinstance(other, ParserElement):
+            raise TypeError(f'Cannot combine element of type {type(other).__name__} with ParserElement')
+        
+        return other
+    
+    def __add__(self, other) -> ParserElement:
+        return And([self, self._literal(other)])
+    
+    def __radd__(self, other) -> ParserElement:
+        return self._literal(other) + self
+    
+    def __or__(self, other) -> ParserElement:
+        return MatchFirst([self, self._literal(other)])
+    
+    def __ror__(self, other) -> ParserElement:
+        return self._literal(other) | self
+
+class Token(ParserElement):
+    '''
+    Abstract base for terminal elements.
+    '''
+    def __init__(self) -> None:
+        super().__init__(savelist = False)
+    
+    def recurse(self):
+        return []
+
+class Literal(Token):
+    '''
+    Matches an exact string.
+    '''
+    def __init__(self, match_string: str) -> None:
+        super().__init__()
+        if not match_string:
+            raise ValueError('Literal must be given a non-empty string')
+        
+        self.match_string = match_string
+        self.errmsg = f'Expected {self.name}'
+        self._may_return_empty = False
+        self.may_index_error = False
+    
+    def _generate_default_name(self) -> str:
+        return repr(self.match_string)
+    
+    def _first_chars(self) -> Optional[frozenset]:
+        return frozenset(self.match_string[0])
+    
+    def parse_impl(self, instring, loc, do_actions = True):
+        if instring.startswith(self.match_string, loc):
+            return loc + len(self.match_string), self.match_string
+        
+        raise ParseException(instring, loc, self.errmsg, self)
+
+class Regex(Token):
+    '''
+    Matches a regular expression (a pattern string or a compiled pattern).
+    '''
+    def __init__(self, pattern, flags: int = 0) -> None:
+        super().__init__()
+        self.re = re.compile(pattern, flags) if isinstance(pattern, str_type) else pattern
+        self.pattern = self.re.pattern
+        self.errmsg = f'Expected {self.name}'
+        self._may_return_empty = self.re.match('') is not None
+        self.may_index_error = False
+        self.first_char_set: Optional[frozenset] = None
+    
+    def _generate_default_name(self) -> str:
+        return f'Re:({self.pattern!r})'
+    
+    def _first_chars(self) -> Optional[frozenset]:
+        return self.first_char_set
+    
+    def parse_impl(self, instring, loc, do_actions = True):
+        result = self.re.match(instring, loc)
+        if not result:
+            raise ParseException(instring, loc, self.errmsg, self)
+        
+        return result.end(), result.group()
+
+class ParseExpression(ParserElement):
+    '''
+    Abstract base for elements combining several sub-expressions.
+    '''
+    def __init__(self, exprs: Sequence, savelist: bool = False) -> None:
+        super().__init__(savelist)
+        self.exprs: list[ParserElement] = [self._literal(expr) for expr in exprs]
+        self.call_preparse = False
+    
+    def recurse(self):
+        return self.exprs[:]
+    
+    def _can_inline(self, expr: ParserElement) -> bool:
+        '''
+        Whether `expr` can be replaced by its own sub-expressions within
+        this element without changing the results.
+        '''
+        return (
+            type(expr) is type(self)
+            and not expr.parse_action
+            and expr.results_name is None
+            and not expr.debug
+            and self._same_whitespace(expr)
+            and all(self._same_whitespace(e) for e in expr.exprs)
+        )
+    
+    def streamline(self) -> ParserElement:
+        '''
+        Compiles the grammar below this element in a single walk: nested
+        expressions of the same kind are flattened, and subclasses may
+        further merge or annotate their sub-expressions.
+        '''
+        if self.streamlined:
+            return self
+        
+        super().streamline()
+        for expr in self.exprs:
+            expr.streamline()
+        
+        exprs = []
+        for expr in self.exprs:
+            if self._can_inline(expr):
+                exprs.extend(expr.exprs)
+            
+            else:
+                exprs.append(expr)
+        
+        self.exprs = exprs
+        self.errmsg = f'Expected {self.name}'
+        return self
+
+class And(ParseExpression):
+    '''
+    Requires all sub-expressions to match, in order.
+    '''
+    def __init__(self, exprs: Sequence, savelist: bool = True) -> None:
+        super().__init__(exprs, savelist)
+        self._may_return_empty = all(e.may_return_empty for e in self.exprs)
+        self.call_preparse = True
+        self.errmsg = f'Expected {self.name}'
+    
+    def _generate_default_name(self) -> str:
+        return '{' + ' '.join(str(e) for e in self.exprs) + '}'
+    
+    def _can_inline(self, expr: ParserElement) -> bool:
+        # A nested And skips whitespace before its first sub-expression,
+        # which only does the same by itself if it pre-parses.
+        return super()._can_inline(expr) and expr.exprs[0].call_preparse
+    
+    def _first_chars(self) -> Optional[frozenset]:
+        first = self.exprs[0]
+        if first.may_return_empty or not self._same_whitespace(first):
+            return None
+        
+        return first._first_chars()
+    
+    def parse_impl(self, instring, loc, do_actions = True):
+        loc, result_list = self.exprs[0]._parse(instring, loc, do_actions, call_pre_parse = False)
+        for expr in self.exprs[1:]:
+            loc, expr_tokens = expr._parse(instring, loc, do_actions)
+            result_list += expr_tokens
+        
+        return loc, result_list
+
+class MatchFirst(ParseExpression):
+    '''
+    Matches the first sub-expression that succeeds, trying them in order.
+    '''
+    def __init__(self, exprs: Sequence, savelist: bool = False) -> None:
+        super().__init__(exprs, savelist)
+        self._may_return_empty = any(e.may_return_empty for e in self.exprs)
+        self.errmsg = f'Expected {self.name}'
+        self._alternatives: Optional[list[tuple[ParserElement, Optional[frozenset]]]] = None
+    
+    def _generate_default_name(self) -> str:
+        return '{' + ' | '.join(str(e) for e in self.exprs) + '}'
+    
+    def _first_chars(self) -> Optional[frozenset]:
+        if self._may_return_empty:
+            return None
+        
+        chars = frozenset()
+        for expr in self.exprs:
+            first = expr._first_chars() if self._same_whitespace(expr) else None
+            if first is None:
+                return None
+            
+            chars |= first
+        
+        return chars
+    
+    @staticmethod
+    def _mergeable_literal(expr: ParserElement) -> bool:
+        return (
+            type(expr) is Literal
+            and not expr.parse_action
+            and expr.results_name is None
+            and not expr.ignore_exprs
+            and not expr.debug
+        )
+    
+    def _merge_literals(self) -> None:
+        '''
+        Replaces runs of adjacent plain literals by a single regex
+        alternation, which keeps the first-match order.
+        '''
+        exprs, run = [], []
+        for expr in self.exprs + [None]:
+            if expr is not None and self._mergeable_literal(expr) and (not run or run[0]._same_whitespace(expr)):
+                run.append(expr)
+                continue
+            
+            if len(run) > 1:
+                merged = Regex('|'.join(re.escape(lit.match_string) for lit in run))
+                merged.skip_whitespace = run[0].skip_whitespace
+                merged.white_chars = set(run[0].white_chars)
+                merged.copy_DEFAULT_WHITE_CHARS = run[0].copy_DEFAULT_WHITE_CHARS
+                merged.first_char_set = frozenset(lit.match_string[0] for lit in run)
+                merged.set_name('{' + ' | '.join(str(lit) for lit in run) + '}')
+                merged.streamlined = True
+                exprs.append(merged)
+            
+            else:
+                exprs.extend(run)
+            
+            run = []
+            if expr is not None:
+                if self._mergeable_literal(expr):
+                    run.append(expr)
+                
+                else:
+                    exprs.append(expr)
+        
+        self.exprs = exprs
+    
+    def streamline(self) -> ParserElement:
+        '''
+        Besides flattening, merges adjacent literals and, when all the
+        alternatives skip the same whitespace, skips it once up front and
+        rejects alternatives by their first character.
+        '''
+        if self.streamlined:
+            return self
+        
+        super().streamline()
+        self._merge_literals()
+        
+        if self.exprs and all(e.call_preparse and self.exprs[0]._same_whitespace(e) for e in self.exprs):
+            self._alternatives = [
+                (e, None if e.may_return_empty else e._first_chars()) for e in self.exprs
+            ]
+        
+        self._default_name = None
+        self.errmsg = f'Expected {self.name}'
+        return self
+    
+    def parse_impl(self, instring, loc, do_actions = True):
+        if self._alternatives is not None:
+            # Skip the whitespace shared by all the alternatives once, here
+            # rather than through this element's own ``call_preparse``: the
+            # elements wrapping this one may call it without pre-parsing.
+            loc = self._alternatives[0][0].pre_parse(instring, loc)
+            char = instring[loc:loc + 1]
+            max_exc = None
+            for expr, first in self._alternatives:
+                if first is not None and char not in first:
+                    continue
+                
+                try:
+                    return expr._parse(instring, loc, do_actions, call_pre_parse = False)
+                
+                except ParseFatalException:
+                    raise
+                
+                except ParseException as err:
+                    if max_exc is None or err.loc > max_exc.loc:
+                        max_exc = err
+            
+            if max_exc is not None:
+                max_exc.msg = self.errmsg
+                raise max_exc
+            
+            raise ParseException(instring, loc, self.errmsg, self)
+        
+        max_exc = None
+        for expr in self.exprs:
+            try:
+                return expr._parse(instring, loc, do_actions)
+            
+            except ParseFatalException:
+                raise
+            
+            except ParseException as err:
+                if max_exc is None or err.loc > max_exc.loc:
+                    max_exc = err
+        
+        if max_exc is not None:
+            max_exc.msg = self.errmsg
+            raise max_exc
+        
+        raise ParseException(instring, loc, 'no defined alternatives to match', self)
+
+class ParseElementEnhance(ParserElement):
+    '''
+    Abstract base for elements wrapping a single sub-expression.
+    '''
+    def __init__(self, expr: Union[ParserElement, str, None], savelist: bool = False) -> None:
+        super().__init__(savelist)
+        if isinstance(expr, str_type):
+            expr = self._literal(expr)
+        
+        self.expr: Optional[ParserElement] = expr
+        if expr is not None:
+            self._copy_settings(expr)
+            self.call_preparse = expr.call_preparse
+    
+    def _copy_settings(self, expr: ParserElement) -> None:
+        self._may_return_empty = expr.may_return_empty
+        self.may_index_error = expr.may_index_error
+        self.skip_whitespace = expr.skip_whitespace
+        self.white_chars = set(expr.white_chars)
+        self.copy_DEFAULT_WHITE_CHARS = expr.copy_DEFAULT_WHITE_CHARS
+        self.save_as_list = expr.save_as_list
+        self.ignore_exprs.extend(expr.ignore_exprs)
+    
+    def recurse(self):
+        return [self.expr] if self.expr is not None else []
+    
+    def _generate_default_name(self) -> str:
+        return f'{type(self).__name__}:({self.expr})'
+    
+    def _first_chars(self) -> Optional[frozenset]:
+        if self.expr is None or self.expr.may_return_empty or not self._same_whitespace(self.expr):
+            return None
+        
+        return self.expr._first_chars()
+    
+    def parse_impl(self, instring, loc, do_actions = True):
+        if self.expr is None:
+            raise ParseException(instring, loc, 'No expression defined', self)
+        
+        return self.expr._parse(instring, loc, do_actions, call_pre_parse = False)
+    
+    def streamline(self) -> ParserElement:
+        if self.streamlined:
+            return self
+        
+        super().streamline()
+        if self.expr is not None:
+            self.expr.streamline()
+        
+        return self
+
+class Group(ParseElementEnhance):
+    '''
+    Returns the tokens of its sub-expression as a single nested result.
+    '''
+    def __init__(self, expr: Union[ParserElement, str]) -> None:
+        super().__init__(expr)
+        self.save_as_list = True
+    
+    def post_parse(self, instring, loc, tokens):
+        return [tokens]
+
+class Forward(ParseElementEnhance):
+    '''
+    Placeholder for an expression defined later with ``<<=``, which allows
+    for recursive grammars. Left-recursive grammars additionally require
+    :meth:`ParserElement.enable_left_recursion`.
+    '''
+    def __init__(self, other: Union[ParserElement, str, None] = None) -> None:
+        super().__init__(other, savelist = False)
+        # Always skip whitespace first, so that recursion memos are keyed
+        # on the location where the contained expression actually starts.
+        self.call_preparse = True
+    
+    def __lshift__(self, other) -> Forward:
+        if __diag__.warn_on_assignment_to_FORWARD and self.expr is not None:
+            warnings.warn(f'{self} is already defined and will be replaced', stacklevel = 2)
+        
+        self.expr = self._literal(other)
+        self.streamlined = self.expr.streamlined
+        self._copy_settings(self.expr)
+        self._default_name = None
+        return self
+    
+    def __ilshift__(self, other) -> Forward:
+        return self << other
+    
+    def _generate_default_name(self) -> str:
+        # Guard against infinite recursion through the contained expression.
+        self._default_name = 'Forward: ...'
+        try:
+            contents = str(self.expr)[:1000] if self.expr is not None else 'None'
+        
+        finally:
+            self._default_name = None
+        
+        return f'Forward: {contents}'
+    
+    def _first_chars(self) -> Optional[frozenset]:
+        return None
+    
+    def parse_impl(self, instring, loc, do_actions = True):
+        if self.expr is None and __diag__.warn_on_parse_using_empty_FORWARD:
+            warnings.warn(f'{self} was parsed before any expression was assigned to it', stacklevel = 2)
+        
+        if not ParserElement._left_recursion_enabled:
+            return super().parse_impl(instring, loc, do_actions)
+        
+        with ParserElement.recursion_lock:
+            memo = ParserElement.recursion_memos
+            try:
+                # Parsing at a known recursion expansion, use it as is.
+                prev_loc, prev_result = memo[loc, self, do_actions]
+                if isinstance(prev_result, Exception):
+                    raise prev_result
+                
+                return prev_loc, prev_result.copy()
+            
+            except KeyError:
+                act_key  = (loc, self, True)
+                peek_key = (loc, self, False)
+                
+                # Seed the recursion with a failure, then grow the match one
+                # expansion at a time for as long as it gets longer. Both
+                # `do_actions` cases are tracked separately.
+                prev_loc, prev_peek = memo[peek_key] = (
+                    loc - 1,
+                    ParseException(instring, loc, 'Forward recursion without base case', self)
+                )
+                if do_actions:
+                    memo[act_key] = memo[peek_key]
+                
+                while True:
+                    try:
+                        new_loc, new_peek = super().parse_impl(instring, loc, False)
+                    
+                    except ParseException:
+                        # Failed before getting any match, don't hide the error.
+                        if isinstance(prev_peek, Exception):
+                            raise
+                        
+                        new_loc, new_peek = prev_loc, prev_peek
+                    
+                    if new_loc <= prev_loc:
+                        if do_actions:
+                            # Replace the match without actions as well, in
+                            # case an action did backtrack.
+                            prev_loc, prev_result = memo[peek_key] = memo[act_key]
+                            del memo[peek_key], memo[act_key]
+                            return prev_loc, prev_result.copy()
+                        
+                        del memo[peek_key]
+                        return prev_loc, prev_peek.copy()
+                    
+                    if do_actions:
+                        try:
+                            memo[act_key] = super().parse_impl(instring, loc, True)
+                        
+                        except ParseException as exc:
+                            memo[peek_key] = memo[act_key] = (new_loc, exc)
+                            raise
+                    
+                    prev_loc, prev_peek = memo[peek_key] = new_loc, new_peek
+    
+    def streamline(self) -> ParserElement:
+        if not self.streamlined:
+            self.streamlined = True
+            if self.expr is not None:
+                self.expr.streamline()
+        
+        return self
+
+_builtin_exprs: list[ParserElement] = []
\ No newline at end of file
@@ -0,0 +1,71 @@
+'''
+Exceptions raised while parsing.
+'''
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+class ParseBaseException(Exception):
+    '''
+    Base exception class for all parsing-related exceptions.
+    '''
+    loc: int
+    msg: str
+    pstr: str
+    parser_element: Any
+    
+    __slots__ = ('loc', 'msg', 'pstr', 'parser_element')
+    
+    def __init__(self, pstr: str, loc: int = 0, msg: str | None = None, elem = None) -> None:
+        if msg is None:
+            msg, pstr = pstr, ''
+        
+        super().__init__(pstr, loc, msg, elem)
+        self.loc = loc
+        self.msg = msg
+        self.pstr = pstr
+        self.parser_element = elem
+    
+    @property
+    def lineno(self) -> int:
+        '''1-based line number of the location of the exception.'''
+        return self.pstr.count('\n', 0, self.loc) + 1
+    
+    @property
+    def col(self) -> int:
+        '''1-based column of the location of the exception.'''
+        return self.loc - self.pstr.rfind('\n', 0, self.loc)
+    
+    @property
+    def found(self) -> str:
+        if self.loc >= len(self.pstr):
+            return 'end of text'
+        
+        return repr(self.pstr[self.loc:self.loc + 1])
+    
+    def copy(self) -> ParseBaseException:
+        # copy.copy only reproduces args and __dict__, not the slots, which
+        # may have changed since construction (e.g. the msg MatchFirst sets).
+        ret = copy.copy(self)
+        for name in ParseBaseException.__slots__:
+            setattr(ret, name, getattr(self, name))
+        
+        return ret
+    
+    def __str__(self) -> str:
+        return f'{self.msg}, found {self.found}  (at char {self.loc}), (line:{self.lineno}, col:{self.col})'
+    
+    def __repr__(self) -> str:
+        return str(self)
+
+class ParseException(ParseBaseException):
+    '''
+    Raised when an expression fails to match, which is the signal used
+    for backtracking.
+    '''
+
+class ParseFatalException(ParseBaseException):
+    '''
+    Raised to stop parsing immediately, without trying any alternatives.
+    '''
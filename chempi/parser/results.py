@@ -1,13 +1,56 @@
 from __future__ import annotations
 
-import collections
+import pickle
 import pprint
+from array           import array
 from collections.abc import Iterable, Iterator, Mapping, MutableMapping, MutableSequence
 from typing          import Any
 
 str_type: tuple[type, ...] = (str, bytes)
 _generator_type = type((_ for _ in ()))
 
+class _EmptyTokDict(dict):
+    '''
+    Read-only empty dict, shared by all the results without any names. It
+    pickles and copies to the very same instance.
+    '''
+    __slots__ = ()
+    
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f'{type(self).__name__} is read-only')
+    
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    
+    def __reduce__(self):
+        return '_EMPTY_TOKDICT'
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self
+
+# Shared, immutable placeholders for results without any names, replaced by
+# a real dict and set the first time a name is set.
+_EMPTY_TOKDICT: Mapping[str, Any] = _EmptyTokDict()
+_EMPTY_NAMES: frozenset[str] = frozenset()
+
+# Bumped whenever the layout of ParseResults._to_state changes.
+_STATE_VERSION = 1
+
+def _narrowed(values: array) -> array:
+    '''
+    Copy of an integer array using the smallest signed type holding its values.
+    '''
+    lo, hi = (min(values), max(values)) if values else (0, 0)
+    for typecode in 'bhi':
+        bound = 1 << (8*array(typecode).itemsize - 1)
+        if -bound <= lo and hi < bound:
+            return array(typecode, values)
+    
+    return values
+
 class _ParseResultsWithOffset:
     tup: tuple[ParseResults, int]
     __slots__ = ['tup']
@@ -57,7 +100,8 @@ class ParseResults:
         self = object.__new__(cls)
         self._name = None
         self._parent = None
-        self._all_names = set()
+        self._modal = True
+        self._all_names = _EMPTY_NAMES
         
         if toklist is None:
             self._toklist = []
@@ -68,9 +112,17 @@ class ParseResults:
         else:
             self._toklist = [toklist]
         
-        self._tokdict = dict()
+        self._tokdict = _EMPTY_TOKDICT
         return self
     
+    @classmethod
+    def _unnamed(cls, toklist = None) -> ParseResults:
+        '''
+        Equivalent to ``ParseResults(toklist)``, without the ``__init__``
+        handling of names.
+        '''
+        return cls.__new__(cls, toklist)
+    
     def __init__(self, toklist =  None, name = None, as_list = True, modal = True, isinstance = isinstance) -> None:
         self._tokdict: dict[str, _ParseResultsWithOffset]
         self._modal = modal
@@ -94,10 +146,10 @@ class ParseResults:
         
         if as_list:
             if isinstance(toklist, ParseResults):
-                self[name] = _ParseResultsWithOffsets(ParseResults(toklist._toklist), 0)
+                self[name] = _ParseResultsWithOffset(ParseResults(toklist._toklist), 0)
             
             else:
-                self[name] = _ParseResultsWithOffsets(ParseResults(toklist[0]), 0)
+                self[name] = _ParseResultsWithOffset(ParseResults(toklist[0]), 0)
             
             self[name]._name = name
             return
@@ -121,9 +173,21 @@ class ParseResults:
         
         return ParseResults([v[0] for v in self._tokdict[idx]])
     
+    def _add_named(self, k, v: _ParseResultsWithOffset) -> None:
+        tokdict = self._tokdict
+        if tokdict is _EMPTY_TOKDICT:
+            tokdict = self._tokdict = {}
+        
+        occurrences = tokdict.get(k)
+        if occurrences is None:
+            tokdict[k] = [v]
+        
+        else:
+            occurrences.append(v)
+    
     def __setitem__(self, k, v, isinstance = isinstance) -> None:
         if isinstance(v, _ParseResultsWithOffset):
-            self._tokdict[k] = self._tokdict.get(k, list()) + [v]
+            self._add_named(k, v)
             sub = v[0]
         
         elif isinstance(k, (int, slice)):
@@ -131,7 +195,7 @@ class ParseResults:
             sub = v
         
         else:
-            self._tokdict[k] = self._tokdict.get(k, []) + [_ParseResultsWithOffset(v, 0)]
+            self._add_named(k, _ParseResultsWithOffset(v, 0))
             sub = v
         
         if isinstance(sub, ParseResults):
@@ -139,11 +203,14 @@ class ParseResults:
     
     def __delitem__(self, idx) -> None:
         if not isinstance(idx, (int, slice)):
+            if idx not in self._tokdict:
+                raise KeyError(idx)
+            
             del self._tokdict[idx]
             return
         
         _len = len(self._toklist)
-        del self.toklist[idx]
+        del self._toklist[idx]
         
         if isinstance(idx, int):
             if idx < 0:
@@ -154,7 +221,7 @@ class ParseResults:
         removed = list(range(*idx.indices(_len)))
         removed.reverse()
         
-        for occurences in self._tokdict.vaules():
+        for occurences in self._tokdict.values():
             for j in removed:
                 for k, (val, pos) in enumerate(occurences):
                     occurences[k] = _ParseResultsWithOffset(val, pos - (pos > j))
@@ -180,16 +247,161 @@ class ParseResults:
     def values(self):
         return (self[k] for k in self.keys())
     
-    def extend(self, item_sq):
-        if isinstance(items_sq, ParseResults):
-            self.__iadd__(itemseq)
+    def extend(self, item_seq):
+        if isinstance(item_seq, ParseResults):
+            self.__iadd__(item_seq)
         
         else:
-            self._toklist.extend(itemseq)
+            self._toklist.extend(item_seq)
     
     def clear(self) -> None:
         del self._toklist[:]
-        self._tokdict.clear()
+        self._tokdict = _EMPTY_TOKDICT
+    
+    def copy(self) -> ParseResults:
+        '''
+        Shallow copy of the results, sharing the tokens themselves.
+        '''
+        ret = ParseResults(self._toklist)
+        if self._tokdict:
+            # Occurrence lists are appended to in place, so they can't be shared.
+            ret._tokdict = {k: v[:] for k, v in self._tokdict.items()}
+        
+        ret._parent = self._parent
+        ret._all_names |= self._all_names
+        ret._name = self._name
+        ret._modal = self._modal
+        return ret
+    
+    def _to_state(self) -> tuple:
+        '''
+        Flattens the results into a name table, a leaf table and integer
+        arrays describing the nested results, without any parent
+        back-references. Nested results are numbered in breadth-first
+        order (the results themselves being 0) and referred to as ``~i``,
+        while references ``>= 0`` index the leaf table.
+        
+        Per nested result, ``meta`` holds ``(n_tokens, name, modal,
+        n_all_names, n_named)``, ``refs`` its tokens, ``all_names`` its
+        name ids and ``named`` ``(key, ref, offset)`` triples.
+        '''
+        nodes = [self]
+        node_ids = {id(self): 0}
+        strings, string_ids = [], {}
+        leaves, leaf_ids = [], {}
+        meta, refs, all_names, named = array('q'), array('q'), array('q'), array('q')
+        
+        def string_id(s) -> int:
+            i = string_ids.get(s)
+            if i is None:
+                i = string_ids[s] = len(strings)
+                strings.append(s)
+            
+            return i
+        
+        def ref(obj) -> int:
+            if isinstance(obj, ParseResults):
+                i = node_ids.get(id(obj))
+                if i is None:
+                    i = node_ids[id(obj)] = len(nodes)
+                    nodes.append(obj)
+                
+                return ~i
+            
+            # Tokens are mostly short, repeated strings, which are only stored once.
+            if type(obj) is str:
+                i = leaf_ids.get(obj)
+                if i is None:
+                    i = leaf_ids[obj] = len(leaves)
+                    leaves.append(obj)
+                
+                return i
+            
+            leaves.append(obj)
+            return len(leaves) - 1
+        
+        i = 0
+        while i < len(nodes):
+            node = nodes[i]
+            i += 1
+            
+            meta.extend((
+                len(node._toklist),
+                -1 if node._name is None else string_id(node._name),
+                node._modal,
+                len(node._all_names),
+                sum(map(len, node._tokdict.values())),
+            ))
+            refs.extend(map(ref, node._toklist))
+            all_names.extend(map(string_id, node._all_names))
+            for k, occurrences in node._tokdict.items():
+                k = string_id(k)
+                for val, pos in occurrences:
+                    named.extend((k, ref(val), pos))
+        
+        return (_STATE_VERSION, tuple(strings), tuple(leaves), *map(_narrowed, (meta, refs, all_names, named)))
+    
+    @classmethod
+    def _from_state(cls, state: tuple) -> ParseResults:
+        '''
+        Rebuilds the results from the output of ``_to_state``.
+        '''
+        version, strings, leaves, meta, refs, all_names, named = state
+        if version != _STATE_VERSION:
+            raise ValueError(f'Unsupported ParseResults state version {version!r}.')
+        
+        # All the results are created up front so that shared results stay shared.
+        nodes = [cls._unnamed() for _ in range(len(meta) // 5)]
+        deref = lambda r: leaves[r] if r >= 0 else nodes[~r]
+        t = a = k = 0
+        
+        for node, (n_tokens, name, modal, n_all_names, n_named) in zip(nodes, zip(*[iter(meta)] * 5)):
+            node._toklist = [deref(r) for r in refs[t:t + n_tokens]]
+            t += n_tokens
+            
+            for tok in node._toklist:
+                if isinstance(tok, ParseResults):
+                    tok._parent = node
+            
+            if name >= 0:
+                node._name = strings[name]
+            
+            node._modal = bool(modal)
+            if n_all_names:
+                node._all_names = {strings[j] for j in all_names[a:a + n_all_names]}
+                a += n_all_names
+            
+            for j in range(k, k + 3*n_named, 3):
+                val = deref(named[j + 1])
+                node._add_named(strings[named[j]], _ParseResultsWithOffset(val, named[j + 2]))
+                if isinstance(val, ParseResults):
+                    val._parent = node
+            
+            k += 3*n_named
+        
+        return nodes[0]
+    
+    def __reduce__(self):
+        return (self.__class__._from_state, (self._to_state(),))
+    
+    def to_bytes(self, protocol: int = pickle.HIGHEST_PROTOCOL) -> bytes:
+        '''
+        Compact serialization of the results, e.g. for caching parsed
+        batches on disk. The parent of the results isn't kept.
+        '''
+        return pickle.dumps(self, protocol = protocol)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> ParseResults:
+        '''
+        Inverse of ``to_bytes``. This unpickles ``data``, so it must only
+        be used on trusted input.
+        '''
+        ret = pickle.loads(data)
+        if not isinstance(ret, cls):
+            raise TypeError(f'Expected serialized {cls.__name__}, got {type(ret).__name__}.')
+        
+        return ret
     
     def pprint(self, *args, **kwargs) -> None:
         pprint.pprint(self.as_list(), *args, **kwargs)
@@ -207,7 +419,7 @@ class ParseResults:
             offset = len(self._toklist)
             add_off = lambda a: offset if a < 0 else a + offset
             other_items = other._tokdict.items()
-            other_dict_itmes = [(k, _ParseResultsWithOffset(v[0], add_off(v[1]))) for k, v_l in other_items for v in v_l]
+            other_dict_items = [(k, _ParseResultsWithOffset(v[0], add_off(v[1]))) for k, v_l in other_items for v in v_l]
             
             for k, v in other_dict_items:
                 self[k] = v
@@ -230,27 +442,109 @@ class ParseResults:
     def __repr__(self) -> str:
         return f'{type(self).__name__}({self._toklist!r}, {self.as_dict()})'
     
+    def iter_flat(self) -> Iterator:
+        '''
+        Iterates over the tokens with all the nesting levels collapsed,
+        using an explicit stack instead of recursion or copies of the
+        nested results.
+        '''
+        stack = [iter(self._toklist)]
+        while stack:
+            for tok in stack[-1]:
+                if isinstance(tok, ParseResults):
+                    stack.append(iter(tok._toklist))
+                    break
+                
+                yield tok
+            
+            else:
+                stack.pop()
+    
+    def walk(self) -> Iterator[tuple[int, Any]]:
+        '''
+        Pre-order traversal yielding ``(depth, item)`` for every item,
+        nested results being yielded before their own items. Top-level
+        items have depth 0.
+        '''
+        stack = [iter(self._toklist)]
+        while stack:
+            for tok in stack[-1]:
+                yield len(stack) - 1, tok
+                if isinstance(tok, ParseResults):
+                    stack.append(iter(tok._toklist))
+                    break
+            
+            else:
+                stack.pop()
+    
     def as_list(self, *, flatten: bool = False) -> list:
         '''
         Parse the results as a nested list of matching tokens, all converted to strings.
         If flatten == True, all the nesting levels in the list are collapsed
         '''
-        def flattend(pr):
-            to_visit = collections.deque([*self])
-            while to_visit:
-                to_do = to_visit.popleft()
-                if isinstance(to_do, ParseResults):
-                    to_visit.extendleft(to_do[::-1])
+        if flatten:
+            return [*self.iter_flat()]
+        
+        result = []
+        stack  = [(iter(self._toklist), result)]
+        while stack:
+            toks, out = stack[-1]
+            for tok in toks:
+                if isinstance(tok, ParseResults):
+                    sub = []
+                    out.append(sub)
+                    stack.append((iter(tok._toklist), sub))
+                    break
+                
+                out.append(tok)
+            
+            else:
+                stack.pop()
+        
+        return result
+    
+    def haskeys(self) -> bool:
+        return bool(self._tokdict)
+    
+    def items(self) -> Iterator:
+        return ((k, self[k]) for k in self.keys())
+    
+    def as_dict(self) -> dict:
+        '''
+        The named results as a dict, nested results becoming dicts if they
+        have names of their own and lists otherwise. Built iteratively, so
+        deep nesting doesn't hit the recursion limit.
+        '''
+        result = {}
+        stack  = [(self.items(), result)]
+        while stack:
+            entries, out = stack[-1]
+            for entry in entries:
+                key, value = entry if out.__class__ is dict else (None, entry)
+                if isinstance(value, ParseResults):
+                    if value._tokdict:
+                        child, child_entries = {}, value.items()
+                    
+                    else:
+                        child, child_entries = [], iter(value._toklist)
                 
                 else:
-                    yield to_do
+                    child = value
+                
+                if out.__class__ is dict:
+                    out[key] = child
+                
+                else:
+                    out.append(child)
+                
+                if isinstance(value, ParseResults):
+                    stack.append((child_entries, child))
+                    break
             
-        if flatten:
-            return [*flattend(self)]
+            else:
+                stack.pop()
         
-        else:
-            return [res.as_list() if isinstance(res, ParseResults) else res for res in self._toklist]
-    ...
+        return result
 
 MutableMapping.register(ParseResults)
 MutableSequence.register(ParseResults)
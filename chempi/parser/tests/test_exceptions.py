@@ -0,0 +1,35 @@
+import pytest
+
+from chempi.parser import Literal, ParseException, ParserElement
+
+def test_copy_keeps_changed_attributes():
+    exc = ParseException('abc', 1, 'Expected "x"')
+    exc.msg = 'Expected something else'
+    exc.loc = 2
+    copied = exc.copy()
+    assert copied is not exc
+    assert (copied.msg, copied.loc, copied.pstr) == ('Expected something else', 2, 'abc')
+    assert str(copied) == str(exc)
+
+def _messages(alt):
+    messages = []
+    for _ in range(2):
+        with pytest.raises(ParseException) as info:
+            alt._parse('c', 0)
+        
+        messages.append(str(info.value))
+    
+    return messages
+
+def test_packrat_reports_the_same_message():
+    alt = (Literal('a') | Literal('b')).set_name('a or b')
+    ParserElement.disable_memoization()
+    expected = _messages(alt)
+    ParserElement.enable_packrat()
+    try:
+        # The second attempt is answered from the cache.
+        assert _messages(alt) == expected
+        assert 'Expected a or b' in expected[0]
+    
+    finally:
+        ParserElement.disable_memoization()
@@ -0,0 +1,91 @@
+import pytest
+
+from chempi.parser import Forward, Group, ParserElement, Regex
+
+@pytest.fixture
+def left_recursion():
+    ParserElement.disable_memoization()
+    ParserElement.enable_left_recursion()
+    yield
+    ParserElement.disable_memoization()
+
+def _subtraction(counter = None):
+    def to_int(tokens):
+        if counter is not None:
+            counter.append(None)
+        
+        return int(tokens[0])
+    
+    expr = Forward()
+    parenthesized = ('(' + expr + ')').set_parse_action(lambda t: t[1])
+    term = Regex(r'\d+').set_parse_action(to_int) | parenthesized
+    expr <<= (expr + '-' + term).set_parse_action(lambda t: t[0] - t[2]) | term
+    return expr
+
+def test_left_associative_grouping(left_recursion):
+    term = Regex(r'\d+')
+    expr = Forward()
+    expr <<= Group(expr + '-' + term) | term
+    assert expr.parse_string('1 - 2 - 3', parse_all = True).as_list() == [[['1', '-', '2'], '-', '3']]
+
+def test_left_associative_actions(left_recursion):
+    assert _subtraction().parse_string('10 - 3 - 2', parse_all = True)[0] == 5
+
+def test_base_case_only(left_recursion):
+    assert _subtraction().parse_string('42', parse_all = True)[0] == 42
+
+def test_long_chain(left_recursion):
+    n = 5000
+    text = ' - '.join(['100000'] + ['1'] * n)
+    assert _subtraction().parse_string(text, parse_all = True)[0] == 100000 - n
+
+def test_work_is_linear(left_recursion):
+    # The number of times the terms get parsed (with actions) must grow
+    # linearly with the length of the chain.
+    calls = {}
+    for n in (500, 1000, 2000):
+        counter = []
+        _subtraction(counter).parse_string(' - '.join(['1'] * n), parse_all = True)
+        calls[n] = len(counter)
+    
+    assert calls[1000] <= 2.2 * calls[500]
+    assert calls[2000] <= 2.2 * calls[1000]
+
+def test_nested_recursions(left_recursion):
+    assert _subtraction().parse_string('10 - (3 - 2) - (1 - (5 - 4))', parse_all = True)[0] == 9
+
+def test_bounded_memo():
+    # Every parenthesis starts a recursion of its own, at its own location.
+    depth = 50
+    text = '(10 - 1 - ' * depth + '0' + ')' * depth
+    expected = 0
+    for _ in range(depth):
+        expected = 10 - 1 - expected
+    
+    try:
+        ParserElement.disable_memoization()
+        ParserElement.enable_left_recursion()
+        assert _subtraction().parse_string(text, parse_all = True)[0] == expected
+        assert len(ParserElement.recursion_memos) > 8
+        
+        ParserElement.disable_memoization()
+        ParserElement.enable_left_recursion(cache_size_limit = 8)
+        assert _subtraction().parse_string(text, parse_all = True)[0] == expected
+        assert len(ParserElement.recursion_memos) <= 8
+    
+    finally:
+        ParserElement.disable_memoization()
+
+def test_invalid_memo_size():
+    with pytest.raises(ValueError):
+        ParserElement.enable_left_recursion(cache_size_limit = 0)
+
+def test_packrat_conflict():
+    ParserElement.disable_memoization()
+    ParserElement.enable_packrat()
+    try:
+        with pytest.raises(RuntimeError):
+            ParserElement.enable_left_recursion()
+    
+    finally:
+        ParserElement.disable_memoization()
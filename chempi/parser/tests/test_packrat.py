@@ -0,0 +1,72 @@
+import pytest
+
+from chempi.parser import Group, ParserElement, Regex
+
+@pytest.fixture
+def memoization():
+    ParserElement.disable_memoization()
+    yield
+    ParserElement.disable_memoization()
+
+def _shared_prefix(calls):
+    prefix = Regex(r'\d+').add_parse_action(lambda tokens: calls.append(tokens[0]))
+    return Group(prefix + 'a') | Group(prefix + 'b') | Group(prefix + 'c')
+
+def test_shared_prefix_parsed_once(memoization):
+    calls = []
+    plain = _shared_prefix(calls).parse_string('12 c').as_list()
+    assert len(calls) == 3
+    
+    ParserElement.enable_packrat()
+    calls.clear()
+    assert _shared_prefix(calls).parse_string('12 c').as_list() == plain == [['12', 'c']]
+    assert calls == ['12']
+    
+    stats = ParserElement.packrat_stats()
+    assert stats.hits == 2
+    assert stats.size == stats.misses - stats.evictions
+
+def test_cache_is_reset_per_parse(memoization):
+    ParserElement.enable_packrat()
+    expr = _shared_prefix([])
+    expr.parse_string('1 b')
+    first = ParserElement.packrat_stats()
+    expr.parse_string('1 b')
+    assert ParserElement.packrat_stats() == first
+
+def test_bounded_cache(memoization):
+    words = Regex('[a-z]+')
+    expr = Group(words + words + '.') | Group(words + words + '!')
+    text = 'ab cd !'
+    
+    ParserElement.enable_packrat(None)
+    unbounded = expr.parse_string(text).as_list()
+    assert ParserElement.packrat_stats().evictions == 0
+    
+    ParserElement.enable_packrat(2, force = True)
+    assert expr.parse_string(text).as_list() == unbounded
+    stats = ParserElement.packrat_stats()
+    assert stats.size <= 2
+    assert stats.evictions > 0
+
+def test_cached_results_are_not_shared(memoization):
+    # And extends the tokens of its first expression in place, which must
+    # not change the cached ones reused by the next alternative.
+    number = Regex(r'\d+')
+    expr = Group(number + 'x' + 'a') | Group(number + 'x' + 'b')
+    plain = expr.parse_string('12 x b').as_list()
+    ParserElement.enable_packrat()
+    assert expr.parse_string('12 x b').as_list() == plain == [['12', 'x', 'b']]
+    assert ParserElement.packrat_stats().hits > 0
+
+def test_incompatible_with_left_recursion(memoization):
+    ParserElement.enable_packrat()
+    with pytest.raises(RuntimeError):
+        ParserElement.enable_left_recursion()
+    
+    ParserElement.enable_left_recursion(force = True)
+    with pytest.raises(RuntimeError):
+        ParserElement.enable_packrat()
+    
+    ParserElement.enable_packrat(force = True)
+    assert not ParserElement._left_recursion_enabled
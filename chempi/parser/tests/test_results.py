@@ -0,0 +1,76 @@
+import copy
+import pickle
+
+import pytest
+
+from chempi.parser import ParseResults
+from chempi.parser.results import _EMPTY_TOKDICT
+
+def _results():
+    unnamed = ParseResults(['a', ParseResults(['b', 'c'])])
+    named = ParseResults(['x', 'y'])
+    named['key'] = 'x'
+    return unnamed, named
+
+@pytest.mark.parametrize('clone', [
+    lambda r: pickle.loads(pickle.dumps(r)),
+    lambda r: ParseResults.from_bytes(r.to_bytes()),
+    copy.deepcopy,
+    copy.copy,
+], ids = ['pickle', 'bytes', 'deepcopy', 'copy'])
+def test_round_trip(clone):
+    for results in _results():
+        cloned = clone(results)
+        assert cloned.as_list() == results.as_list()
+        assert cloned.as_dict() == results.as_dict()
+
+def test_empty_tokdict_is_shared():
+    assert pickle.loads(pickle.dumps(_EMPTY_TOKDICT)) is _EMPTY_TOKDICT
+    assert copy.deepcopy(_EMPTY_TOKDICT) is _EMPTY_TOKDICT
+    with pytest.raises(TypeError):
+        _EMPTY_TOKDICT['key'] = 1
+
+def test_names_after_unpickling():
+    unnamed, _ = _results()
+    cloned = pickle.loads(pickle.dumps(unnamed))
+    cloned['key'] = 'a'
+    assert cloned['key'] == 'a'
+    assert not _EMPTY_TOKDICT
+    assert 'key' not in unnamed
+
+def _nested():
+    return ParseResults(['a', ParseResults(['b', ParseResults(['c'])]), 'd'])
+
+def test_flatten_and_walk():
+    results = _nested()
+    assert list(results.iter_flat()) == ['a', 'b', 'c', 'd']
+    assert results.as_list(flatten = True) == ['a', 'b', 'c', 'd']
+    assert results.as_list() == ['a', ['b', ['c']], 'd']
+    walked = [(depth, item if isinstance(item, str) else item.as_list()) for depth, item in results.walk()]
+    assert walked == [(0, 'a'), (0, ['b', ['c']]), (1, 'b'), (1, ['c']), (2, 'c'), (0, 'd')]
+
+def test_as_dict():
+    inner = ParseResults(['y', 'z'])
+    inner['first'] = 'y'
+    results = ParseResults(['x', inner])
+    results['inner'] = inner
+    results['unnamed'] = ParseResults(['p', ParseResults(['q'])])
+    results['x'] = 'x'
+    assert results.haskeys() and not _nested().haskeys()
+    assert results.as_dict() == {'inner': {'first': 'y'}, 'unnamed': ['p', ['q']], 'x': 'x'}
+    assert _nested().as_dict() == {}
+    assert repr(_nested()) == "ParseResults(['a', ParseResults(['b', ParseResults(['c'], {})], {}), 'd'], {})"
+
+def test_deep_nesting():
+    depth = 100000
+    results = ParseResults(['leaf'])
+    for i in range(depth):
+        results = ParseResults([results, i])
+    
+    assert results.as_list(flatten = True) == ['leaf'] + list(range(depth))
+    assert max(d for d, _ in results.walk()) == depth
+    nested, levels = results.as_list(), 0
+    while isinstance(nested, list):
+        nested, levels = nested[0], levels + 1
+    
+    assert (nested, levels) == ('leaf', depth + 1)
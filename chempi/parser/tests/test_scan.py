@@ -0,0 +1,65 @@
+import io
+
+import pytest
+
+from chempi.parser import Literal, ParserElement, Regex
+
+@pytest.fixture(params = ['plain', 'packrat'])
+def memoization(request):
+    ParserElement.disable_memoization()
+    if request.param == 'packrat':
+        ParserElement.enable_packrat()
+    
+    yield request.param
+    ParserElement.disable_memoization()
+
+def _scan(matches):
+    return [(tokens.as_list(), start, end) for tokens, start, end in matches]
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+WORD = Regex('[a-z]+')
+TEXT = ' '.join(['ab', 'cde', 'f', 'ghij', 'kl'] * 8) + '\n  mn  opq\n'
+
+def test_scan_string(memoization):
+    assert _scan(WORD.scan_string('  ab cd')) == [(['ab'], 2, 4), (['cd'], 5, 7)]
+    assert _scan(WORD.scan_string('ab cd ef', max_matches = 2)) == [(['ab'], 0, 2), (['cd'], 3, 5)]
+    assert WORD.search_string('ab, cd').as_list() == [['ab'], ['cd']]
+
+def test_scan_string_overlap(memoization):
+    # Every match is found once, including those after whitespace.
+    assert _scan(WORD.scan_string('abc de', overlap = True)) == [
+        (['abc'], 0, 3), (['bc'], 1, 3), (['c'], 2, 3), (['de'], 4, 6), (['e'], 5, 6)
+    ]
+    expr = Literal('aa') + Literal('a')
+    assert [start for _, start, _ in expr.scan_string(' aaaa', overlap = True)] == [1, 2]
+
+@pytest.mark.parametrize('overlap', [False, True])
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 4, 7, 16, 1 << 16])
+def test_scan_stream_matches_scan_string(memoization, overlap, chunk_size):
+    expected = _scan(WORD.scan_string(TEXT, overlap = overlap))
+    for stream in (io.StringIO(TEXT), _chunks(TEXT, chunk_size)):
+        matches = WORD.scan_stream(stream, overlap = overlap, chunk_size = chunk_size, max_match_length = 6)
+        assert _scan(matches) == expected
+
+def test_scan_stream_whitespace_before_chunk_edge(memoization):
+    # The whitespace before a match can take a scan past the part of the
+    # buffer that is long enough for a whole match.
+    text = '      abcdef   ghijkl'
+    expected = [(['abcdef'], 6, 12), (['ghijkl'], 15, 21)]
+    assert _scan(WORD.scan_string(text)) == expected
+    assert _scan(WORD.scan_stream(io.StringIO(text), chunk_size = 4, max_match_length = 6)) == expected
+    assert _scan(WORD.scan_stream([text], max_match_length = 6)) == expected
+    assert _scan(WORD.scan_stream(_chunks(text, 1), max_match_length = 6)) == expected
+
+def test_scan_stream_across_chunks(memoization):
+    expr = Literal('ab') + Regex('c+') + Literal('d')
+    text = 'x ab ccc d y abcd'
+    expected = _scan(expr.scan_string(text))
+    assert [start for _, start, _ in expected] == [2, 13]
+    assert _scan(expr.scan_stream(_chunks(text, 3), chunk_size = 3, max_match_length = 10)) == expected
+
+def test_scan_stream_max_matches(memoization):
+    stream = io.StringIO(TEXT)
+    assert [tokens[0] for tokens in WORD.search_stream(stream, max_matches = 3, chunk_size = 2)] == ['ab', 'cde', 'f']
@@ -0,0 +1,78 @@
+import pytest
+
+from chempi.parser import And, Forward, Group, Literal, MatchFirst, ParseException, ParserElement, Regex
+
+@pytest.fixture(params = ['plain', 'packrat'])
+def memoization(request):
+    ParserElement.disable_memoization()
+    if request.param == 'packrat':
+        ParserElement.enable_packrat()
+    
+    yield request.param
+    ParserElement.disable_memoization()
+
+def _alternation():
+    return Literal('a') | Literal('b')
+
+def _forward(expr):
+    forward = Forward()
+    forward <<= expr
+    return forward
+
+def _no_whitespace(expr):
+    expr.skip_whitespace = False
+    return expr
+
+# Wrappers, with the nesting of the results they add.
+WRAPPERS = [
+    (Group, 1),
+    (_forward, 0),
+    (lambda expr: Group(Group(expr)), 2),
+    (lambda expr: _forward(Group(expr)), 1)
+]
+
+def _nested(tokens, depth):
+    for _ in range(depth):
+        tokens = [tokens]
+    
+    return tokens
+
+@pytest.mark.parametrize('wrap, depth', WRAPPERS)
+def test_wrapped_alternation_skips_leading_whitespace(memoization, wrap, depth):
+    assert wrap(_alternation()).parse_string(' b').as_list() == _nested(['b'], depth)
+    assert wrap(_alternation()).parse_string('\n  a', parse_all = True).as_list() == _nested(['a'], depth)
+
+def test_grouped_alternation_after_token(memoization):
+    expr = Literal('x') + Group(_alternation())
+    assert expr.parse_string('x b', parse_all = True).as_list() == ['x', ['b']]
+    assert (Literal('x') + Group(Literal('a') | 'b')).parse_string('x  a').as_list() == ['x', ['a']]
+
+def test_wrapped_alternation_error_location(memoization):
+    with pytest.raises(ParseException) as exc_info:
+        Group(_alternation()).parse_string('  c')
+    
+    assert exc_info.value.loc == 2
+
+def test_nested_and_skips_whitespace_for_its_first_expression(memoization):
+    # The inner And skips the whitespace its first alternatives don't, so
+    # it must not be merged into the outer one.
+    inner = And([MatchFirst([_no_whitespace(Literal('x')), _no_whitespace(Literal('y'))]), 'a'])
+    expr = Literal('b') + inner
+    assert expr.parse_string('b xa', parse_all = True).as_list() == ['b', 'x', 'a']
+    assert expr.parse_string('b  y a', parse_all = True).as_list() == ['b', 'y', 'a']
+
+def test_merged_literals_keep_first_match_order(memoization):
+    assert (Literal('a') | Literal('ab') | 'b').parse_string('ab').as_list() == ['a']
+    assert (Literal('ab') | Literal('a')).parse_string(' ab').as_list() == ['ab']
+
+def test_alternation_action_location(memoization):
+    # Parse actions of an alternation see where it was called, before the
+    # whitespace its alternatives skip.
+    expr = Literal('x') + _alternation().set_parse_action(lambda s, loc, tokens: loc)
+    assert expr.parse_string('x  b').as_list() == ['x', 1]
+
+def test_alternatives_with_other_whitespace(memoization):
+    expr = Literal('x') + (_no_whitespace(Literal('a')) | Regex('b+'))
+    assert expr.parse_string('x bb').as_list() == ['x', 'bb']
+    with pytest.raises(ParseException):
+        expr.parse_string('x a')
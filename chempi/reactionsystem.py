@@ -0,0 +1,603 @@
+'''
+Reaction systems, with the stoichiometry of all the reactions stored as a
+sparse matrix rather than per-reaction dicts.
+'''
+from array       import array
+from collections import namedtuple
+from math        import prod
+
+from ._util import get_backend_fallback, is_array_backend
+
+SparseStoichiometry = namedtuple('SparseStoichiometry', ['indptr', 'indices', 'data', 'shape'])
+SparseStoichiometry.__doc__ = '''
+Compressed sparse row matrix (species x reactions): the coefficients of
+species ``i`` are ``data[indptr[i]:indptr[i + 1]]``, in the reactions
+``indices[indptr[i]:indptr[i + 1]]``. The fields are arrays which can be
+passed on as is to e.g. ``scipy.sparse.csr_matrix((data, indices, indptr), shape)``.
+'''
+
+SparseJacobian = namedtuple('SparseJacobian', ['indptr', 'indices', 'data', 'shape'])
+SparseJacobian.__doc__ = '''
+Jacobians (species x species) sharing one sparsity pattern, in the layout
+of :class:`SparseStoichiometry`, with ``data`` holding one row of values
+per state when evaluated for many states at once.
+'''
+
+class _Side:
+    '''
+    One side (reactants or products) of all the reactions, in compressed
+    sparse column form: the species of reaction ``ri`` are
+    ``indices[indptr[ri]:indptr[ri + 1]]``, so appending a reaction only
+    appends to the arrays.
+    '''
+    __slots__ = ('indptr', 'indices', 'coeffs')
+    
+    def __init__(self):
+        self.indptr  = array('q', [0])
+        self.indices = array('q')
+        self.coeffs  = array('q')
+    
+    def append(self, species, coeffs):
+        n = len(self.coeffs)
+        try:
+            self.coeffs.extend(coeffs)
+        
+        except TypeError:
+            # Integer coefficients until the first non-integer one.
+            self.coeffs = array('d', self.coeffs[:n])
+            self.coeffs.extend(coeffs)
+        
+        self.indices.extend(species)
+        self.indptr.append(len(self.indices))
+    
+    def remove(self, ri):
+        start, stop = self.indptr[ri], self.indptr[ri + 1]
+        del self.indices[start:stop], self.coeffs[start:stop], self.indptr[ri + 1]
+        n = stop - start
+        if n:
+            indptr = self.indptr
+            for i in range(ri + 1, len(indptr)):
+                indptr[i] -= n
+    
+    def span(self, ri):
+        return range(self.indptr[ri], self.indptr[ri + 1])
+
+class ReactionSystem:
+    '''
+    Collection of reactions between substances.
+    
+    The stoichiometric coefficients of all the reactions are kept in flat
+    arrays (compressed by reaction, so adding a reaction is O(number of
+    species in it)), and the species-major (CSR) transposes are built
+    lazily, in O(nnz), when participation queries or the sparse
+    stoichiometry matrices are asked for.
+    
+    Parameters
+    ==================
+    substances: iterable of str, or mapping
+        Substance keys, or a mapping of substance keys to substance objects.
+    
+    Examples:
+    ==================
+    >>> rsys = ReactionSystem(['H2', 'O2', 'H2O'])
+    >>> rsys.add_reaction({'H2': 2, 'O2': 1}, {'H2O': 2}, param = 1e-3)
+    0
+    >>> rsys.add_reaction({'H2O': 2}, {'H2': 2, 'O2': 1})
+    1
+    >>> rsys.substance_particip('O2')
+    [0, 1]
+    >>> rsys.net_stoichiometry(0)
+    {'H2': -2, 'O2': -1, 'H2O': 2}
+    '''
+    def __init__(self, substances = None):
+        self.substances = {}
+        self._species_index = {}
+        self._species_keys = []
+        self._reactants = _Side()
+        self._products = _Side()
+        self.params = []
+        self.names = []
+        self._particip = None
+        self._jacobian = None
+        
+        if substances is not None:
+            items = substances.items() if hasattr(substances, 'items') else ((sk, None) for sk in substances)
+            for sk, substance in items:
+                self.add_substance(sk, substance)
+    
+    @property
+    def ns(self):
+        '''Number of substances.'''
+        return len(self.substances)
+    
+    @property
+    def nr(self):
+        '''Number of reactions.'''
+        return len(self.params)
+    
+    def __len__(self):
+        return self.nr
+    
+    def add_substance(self, key, substance = None):
+        '''
+        Adds a substance if it's not in the system already, returning its index.
+        '''
+        idx = self._species_index.get(key)
+        if idx is None:
+            idx = self._species_index[key] = len(self._species_keys)
+            self._species_keys.append(key)
+            self.substances[key] = substance
+            self._particip = self._jacobian = None
+        
+        return idx
+    
+    def add_reaction(self, reactants, products, param = None, name = None):
+        '''
+        Appends a reaction, adding its unknown substances to the system.
+        
+        Parameters
+        ==================
+        reactants, products: dict
+            Stoichiometric coefficients keyed by substance.
+        param: optional
+            E.g. the rate constant.
+        name: str, optional
+        
+        Returns
+        ==================
+        The index of the reaction.
+        '''
+        index = self._species_index
+        for side, stoich in ((self._reactants, reactants), (self._products, products)):
+            species = [index[sk] if sk in index else self.add_substance(sk) for sk in stoich]
+            side.append(species, stoich.values())
+        
+        self.params.append(param)
+        self.names.append(name)
+        self._particip = self._jacobian = None
+        return len(self.params) - 1
+    
+    def remove_reaction(self, ri):
+        '''
+        Removes a reaction, the reactions after it moving down one index
+        (as in a list).
+        '''
+        ri = range(self.nr)[ri]
+        self._reactants.remove(ri)
+        self._products.remove(ri)
+        del self.params[ri], self.names[ri]
+        self._particip = self._jacobian = None
+    
+    def _side_dict(self, side, ri):
+        keys = self._species_keys
+        return {keys[side.indices[i]]: side.coeffs[i] for i in side.span(ri)}
+    
+    def reactants(self, ri):
+        return self._side_dict(self._reactants, ri)
+    
+    def products(self, ri):
+        return self._side_dict(self._products, ri)
+    
+    def net_stoichiometry(self, ri):
+        '''
+        Net stoichiometric coefficients (products minus reactants) of one
+        reaction, keyed by substance. Species which cancel out are left out.
+        '''
+        keys = self._species_keys
+        net = {}
+        for side, sign in ((self._reactants, -1), (self._products, 1)):
+            for i in side.span(ri):
+                k = keys[side.indices[i]]
+                net[k] = net.get(k, 0) + sign * side.coeffs[i]
+        
+        return {k: v for k, v in net.items() if v}
+    
+    def _transpose(self, sides):
+        '''
+        Species-major (CSR) form of the sum of the given ``(side, sign)``
+        pairs, by counting sort over the reactions in O(nnz). Entries for
+        the same species and reaction are merged, and zeros dropped.
+        '''
+        ns, nr = self.ns, self.nr
+        counts = [0] * (ns + 1)
+        for side, _ in sides:
+            for si in side.indices:
+                counts[si + 1] += 1
+        
+        indptr = array('q', counts)
+        for i in range(ns):
+            indptr[i + 1] += indptr[i]
+        
+        fill = array('q', indptr[:-1])
+        indices = array('q', bytes(8 * indptr[-1]))
+        typecode = 'd' if any(side.coeffs.typecode == 'd' for side, _ in sides) else 'q'
+        data = array(typecode, bytes(8 * indptr[-1]))
+        
+        # Visiting the reactions in order keeps the indices of each row sorted.
+        for ri in range(nr):
+            for side, sign in sides:
+                side_indices, coeffs = side.indices, side.coeffs
+                for i in side.span(ri):
+                    si = side_indices[i]
+                    pos = fill[si]
+                    if pos > indptr[si] and indices[pos - 1] == ri:
+                        data[pos - 1] += sign * coeffs[i]
+                    
+                    else:
+                        indices[pos] = ri
+                        data[pos] = sign * coeffs[i]
+                        fill[si] = pos + 1
+        
+        # Compact away the merged duplicates and the zeros.
+        out_indptr = array('q', [0])
+        n = 0
+        for si in range(ns):
+            for pos in range(indptr[si], fill[si]):
+                if data[pos]:
+                    indices[n], data[n] = indices[pos], data[pos]
+                    n += 1
+            
+            out_indptr.append(n)
+        
+        del indices[n:], data[n:]
+        return SparseStoichiometry(out_indptr, indices, data, (ns, nr))
+    
+    def stoichiometry(self, kind = 'net'):
+        '''
+        Sparse (species x reactions) stoichiometry matrix.
+        
+        Parameters
+        ==================
+        kind: str
+            ``'net'`` (products minus reactants), ``'reactants'`` or ``'products'``.
+        
+        Returns
+        ==================
+        A :class:`SparseStoichiometry`.
+        '''
+        sides = {
+            'net':       ((self._reactants, -1), (self._products, 1)),
+            'reactants': ((self._reactants, 1),),
+            'products':  ((self._products, 1),),
+        }
+        if kind not in sides:
+            raise ValueError(f'Unknown kind {kind!r}, use one of {", ".join(sides)}.')
+        
+        return self._transpose(sides[kind])
+    
+    def substance_particip(self, substance_key):
+        '''
+        Indices of the reactions in which a substance takes part, as
+        reactant or product.
+        '''
+        if self._particip is None:
+            # Participation doesn't cancel out, so reactants and products are
+            # counted with the same sign.
+            self._particip = self._transpose(((self._reactants, 1), (self._products, 1)))
+        
+        indptr, indices = self._particip.indptr, self._particip.indices
+        si = self._species_index[substance_key]
+        return list(indices[indptr[si]:indptr[si + 1]])
+    
+    def rates(self, concentrations, backend = None):
+        '''
+        Mass action rates, ``param * prod(c_i ** reactant_coeff_i)``, of all
+        the reactions, for one or many states. The exponents are taken from
+        the sparse reactant stoichiometry, so the work is O(states * nnz).
+        
+        Parameters
+        ==================
+        concentrations: array_like
+            One value per substance (in the order of ``substances``), or a
+            2D array with one such row per state.
+        backend: module or str, optional
+            Defaults to NumPy, falling back to pure Python when NumPy is
+            missing. Pass ``'math'`` to force the pure Python implementation.
+        
+        Returns
+        ==================
+        The rates, with one row per state for 2D `concentrations` (lists for
+        the pure Python implementation).
+        '''
+        backend = get_backend_fallback(backend)
+        side = self._reactants
+        params = [1 if k is None else k for k in self.params]
+        
+        if not is_array_backend(backend):
+            single = not hasattr(concentrations[0], '__len__') if len(concentrations) else True
+            rows = [concentrations] if single else concentrations
+            indptr, indices, coeffs = side.indptr, side.indices, side.coeffs
+            spans = [(indices[indptr[ri]:indptr[ri + 1]], coeffs[indptr[ri]:indptr[ri + 1]]) for ri in range(self.nr)]
+            result = [
+                [k * prod([row[si] ** c for si, c in zip(species, cs)]) for k, (species, cs) in zip(params, spans)]
+                for row in rows
+            ]
+            return result[0] if single else result
+        
+        concs = backend.asarray(concentrations, dtype = float)
+        single = concs.ndim == 1
+        concs = concs.reshape(-1, self.ns)
+        indptr = backend.frombuffer(side.indptr, dtype = side.indptr.typecode)
+        indices = backend.frombuffer(side.indices, dtype = side.indices.typecode)
+        coeffs = backend.frombuffer(side.coeffs, dtype = side.coeffs.typecode)
+        
+        # Every reactant power at once, then the products over each reaction's
+        # segment; reactions without reactants (reduceat can't do empty
+        # segments) are zeroth order.
+        rates = backend.ones((len(concs), self.nr))
+        if len(indices):
+            powers = concs[:, indices] ** coeffs
+            nonempty = indptr[:-1] < indptr[1:]
+            rates[:, nonempty] = backend.multiply.reduceat(powers, indptr[:-1][nonempty], axis = 1)
+        
+        rates *= backend.asarray(params, dtype = float)
+        return rates[0] if single else rates
+    
+    def jacobian_evaluator(self, backend = None):
+        '''
+        Evaluator of the analytic Jacobian of the mass action rate of
+        change of the concentrations, see :class:`MassActionJacobian`.
+        It's cached until the system is modified.
+        '''
+        backend = get_backend_fallback(backend)
+        if self._jacobian is None or self._jacobian.backend is not backend:
+            self._jacobian = MassActionJacobian(self, backend)
+        
+        return self._jacobian
+    
+    def rhs(self, concentrations, backend = None):
+        '''
+        Mass action rate of change of the concentrations (net stoichiometry
+        times :meth:`rates`), for one or many states.
+        '''
+        return self.jacobian_evaluator(backend).rhs(concentrations)
+    
+    def jacobian(self, concentrations, sparse = False, backend = None):
+        '''
+        Analytic Jacobian of :meth:`rhs`, see :meth:`MassActionJacobian.__call__`.
+        '''
+        return self.jacobian_evaluator(backend)(concentrations, sparse)
+    
+    def integrate(self, t_span, concentrations, method = 'rosenbrock', **kwargs):
+        '''
+        Integrates the mass action kinetics with
+        :func:`chempi.kinetics.integrate`, using :meth:`rhs` and (for the
+        default, stiff, ``method``) the analytic :meth:`jacobian`, for one
+        or many initial `concentrations`.
+        '''
+        from .kinetics import integrate
+        
+        jac = self.jacobian_evaluator(kwargs.get('backend'))
+        return integrate(
+            lambda t, c: jac.rhs(c), t_span, concentrations, method = method,
+            jac = lambda t, c: jac(c), autonomous = True, **kwargs
+        )
+    
+    def symbolic_jacobian(self, Symbol = None):
+        '''
+        The Jacobian of :meth:`rhs` as a SymPy matrix, e.g. for code
+        generation. Concentrations are the symbols ``c_0``, ``c_1``... and
+        reactions without a numeric ``param`` get the rate constant ``k_<ri>``.
+        '''
+        if Symbol is None:
+            from sympy import Symbol
+        
+        from sympy import SparseMatrix
+        
+        concs = [Symbol(f'c_{i}') for i in range(self.ns)]
+        jac = MassActionJacobian(self, 'math')
+        params = [Symbol(f'k_{ri}') if k is None else k for ri, k in enumerate(self.params)]
+        values = jac._evaluate_python(concs, params)
+        return SparseMatrix(self.ns, self.ns, {ij: v for ij, v in zip(jac.pattern_pairs, values)})
+    
+    def _category_colors(self):
+        '''
+        Colors of the reaction categories used by
+        :class:`chempi.printing.tables._RxnTable`; no categories are
+        tracked, so there are none.
+        '''
+        return {}
+
+def _integral(v):
+    # Keeps e.g. ``c**2`` from becoming ``c**2.0`` in symbolic expressions.
+    return int(v) if v == int(v) else v
+
+class MassActionJacobian:
+    '''
+    Analytic Jacobian of the mass action rate of change of the
+    concentrations of a :class:`ReactionSystem`,
+    ``dc_i/dt = sum_k S_ik k_k prod_j c_j**e_kj``, with ``S`` the net
+    stoichiometry and ``e`` the reactant coefficients.
+    
+    Everything that only depends on the stoichiometry is worked out once:
+    the sparsity pattern (``pattern``, with ``pattern_pairs`` listing its
+    ``(i, j)`` entries in order) and where each term ``S_ik dr_k/dc_j``
+    lands in it. Evaluating is then a gather, a product over the other
+    reactants of each reaction and a segmented sum, i.e. O(states * nnz).
+    Use :meth:`ReactionSystem.jacobian_evaluator` to get a cached instance.
+    '''
+    def __init__(self, rsys, backend = None):
+        self.backend = backend = get_backend_fallback(backend)
+        self._rsys = rsys
+        ns, nr = rsys.ns, rsys.nr
+        side = rsys._reactants
+        self.shape = (ns, ns)
+        
+        # Net stoichiometry, species-major (for the rhs) and by reaction.
+        self.net = net = rsys.stoichiometry('net')
+        by_reaction = [[] for _ in range(nr)]
+        for i in range(ns):
+            for p in range(net.indptr[i], net.indptr[i + 1]):
+                by_reaction[net.indices[p]].append((i, _integral(net.data[p])))
+        
+        # One term t per reactant entry: its species, exponent, reaction and
+        # the other terms of that reaction, padded with ``len(species)``
+        # which stands for a factor of one.
+        self.species = list(side.indices)
+        self.exponents = [_integral(e) for e in side.coeffs]
+        self.reaction_of = [ri for ri in range(nr) for _ in side.span(ri)]
+        width = max([len(side.span(ri)) - 1 for ri in range(nr)] + [0])
+        padding = len(self.species)
+        self.others = [
+            [u for u in side.span(ri) if u != t] + [padding] * (width + 1 - len(side.span(ri)))
+            for ri in range(nr) for t in side.span(ri)
+        ]
+        
+        contributions = {}
+        for t, (j, e, ri) in enumerate(zip(self.species, self.exponents, self.reaction_of)):
+            if e:
+                for i, s in by_reaction[ri]:
+                    contributions.setdefault((i, j), []).append((t, s))
+        
+        self.pattern_pairs = sorted(contributions)
+        indptr = array('q', [0] * (ns + 1))
+        for i, _ in self.pattern_pairs:
+            indptr[i + 1] += 1
+        
+        for i in range(ns):
+            indptr[i + 1] += indptr[i]
+        
+        self.pattern = SparseJacobian(indptr, array('q', [j for _, j in self.pattern_pairs]), None, self.shape)
+        
+        # The contributions, grouped by their entry of the pattern.
+        self.terms, self.coeffs, self.starts = [], [], []
+        for ij in self.pattern_pairs:
+            self.starts.append(len(self.terms))
+            for t, s in contributions[ij]:
+                self.terms.append(t)
+                self.coeffs.append(s)
+        
+        if is_array_backend(backend):
+            np = backend
+            self._arrays = dict(
+                species   = np.asarray(self.species, dtype = int),
+                exponents = np.asarray(self.exponents, dtype = float),
+                reaction_of = np.asarray(self.reaction_of, dtype = int),
+                others    = np.asarray(self.others, dtype = int).reshape(len(self.species), width),
+                terms     = np.asarray(self.terms, dtype = int),
+                coeffs    = np.asarray(self.coeffs, dtype = float),
+                starts    = np.asarray(self.starts, dtype = int),
+                rows      = np.asarray([i for i, _ in self.pattern_pairs], dtype = int),
+                cols      = np.asarray([j for _, j in self.pattern_pairs], dtype = int),
+                net_indptr  = np.frombuffer(net.indptr, dtype = net.indptr.typecode),
+                net_indices = np.frombuffer(net.indices, dtype = net.indices.typecode),
+                net_data    = np.asarray(net.data, dtype = float),
+            )
+    
+    @property
+    def params(self):
+        '''
+        Rate constants of the reactions, read from the system on every
+        evaluation (like :meth:`ReactionSystem.rates` does), so that
+        changes to ``ReactionSystem.params`` are picked up.
+        '''
+        return [1 if k is None else k for k in self._rsys.params]
+    
+    @property
+    def nnz(self):
+        return len(self.pattern_pairs)
+    
+    def rhs(self, concentrations):
+        '''
+        Rate of change of the concentrations, for one or many states.
+        '''
+        backend = self.backend
+        rates = self._rsys.rates(concentrations, backend)
+        net = self.net
+        
+        if not is_array_backend(backend):
+            single = not hasattr(rates[0], '__len__') if len(rates) else True
+            result = [
+                [sum([row[net.indices[p]] * net.data[p] for p in range(net.indptr[i], net.indptr[i + 1])])
+                 for i in range(net.shape[0])]
+                for row in ([rates] if single else rates)
+            ]
+            return result[0] if single else result
+        
+        single = rates.ndim == 1
+        rates = rates.reshape(-1, net.shape[1])
+        a = self._arrays
+        result = backend.zeros((len(rates), net.shape[0]))
+        nonempty = a['net_indptr'][:-1] < a['net_indptr'][1:]
+        if nonempty.any():
+            terms = rates[:, a['net_indices']] * a['net_data']
+            result[:, nonempty] = backend.add.reduceat(terms, a['net_indptr'][:-1][nonempty], axis = 1)
+        
+        return result[0] if single else result
+    
+    def _evaluate_python(self, concs, params = None):
+        '''
+        Values of the Jacobian in the order of ``pattern_pairs``, for one
+        state (also works with symbolic concentrations and parameters).
+        '''
+        params = self.params if params is None else params
+        powers = [concs[j] ** e for j, e in zip(self.species, self.exponents)] + [1]
+        derivatives = [
+            params[ri] * e * concs[j] ** (e - 1) * prod([powers[u] for u in others])
+            for j, e, ri, others in zip(self.species, self.exponents, self.reaction_of, self.others)
+        ]
+        bounds = self.starts + [len(self.terms)]
+        return [
+            sum([self.coeffs[c] * derivatives[self.terms[c]] for c in range(start, stop)])
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+    
+    def __call__(self, concentrations, sparse = False):
+        '''
+        Evaluates the Jacobian ``J[i, j] = d(dc_i/dt)/dc_j``.
+        
+        Parameters
+        ==================
+        concentrations: array_like
+            One value per substance, or a 2D array with one such row per state.
+        sparse: bool
+            Whether to return a :class:`SparseJacobian` (``data`` having one
+            row per state for 2D `concentrations`) instead of dense matrices.
+        
+        Returns
+        ==================
+        An ``ns x ns`` array, or a ``states x ns x ns`` one for 2D
+        `concentrations` (nested lists for the pure Python implementation),
+        or a :class:`SparseJacobian`.
+        '''
+        backend = self.backend
+        ns = self.shape[0]
+        
+        if not is_array_backend(backend):
+            single = not hasattr(concentrations[0], '__len__') if len(concentrations) else True
+            data = [self._evaluate_python(row) for row in ([concentrations] if single else concentrations)]
+            if sparse:
+                return self.pattern._replace(data = data[0] if single else data)
+            
+            dense = []
+            for values in data:
+                jac = [[0.0] * ns for _ in range(ns)]
+                for (i, j), v in zip(self.pattern_pairs, values):
+                    jac[i][j] = v
+                
+                dense.append(jac)
+            
+            return dense[0] if single else dense
+        
+        a = self._arrays
+        concs = backend.asarray(concentrations, dtype = float)
+        single = concs.ndim == 1
+        concs = concs.reshape(-1, ns)
+        n_states = len(concs)
+        
+        if self.nnz:
+            gathered = concs[:, a['species']]
+            powers = backend.concatenate([gathered ** a['exponents'], backend.ones((n_states, 1))], axis = 1)
+            k = backend.asarray(self.params, dtype = float)[a['reaction_of']]
+            derivatives = k * a['exponents'] * gathered ** (a['exponents'] - 1) * powers[:, a['others']].prod(axis = 2)
+            data = backend.add.reduceat(derivatives[:, a['terms']] * a['coeffs'], a['starts'], axis = 1)
+        
+        else:
+            data = backend.zeros((n_states, 0))
+        
+        if sparse:
+            return self.pattern._replace(data = data[0] if single else data)
+        
+        jac = backend.zeros((n_states, ns, ns))
+        jac[:, a['rows'], a['cols']] = data
+        return jac[0] if single else jac
@@ -0,0 +1,89 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from chempi.equilibria import Speciation
+from chempi.util.pyutil import NoConvergence
+
+PKA = 4.76
+
+def _acetate(sodium = True):
+    components = ['H+', 'CH3COO-'] + (['Na+'] if sodium else [])
+    return Speciation(components, {
+        'CH3COOH': ({'H+': 1, 'CH3COO-': 1}, PKA),
+        'OH-': ({'H+': -1}, -14),
+    })
+
+def test_acetic_acid():
+    sp = _acetate(sodium = False)
+    result = sp.solve({'H+': 0.1, 'CH3COO-': 0.1})
+    assert result.concentrations.shape == (4,)
+    assert isinstance(result.iterations, int)
+    H, Ac, HAc, OH = result.concentrations
+    assert round(-result.free[0], 2) == 2.88
+    assert np.isclose(HAc, 10 ** PKA * H * Ac)
+    assert np.isclose(H * OH, 1e-14)
+    assert np.isclose(Ac + HAc, 0.1)
+    assert np.isclose(H + HAc - OH, 0.1)
+
+def test_fixed_ph():
+    sp = _acetate(sodium = False)
+    pH = np.linspace(2, 12, 21)
+    result = sp.solve({'CH3COO-': 0.1}, fixed = {'H+': -pH})
+    assert result.concentrations.shape == (21, 4)
+    assert np.allclose(result.free[:, 0], -pH)
+    fraction = result.concentrations[:, 1] / 0.1
+    assert np.allclose(fraction, 1 / (1 + 10 ** (PKA - pH)))
+
+def test_charge_balance_titration():
+    sp = _acetate()
+    sodium = np.linspace(0.005, 0.2, 40)
+    result = sp.solve({'CH3COO-': 0.1, 'Na+': sodium}, charge_balance = 'H+')
+    c = result.concentrations
+    assert np.allclose(c @ sp.charges, 0, atol = 1e-10)
+    assert np.allclose(c[:, 1] + c[:, 3], 0.1)
+    assert np.allclose(c[:, 2], sodium)
+    pH = -result.free[:, 0]
+    assert (np.diff(pH) > 0).all()
+    # Sodium acetate, i.e. at the equivalence point.
+    single = sp.solve({'CH3COO-': 0.1, 'Na+': 0.1}, charge_balance = 'H+')
+    assert round(-single.free[0], 2) == 8.88
+
+def test_guess():
+    sp = _acetate()
+    totals = {'CH3COO-': 0.1, 'Na+': 0.05}
+    result = sp.solve(totals, charge_balance = 'H+')
+    assert result.iterations > 0
+    again = sp.solve(totals, charge_balance = 'H+', guess = result.free)
+    assert again.iterations == 0
+    assert np.allclose(again.concentrations, result.concentrations)
+    nearby = sp.solve({'CH3COO-': 0.1, 'Na+': 0.051}, charge_balance = 'H+', guess = result.free)
+    assert nearby.iterations < result.iterations
+
+def test_warm_start():
+    sp = _acetate()
+    totals = {'CH3COO-': 0.1, 'Na+': np.linspace(0.005, 0.2, 40)}
+    with pytest.raises(NoConvergence):
+        sp.solve(totals, charge_balance = 'H+', max_iter = 8, warm_start = False)
+    
+    warm = sp.solve(totals, charge_balance = 'H+', max_iter = 8)
+    cold = sp.solve(totals, charge_balance = 'H+')
+    assert np.allclose(warm.concentrations, cold.concentrations)
+
+def test_no_convergence():
+    with pytest.raises(NoConvergence):
+        _acetate(sodium = False).solve({'H+': 0.1, 'CH3COO-': 0.1}, max_iter = 1)
+
+def test_invalid_input():
+    sp = _acetate()
+    with pytest.raises(ValueError):
+        sp.solve({'CH3COO-': 0.1, 'Na+': 0.1}, fixed = {'H+': -7}, charge_balance = 'H+')
+    
+    with pytest.raises(ValueError):
+        sp.solve({'CH3COO-': 0.1}, charge_balance = 'H+')
+    
+    with pytest.raises(ValueError):
+        Speciation(['H+'], {'H+': ({'H+': 1}, 0)})
+    
+    with pytest.raises(KeyError):
+        Speciation(['H+'], {'OH-': ({'Na+': 1}, 0)})
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from chempi.reactionsystem import ReactionSystem
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BACKENDS = ['math', pytest.param(numpy, marks = pytest.mark.skipif(numpy is None, reason = 'numpy missing'))]
+
+def _decay():
+    rsys = ReactionSystem(['A', 'B'])
+    rsys.add_reaction({'A': 1}, {'B': 1}, param = 1.0)
+    return rsys
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_jacobian_follows_param_changes(backend):
+    rsys = _decay()
+    assert rsys.jacobian([1.0, 0.0], backend = backend)[0][0] == -1.0
+    rsys.params[0] = 3.0
+    assert list(rsys.rhs([1.0, 0.0], backend = backend)) == [-3.0, 3.0]
+    assert rsys.jacobian([1.0, 0.0], backend = backend)[0][0] == -3.0
+    assert rsys.jacobian([1.0, 0.0], backend = backend)[1][0] == 3.0
+    rsys.params[0] = None
+    assert rsys.jacobian([1.0, 0.0], backend = backend)[0][0] == -1.0
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_sparse_jacobian_follows_param_changes(backend):
+    rsys = _decay()
+    rsys.jacobian([1.0, 0.0], sparse = True, backend = backend)
+    rsys.params[0] = 2.5
+    assert list(rsys.jacobian([1.0, 0.0], sparse = True, backend = backend).data) == [-2.5, 2.5]
+
+def _dense(sparse):
+    ns, nr = sparse.shape
+    dense = [[0] * nr for _ in range(ns)]
+    for i in range(ns):
+        for p in range(sparse.indptr[i], sparse.indptr[i + 1]):
+            dense[i][sparse.indices[p]] = sparse.data[p]
+    
+    return dense
+
+def _random_system(rng, ns = 8, nr = 30):
+    rsys = ReactionSystem([f's{i}' for i in range(ns)])
+    reactions = []
+    for ri in range(nr):
+        reactants = {f's{i}': rng.randint(1, 3) for i in rng.sample(range(ns), rng.randint(0, 3))}
+        products = {f's{i}': rng.randint(1, 3) for i in rng.sample(range(ns), rng.randint(0, 3))}
+        assert rsys.add_reaction(reactants, products, param = ri) == ri
+        reactions.append((reactants, products))
+    
+    return rsys, reactions
+
+def _expected(rsys, reactions, kind):
+    keys = list(rsys.substances)
+    dense = [[0] * len(reactions) for _ in keys]
+    for ri, (reactants, products) in enumerate(reactions):
+        for side, sign in ((reactants, -1 if kind == 'net' else 1), (products, 1)):
+            if kind == 'net' or (side is reactants) == (kind == 'reactants'):
+                for sk, coeff in side.items():
+                    dense[keys.index(sk)][ri] += sign * coeff
+    
+    return dense
+
+def test_stoichiometry_matches_dicts():
+    rng = random.Random(0)
+    rsys, reactions = _random_system(rng)
+    for kind in ('net', 'reactants', 'products'):
+        sparse = rsys.stoichiometry(kind)
+        assert sparse.shape == (rsys.ns, rsys.nr)
+        assert 0 not in sparse.data
+        for i in range(rsys.ns):
+            row = sparse.indices[sparse.indptr[i]:sparse.indptr[i + 1]]
+            assert list(row) == sorted(row)
+        
+        assert _dense(sparse) == _expected(rsys, reactions, kind)
+    
+    for sk in rsys.substances:
+        assert rsys.substance_particip(sk) == [
+            ri for ri, (reactants, products) in enumerate(reactions) if sk in reactants or sk in products
+        ]
+
+def test_remove_reaction():
+    rng = random.Random(1)
+    rsys, reactions = _random_system(rng, nr = 10)
+    rsys.substance_particip('s0')
+    for ri in (3, -1, 0):
+        rsys.remove_reaction(ri)
+        del reactions[ri]
+    
+    assert rsys.nr == len(rsys) == 7
+    assert rsys.params == [1, 2, 4, 5, 6, 7, 8]
+    assert _dense(rsys.stoichiometry('net')) == _expected(rsys, reactions, 'net')
+    assert rsys.substance_particip('s0') == [
+        ri for ri, (reactants, products) in enumerate(reactions) if 's0' in reactants or 's0' in products
+    ]
+
+def test_net_stoichiometry_cancels():
+    rsys = ReactionSystem()
+    rsys.add_reaction({'A': 1, 'E': 1}, {'B': 1, 'E': 1})
+    rsys.add_reaction({'A': 0.5}, {'C': 1.5})
+    assert rsys.net_stoichiometry(0) == {'A': -1, 'B': 1}
+    assert rsys.reactants(0) == {'A': 1, 'E': 1}
+    assert rsys.products(1) == {'C': 1.5}
+    assert _dense(rsys.stoichiometry('net')) == [[-1, -0.5], [0, 0], [1, 0], [0, 1.5]]
+    with pytest.raises(ValueError):
+        rsys.stoichiometry('both')
@@ -1,5 +1,5 @@
 from itertools import chain
-from .periodic import GROUPS, _NAMES, _SYMBOLS
+from .periodic import ELEMENTS
 
 _ANIONS = {
 	'F-'      : 'fluoride',
@@ -65,15 +65,15 @@ _CATION_OXIDATION_STATES = { # more likely states
 
 _ALKALI = [
 	(
-		_SYMBOLS[n] + '+',
-		_NAMES[n].lower()
-	) for n in GROUPS[1]
+		ELEMENTS.symbols[z - 1] + '+',
+		ELEMENTS.lower_names[z - 1]
+	) for z in ELEMENTS.select(groups = 1)
 ]
 _ALKALINE_EARTH = [
 	(
-		_SYMBOLS[n] + '+2',
-		_NAMES[n].lower()
-	) for n in GROUPS[2]
+		ELEMENTS.symbols[z - 1] + '+2',
+		ELEMENTS.lower_names[z - 1]
+	) for z in ELEMENTS.select(groups = 2)
 ]
 
 _ALL_NAMES = dict(
@@ -1,6 +1,8 @@
 from collections import defaultdict
 from itertools   import chain
 
+from .._util import get_backend_fallback, is_array_backend
+
 def _imul(d_1, d_2):
     if hasattr(d_2, 'keys'):
         for k in set(chain(d_1.keys(), d_2.keys())):
@@ -55,10 +57,10 @@ class ArithDict(defaultdict):
         try:
             for k, v in other.items():
                 if k not in self:
-                    self[k] = v
+                    self[k] = -v
                 
                 else:
-                    self[k] += v
+                    self[k] -= v
         
         except AttributeError:
             for k in self:
@@ -67,7 +69,9 @@ class ArithDict(defaultdict):
         return self
     
     def __rsub__(self, other):
-        return self - other
+        _self = self * -1
+        _self += other
+        return _self
     
     def __mul__(self, other):
         _self = self.copy()
@@ -117,7 +121,7 @@ class ArithDict(defaultdict):
     
     def isclose(self, other, rtol = 1e-15, atol = None):
         def _isclose(a, b):
-            lim = abs(rtol * b):
+            lim = abs(rtol * b)
             lim += atol if atol is not None else 0
             return abs(a - b) <= lim
         
@@ -127,8 +131,8 @@ class ArithDict(defaultdict):
         for v in self.values():
             if v < 0:
                 return False
-            
-            return True
+        
+        return True
     
     def __repr__(self):
         return f'{self.__class__.__name__}({repr(self.default_factory)}, {dict(self)})'
@@ -137,16 +141,153 @@ class ArithDict(defaultdict):
         return a == b
     
     def _discrepancy(self, other, callable_):
+        # ``get`` rather than indexing, which would insert the missing keys.
         default = self.default_factory()
-        _self  = self.copy()
-        _other = other.copy()
         
         try:
-            for k in set(chain(_self.keys(), _other.keys())):
-                if not callable_(_self[k], _other.get(k, default)):
+            for k in set(chain(self.keys(), other.keys())):
+                if not callable_(self.get(k, default), other.get(k, default)):
                     return False
             
             return True
         
         except TypeError:
             return False
+
+def _default_factory(dicts, default_factory):
+    if default_factory is not None:
+        return default_factory
+    
+    return getattr(dicts[0], 'default_factory', None) or int if dicts else int
+
+def dict_sum(dicts, weights = None, default_factory = None):
+    '''
+    Sum of many dicts (e.g. the compositions of all the species in a
+    reaction system), accumulated in a single pass into one
+    :class:`ArithDict` instead of copying an accumulator per term as
+    ``sum()`` does.
+    
+    Parameters
+    ==================
+    dicts: sequence of mappings
+    weights: sequence of numbers, optional
+        Coefficients for the terms, e.g. stoichiometric coefficients.
+    default_factory: callable, optional
+        Defaults to the one of the first dict (`int` for plain dicts).
+    
+    Examples:
+    ==================
+    >>> dict_sum([{1: 2, 8: 1}, {1: 2}], [2, -1])
+    ArithDict(<class 'int'>, {1: 2, 8: 2})
+    '''
+    dicts = list(dicts)
+    result = ArithDict(_default_factory(dicts, default_factory))
+    get = result.get
+    
+    if weights is None:
+        for d in dicts:
+            for k, v in d.items():
+                result[k] = get(k, 0) + v
+    
+    else:
+        for d, w in zip(dicts, weights):
+            for k, v in d.items():
+                result[k] = get(k, 0) + w * v
+    
+    return result
+
+def _dict_extremum(dicts, pick, default_factory):
+    dicts = list(dicts)
+    default_factory = _default_factory(dicts, default_factory)
+    default = default_factory()
+    result, counts = {}, {}
+    
+    for d in dicts:
+        for k, v in d.items():
+            if k in result:
+                result[k] = pick(result[k], v)
+                counts[k] += 1
+            
+            else:
+                result[k] = v
+                counts[k] = 1
+    
+    # A key missing from some of the dicts takes their default value too.
+    return ArithDict(default_factory, {
+        k: v if counts[k] == len(dicts) else pick(v, default) for k, v in result.items()
+    })
+
+def dict_min(dicts, default_factory = None):
+    '''
+    Elementwise minimum of many dicts, missing keys counting as the
+    default value. See :func:`dict_sum`.
+    '''
+    return _dict_extremum(dicts, min, default_factory)
+
+def dict_max(dicts, default_factory = None):
+    '''
+    Elementwise maximum of many dicts, missing keys counting as the
+    default value. See :func:`dict_sum`.
+    '''
+    return _dict_extremum(dicts, max, default_factory)
+
+def dicts_to_matrix(dicts, keys = None, backend = None):
+    '''
+    Aligns many dicts on the union of their keys.
+    
+    Parameters
+    ==================
+    dicts: sequence of mappings
+    keys: sequence, optional
+        Columns of the matrix. Defaults to the sorted union of all the keys;
+        when given, entries with other keys are left out.
+    backend: module or str, optional
+        Defaults to NumPy, falling back to pure Python when NumPy is missing.
+        Pass ``'math'`` to force the pure Python implementation.
+    
+    Returns
+    ==================
+    A ``(matrix, keys)`` tuple, with one row per dict and missing entries
+    set to `0` (a list of lists for the pure Python implementation).
+    
+    Examples:
+    ==================
+    >>> dicts_to_matrix([{1: 2, 8: 1}, {6: 1, 8: 2}], backend = 'math')
+    ([[2, 0, 1], [0, 1, 2]], [1, 6, 8])
+    '''
+    dicts = list(dicts)
+    if keys is None:
+        keys = sorted(set(chain.from_iterable(d.keys() for d in dicts)))
+    
+    else:
+        keys = list(keys)
+    
+    columns = {k: i for i, k in enumerate(keys)}
+    backend = get_backend_fallback(backend)
+    
+    if not is_array_backend(backend):
+        matrix = []
+        for d in dicts:
+            row = [0] * len(keys)
+            for k, v in d.items():
+                i = columns.get(k)
+                if i is not None:
+                    row[i] = v
+            
+            matrix.append(row)
+        
+        return matrix, keys
+    
+    rows, cols, values = [], [], []
+    for n, d in enumerate(dicts):
+        for k, v in d.items():
+            i = columns.get(k)
+            if i is not None:
+                rows.append(n)
+                cols.append(i)
+                values.append(v)
+    
+    values = backend.asarray(values)
+    matrix = backend.zeros((len(dicts), len(keys)), dtype = values.dtype if len(values) else int)
+    matrix[backend.asarray(rows, dtype = int), backend.asarray(cols, dtype = int)] = values
+    return matrix, keys
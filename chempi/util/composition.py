@@ -0,0 +1,357 @@
+'''
+Sparse compositions, stored as a sorted array of integer keys (e.g. atomic
+numbers or species indices) and an array of the matching values.
+'''
+import operator
+from array     import array
+from bisect    import bisect_left
+from functools import lru_cache
+
+from .._util          import get_backend_fallback, is_array_backend
+from .arithmetic_dict import ArithDict
+
+# Below this many entries, plain Python loops beat the per-call overhead of NumPy.
+VECTORIZE_MIN_SIZE = 64
+
+_UFUNCS = {
+    operator.add:      'add',
+    operator.sub:      'subtract',
+    operator.mul:      'multiply',
+    operator.truediv:  'true_divide',
+    operator.floordiv: 'floor_divide',
+}
+
+@lru_cache(maxsize = None)
+def _numpy():
+    backend = get_backend_fallback(None)
+    return backend if is_array_backend(backend) else None
+
+def _typecode(values):
+    return 'q' if all(isinstance(v, int) for v in values) else 'd'
+
+def _result_typecode(typecode, other_typecode, op):
+    if op is operator.truediv or 'd' in (typecode, other_typecode):
+        return 'd'
+    
+    return 'q'
+
+def _merged(keys_1, values_1, keys_2, values_2):
+    '''
+    Walks two sorted key arrays at once, yielding ``(key, value_1, value_2)``
+    for the union of keys, with `0` for the missing values.
+    '''
+    i, j = 0, 0
+    n_1, n_2 = len(keys_1), len(keys_2)
+    while i < n_1 and j < n_2:
+        k_1, k_2 = keys_1[i], keys_2[j]
+        if k_1 == k_2:
+            yield k_1, values_1[i], values_2[j]
+            i += 1
+            j += 1
+        
+        elif k_1 < k_2:
+            yield k_1, values_1[i], 0
+            i += 1
+        
+        else:
+            yield k_2, 0, values_2[j]
+            j += 1
+    
+    for i in range(i, n_1):
+        yield keys_1[i], values_1[i], 0
+    
+    for j in range(j, n_2):
+        yield keys_2[j], 0, values_2[j]
+
+class Composition:
+    '''
+    Sparse counterpart of :class:`chempi.util.arithmetic_dict.ArithDict`
+    with integer keys and ``int`` or ``float`` values, missing keys
+    counting as `0`.
+    
+    The arithmetic operators work on the whole value arrays at once (with
+    NumPy for large compositions), and the in-place operators update the
+    value array without copying it unless the set of keys changes or ints
+    have to become floats. Comparisons stop at the first mismatch without
+    allocating.
+    
+    Examples:
+    ==================
+    >>> water = Composition({1: 2, 8: 1})
+    >>> water * 2 + Composition({0: -1})
+    Composition({0: -1, 1: 4, 8: 2})
+    >>> water == {8: 1, 1: 2, 6: 0}
+    True
+    '''
+    __slots__ = ('_keys', '_values')
+    
+    def __init__(self, items = None):
+        if isinstance(items, Composition):
+            self._keys, self._values = items._keys[:], items._values[:]
+            return
+        
+        if items is None:
+            items = ()
+        
+        elif hasattr(items, 'items'):
+            items = items.items()
+        
+        accumulated = {}
+        for k, v in items:
+            accumulated[k] = accumulated.get(k, 0) + v
+        
+        keys = sorted(accumulated)
+        values = [accumulated[k] for k in keys]
+        self._keys = array('q', keys)
+        self._values = array(_typecode(values), values)
+    
+    @classmethod
+    def from_arrays(cls, keys, values, check = True):
+        '''
+        Creates a composition from sorted `keys` and the matching `values`,
+        reusing ``array('q')`` keys and ``array('q')``/``array('d')`` values
+        as they are instead of copying them.
+        '''
+        if len(keys) != len(values):
+            raise ValueError('keys and values must have the same length.')
+        
+        self = object.__new__(cls)
+        self._keys = keys if isinstance(keys, array) and keys.typecode == 'q' else array('q', keys)
+        
+        if isinstance(values, array) and values.typecode in 'qd':
+            self._values = values
+        
+        else:
+            values = list(values)
+            self._values = array(_typecode(values), values)
+        
+        if check and any(self._keys[i - 1] >= self._keys[i] for i in range(1, len(self._keys))):
+            raise ValueError('keys must be strictly increasing.')
+        
+        return self
+    
+    def to_arithdict(self, default_factory = int):
+        return ArithDict(default_factory, zip(self._keys, self._values))
+    
+    def copy(self):
+        return self.__class__(self)
+    
+    def __len__(self):
+        return len(self._keys)
+    
+    def __iter__(self):
+        return iter(self._keys)
+    
+    def __contains__(self, k):
+        i = bisect_left(self._keys, k)
+        return i < len(self._keys) and self._keys[i] == k
+    
+    def __getitem__(self, k):
+        i = bisect_left(self._keys, k)
+        if i < len(self._keys) and self._keys[i] == k:
+            return self._values[i]
+        
+        return 0
+    
+    def get(self, k, default = 0):
+        i = bisect_left(self._keys, k)
+        if i < len(self._keys) and self._keys[i] == k:
+            return self._values[i]
+        
+        return default
+    
+    def __setitem__(self, k, v):
+        i = bisect_left(self._keys, k)
+        if i < len(self._keys) and self._keys[i] == k:
+            if self._values.typecode == 'q' and not isinstance(v, int):
+                self._values = array('d', self._values)
+            
+            self._values[i] = v
+            return
+        
+        if self._values.typecode == 'q' and not isinstance(v, int):
+            self._values = array('d', self._values)
+        
+        self._keys.insert(i, k)
+        self._values.insert(i, v)
+    
+    def keys(self):
+        '''Read-only view of the sorted keys.'''
+        return memoryview(self._keys).toreadonly()
+    
+    def values(self):
+        '''Read-only view of the values, in the order of the keys.'''
+        return memoryview(self._values).toreadonly()
+    
+    def items(self):
+        return zip(self._keys, self._values)
+    
+    def prune(self):
+        '''
+        Drops the entries whose value is `0`, in place.
+        '''
+        keys, values = self._keys, self._values
+        n = 0
+        for i, v in enumerate(values):
+            if v:
+                keys[n], values[n] = keys[i], v
+                n += 1
+        
+        del keys[n:], values[n:]
+        return self
+    
+    def _apply(self, other, op, inplace):
+        '''
+        ``op`` applied to the values of `self` and `other` (a composition,
+        a mapping, or a scalar applying to every value).
+        '''
+        if hasattr(other, 'items') and not isinstance(other, Composition):
+            other = Composition(other)
+        
+        keys, values = self._keys, self._values
+        if isinstance(other, Composition):
+            if keys == other._keys:
+                other_values = other._values
+                other_typecode = other_values.typecode
+            
+            else:
+                keys, values, other_values = array('q'), [], []
+                for k, a, b in _merged(self._keys, self._values, other._keys, other._values):
+                    keys.append(k)
+                    values.append(a)
+                    other_values.append(b)
+                
+                values = array(self._values.typecode, values)
+                other_values = array(other._values.typecode, other_values)
+                other_typecode = other_values.typecode
+            
+            divides_by_zero = 0 in other_values
+        
+        else:
+            other_values = other
+            other_typecode = 'q' if isinstance(other, int) else 'd'
+            divides_by_zero = other == 0
+        
+        if divides_by_zero and op in (operator.truediv, operator.floordiv):
+            raise ZeroDivisionError(f'{type(self).__name__} division by zero')
+        
+        typecode = _result_typecode(values.typecode, other_typecode, op)
+        in_buffer = inplace and typecode == values.typecode and values is self._values
+        np = _numpy() if len(keys) >= VECTORIZE_MIN_SIZE else None
+        
+        if np is not None:
+            a = np.frombuffer(values, dtype = values.typecode)
+            b = np.frombuffer(other_values, dtype = other_typecode) if isinstance(other_values, array) else other_values
+            ufunc = getattr(np, _UFUNCS[op])
+            
+            if in_buffer:
+                ufunc(a, b, out = a)
+                return self
+            
+            result = array(typecode)
+            result.frombytes(ufunc(a, b).astype(typecode, copy = False).tobytes())
+        
+        elif in_buffer:
+            if isinstance(other_values, array):
+                for i, b in enumerate(other_values):
+                    values[i] = op(values[i], b)
+            
+            else:
+                for i, a in enumerate(values):
+                    values[i] = op(a, other_values)
+            
+            return self
+        
+        elif isinstance(other_values, array):
+            result = array(typecode, map(op, values, other_values))
+        
+        else:
+            result = array(typecode, [op(a, other_values) for a in values])
+        
+        if inplace:
+            self._keys, self._values = keys, result
+            return self
+        
+        return self.from_arrays(keys if keys is not self._keys else keys[:], result, check = False)
+    
+    def __add__(self, other):
+        return self._apply(other, operator.add, False)
+    
+    def __iadd__(self, other):
+        return self._apply(other, operator.add, True)
+    
+    def __radd__(self, other):
+        return self._apply(other, operator.add, False)
+    
+    def __sub__(self, other):
+        return self._apply(other, operator.sub, False)
+    
+    def __isub__(self, other):
+        return self._apply(other, operator.sub, True)
+    
+    def __rsub__(self, other):
+        return (-self)._apply(other, operator.add, True)
+    
+    def __mul__(self, other):
+        return self._apply(other, operator.mul, False)
+    
+    def __imul__(self, other):
+        return self._apply(other, operator.mul, True)
+    
+    def __rmul__(self, other):
+        return self._apply(other, operator.mul, False)
+    
+    def __truediv__(self, other):
+        return self._apply(other, operator.truediv, False)
+    
+    def __itruediv__(self, other):
+        return self._apply(other, operator.truediv, True)
+    
+    def __floordiv__(self, other):
+        return self._apply(other, operator.floordiv, False)
+    
+    def __ifloordiv__(self, other):
+        return self._apply(other, operator.floordiv, True)
+    
+    def __neg__(self):
+        return self._apply(-1, operator.mul, False)
+    
+    def _compare(self, other, callable_):
+        if not isinstance(other, Composition):
+            other = Composition(other)
+        
+        if self._keys == other._keys:
+            if callable_ is operator.eq:
+                return self._values == other._values
+            
+            return all(map(callable_, self._values, other._values))
+        
+        return all(callable_(a, b) for _, a, b in _merged(self._keys, self._values, other._keys, other._values))
+    
+    def __eq__(self, other):
+        if self is other:
+            return True
+        
+        if not hasattr(other, 'items'):
+            return NotImplemented
+        
+        return self._compare(other, operator.eq)
+    
+    __hash__ = None
+    
+    def isclose(self, other, rtol = 1e-15, atol = None):
+        '''
+        Same as :meth:`chempi.util.arithmetic_dict.ArithDict.isclose`.
+        '''
+        def _isclose(a, b):
+            lim = abs(rtol * b)
+            lim += atol if atol is not None else 0
+            return abs(a - b) <= lim
+        
+        return self._compare(other, _isclose)
+    
+    def all_non_negative(self):
+        return all(v >= 0 for v in self._values)
+    
+    def __repr__(self):
+        return f'{self.__class__.__name__}({dict(self.items())})'
@@ -1,9 +1,13 @@
-from collections import defaultdict
+from collections         import defaultdict, deque, namedtuple
+from concurrent.futures  import ProcessPoolExecutor
+from functools           import lru_cache
+from itertools           import islice
 
+import os
 import re
 
 from .pyutil   import memoize
-from .periodic import symbols
+from .periodic import ELEMENTS, UnknownElementError
 
 _GREEK_LETTERS = (
     'alpha',
@@ -62,10 +66,372 @@ def _get_leading_integer(string):
         matches_ = 1
     
     elif len(matches_) == 1:
-        string   = string[len(m[0]):]
-        matches_ = int(_matches[0])
+        string   = string[len(matches_[0]):]
+        matches_ = int(matches_[0])
     
     else:
         raise ValueError('Failed to parse %s.' % string)
     
     return matches_, string
+
+_SYMBOL_NUMBERS = {symbol: z for z, symbol in enumerate(ELEMENTS.symbols, 1)}
+
+_GREEK_PREFIXES = tuple(k + '-' for k in _GREEK_LETTERS)
+_PHASE_SUFFIXES = ('(s)', '(l)', '(g)', '(aq)')
+_BRACKETS       = {')': '(', ']': '[', '}': '{'}
+
+_FORMULA_CHARGE = re.compile(r'([+-])(\d*)$')
+_FORMULA_PARTS  = re.compile(r'\.{1,2}')
+_FORMULA_TOKENS = re.compile(r'([A-Z][a-z]?)|([(\[{])|([)\]}])|(\d+)|(.)')
+
+FORMULA_CACHE_SIZE = 2**16
+
+def _strip_formula(formula):
+    '''
+    Splits off prefixes, phase suffixes, radical dots and the charge.
+    '''
+    for prefix in _GREEK_PREFIXES:
+        if formula.startswith(prefix):
+            formula = formula[len(prefix):]
+            break
+    
+    for suffix in _PHASE_SUFFIXES:
+        if formula.endswith(suffix):
+            formula = formula[:-len(suffix)]
+            break
+    
+    charge = 0
+    match_ = _FORMULA_CHARGE.search(formula)
+    if match_ is not None:
+        sign, digits = match_.groups()
+        charge  = (int(digits) if digits else 1) * (-1 if sign == '-' else 1)
+        formula = formula[:match_.start()]
+    
+    if formula.startswith('.') and not formula.startswith('..'):
+        formula = formula[1:]
+    
+    if formula.endswith('.') and not formula.endswith('..'):
+        formula = formula[:-1]
+    
+    return formula, charge
+
+def _add_part_composition(composition, part, formula):
+    multiplier, part = _get_leading_integer(part)
+    stack = [({}, None)] # (counts, opening bracket)
+    last  = None # What a subscript applies to: an atomic number or a bracketed group.
+    
+    for symbol, opening, closing, digits, other in _FORMULA_TOKENS.findall(part):
+        counts = stack[-1][0]
+        if symbol:
+            try:
+                last = _SYMBOL_NUMBERS[symbol]
+            
+            except KeyError:
+                raise UnknownElementError(symbol) from None
+            
+            counts[last] = counts.get(last, 0) + 1
+        
+        elif opening:
+            stack.append(({}, opening))
+            last = None
+        
+        elif closing:
+            if len(stack) == 1 or stack[-1][1] != _BRACKETS[closing]:
+                raise ValueError('Unbalanced brackets in %s.' % formula)
+            
+            last, _ = stack.pop()
+            parent  = stack[-1][0]
+            for k, v in last.items():
+                parent[k] = parent.get(k, 0) + v
+        
+        elif digits and last is not None:
+            n = int(digits) - 1
+            if isinstance(last, dict):
+                for k, v in last.items():
+                    counts[k] += v * n
+            
+            else:
+                counts[last] += n
+            
+            last = None
+        
+        else:
+            raise ValueError('Failed to parse %s.' % formula)
+    
+    if len(stack) != 1 or not stack[0][0]:
+        raise ValueError('Failed to parse %s.' % formula)
+    
+    for k, v in stack[0][0].items():
+        composition[k] = composition.get(k, 0) + v * multiplier
+
+@lru_cache(maxsize = FORMULA_CACHE_SIZE)
+def _formula_to_composition(formula):
+    stripped, charge = _strip_formula(formula)
+    composition = {}
+    for part in _FORMULA_PARTS.split(stripped):
+        _add_part_composition(composition, part, formula)
+    
+    if charge:
+        composition[0] = charge
+    
+    return composition
+
+def formula_to_composition(formula):
+    '''
+    Parses a chemical formula into a dict of atomic number to count, with
+    the charge stored under key `0` (as expected by
+    :func:`chempi.util.periodic.mass_from_composition`).
+    
+    Nested brackets, hydrates/adducts separated by '..' or '.', leading
+    stoichiometric integers, trailing charges such as '+2' or '-', radical
+    dots, greek prefixes ('alpha-') and phase suffixes ('(aq)') are
+    supported.
+    
+    Results are kept in a least-recently-used cache of `FORMULA_CACHE_SIZE`
+    formulas, see ``formula_to_composition.cache_info()`` for hit and miss
+    counts and ``formula_to_composition.cache_clear()`` to reset it.
+    
+    Examples:
+    ==================
+    >>> formula_to_composition('Fe(CN)6-3') == {26: 1, 6: 6, 7: 6, 0: -3}
+    True
+    >>> formula_to_composition('CuSO4..5H2O') == {29: 1, 16: 1, 8: 9, 1: 10}
+    True
+    '''
+    return dict(_formula_to_composition(formula))
+
+formula_to_composition.cache_info  = _formula_to_composition.cache_info
+formula_to_composition.cache_clear = _formula_to_composition.cache_clear
+
+ParseFailure = namedtuple('ParseFailure', 'index formula message')
+
+def _parse_chunk(start, formulas):
+    results = []
+    for index, formula in enumerate(formulas, start):
+        try:
+            results.append(formula_to_composition(formula.strip()))
+        
+        except Exception as exc:
+            results.append(ParseFailure(index, formula, str(exc)))
+    
+    return results
+
+def _chunked(iterable, chunksize):
+    iterator = iter(iterable)
+    start    = 0
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        
+        yield start, chunk
+        start += len(chunk)
+
+def parse_many(formulas, workers = None, chunksize = 1024):
+    '''
+    Lazily parses an iterable of formulas with :func:`formula_to_composition`
+    in a pool of worker processes, yielding the compositions in input order.
+    
+    Parameters
+    ==================
+    formulas: iterable of str
+        Consumed incrementally, surrounding whitespace is ignored, so e.g. an
+        open file with one formula per line can be passed directly.
+    workers: int, optional
+        Number of worker processes, defaults to ``os.cpu_count()``. With
+        `workers` <= 1 everything is parsed in the current process.
+    chunksize: int
+        Number of formulas sent to a worker at a time. At most two chunks
+        per worker are in flight, which keeps memory use flat.
+    
+    Yields
+    ==================
+    A composition dict per formula, or a :class:`ParseFailure` (index,
+    formula and error message) in place of a formula that failed to parse.
+    '''
+    chunks = _chunked(formulas, chunksize)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    if workers <= 1:
+        for start, chunk in chunks:
+            yield from _parse_chunk(start, chunk)
+        
+        return
+    
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        try:
+            for start, chunk in chunks:
+                pending.append(executor.submit(_parse_chunk, start, chunk))
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+            
+            while pending:
+                yield from pending.popleft().result()
+        
+        finally:
+            for future in pending:
+                future.cancel()
+
+FormulaMarkup = namedtuple('FormulaMarkup', 'unicode latex html')
+
+_FORMULA_SEPARATORS = re.compile(r'(\.{1,2})')
+
+def _tokenize_formula(formula):
+    '''
+    Splits a formula into ``(kind, text)`` tokens for rendering, where kind
+    is one of 'prefix', 'radical', 'coeff', 'text', 'sub', 'infix',
+    'charge' or 'suffix'.
+    '''
+    head, tail = [], []
+    for prefix in _GREEK_PREFIXES:
+        if formula.startswith(prefix):
+            head.append(('prefix', prefix))
+            formula = formula[len(prefix):]
+            break
+    
+    for suffix in _PHASE_SUFFIXES:
+        if formula.endswith(suffix):
+            tail.append(('suffix', suffix))
+            formula = formula[:-len(suffix)]
+            break
+    
+    match_ = _FORMULA_CHARGE.search(formula)
+    if match_ is not None:
+        sign, digits = match_.groups()
+        tail.insert(0, ('charge', digits + sign))
+        formula = formula[:match_.start()]
+    
+    if formula.startswith('.') and not formula.startswith('..'):
+        head.append(('radical', '.'))
+        formula = formula[1:]
+    
+    if formula.endswith('.') and not formula.endswith('..'):
+        tail.insert(0, ('radical', '.'))
+        formula = formula[:-1]
+    
+    tokens = head
+    for i, part in enumerate(_FORMULA_SEPARATORS.split(formula)):
+        if i % 2:
+            tokens.append(('infix', '..'))
+            continue
+        
+        match_ = re.match(r'\d+', part)
+        if match_ is not None:
+            tokens.append(('coeff', match_.group()))
+            part = part[match_.end():]
+        
+        for symbol, opening, closing, digits, other in _FORMULA_TOKENS.findall(part):
+            if digits:
+                tokens.append(('sub', digits))
+            
+            else:
+                tokens.append(('text', symbol or opening or closing or other))
+    
+    return tokens + tail
+
+def _unicode_token(kind, text):
+    if kind == 'sub':
+        return ''.join(_UNICODE_SUBSCRIPTS[c] for c in text)
+    
+    if kind == 'charge':
+        return ''.join(_UNICODE_SUPERSCRIPTS[c] for c in text)
+    
+    if kind in ('prefix', 'radical'):
+        return _UNICODE_MAPPING[text]
+    
+    if kind == 'infix':
+        return _UNICODE_INFIX_MAPPING[text]
+    
+    return text
+
+def _latex_token(kind, text):
+    if kind == 'sub':
+        return '_{' + text + '}'
+    
+    if kind == 'charge':
+        return '^{' + text + '}'
+    
+    if kind in ('prefix', 'radical'):
+        return _LATEX_MAPPING[text]
+    
+    if kind == 'infix':
+        return _LATEX_INFIX_MAPPING[text]
+    
+    return text
+
+def _html_token(kind, text):
+    if kind == 'sub':
+        return '<sub>' + text + '</sub>'
+    
+    if kind == 'charge':
+        return '<sup>' + text + '</sup>'
+    
+    if kind in ('prefix', 'radical'):
+        return _HTML_MAPPING[text]
+    
+    if kind == 'infix':
+        return _HTML_INFIX_MAPPING[text]
+    
+    return text
+
+_MARKUP_EMITTERS = FormulaMarkup(_unicode_token, _latex_token, _html_token)
+
+@lru_cache(maxsize = FORMULA_CACHE_SIZE)
+def formula_to_markup(formula):
+    '''
+    Renders a formula as Unicode, LaTeX and HTML from a single token stream.
+    
+    Results are kept in a least-recently-used cache of `FORMULA_CACHE_SIZE`
+    formulas (see ``formula_to_markup.cache_info()``), so repeated formulas
+    cost a single lookup.
+    
+    Examples:
+    ==================
+    >>> formula_to_markup('CuSO4..5H2O').unicode
+    'CuSO₄·5H₂O'
+    >>> formula_to_markup('Fe(CN)6-3').latex
+    'Fe(CN)_{6}^{3-}'
+    >>> formula_to_markup('NH4+(aq)').html
+    'NH<sub>4</sub><sup>+</sup>(aq)'
+    '''
+    outputs = FormulaMarkup([], [], [])
+    for kind, text in _tokenize_formula(formula):
+        for output, emit in zip(outputs, _MARKUP_EMITTERS):
+            output.append(emit(kind, text))
+    
+    return FormulaMarkup(*map(''.join, outputs))
+
+def formula_to_unicode(formula):
+    '''
+    Unicode rendering of a formula, see :func:`formula_to_markup`.
+    
+    Examples:
+    ==================
+    >>> formula_to_unicode('SO4-2')
+    'SO₄²⁻'
+    '''
+    return formula_to_markup(formula).unicode
+
+def formula_to_latex(formula):
+    '''
+    LaTeX rendering of a formula, see :func:`formula_to_markup`.
+    
+    Examples:
+    ==================
+    >>> print(formula_to_latex('alpha-Fe2O3'))
+    \\alpha-Fe_{2}O_{3}
+    '''
+    return formula_to_markup(formula).latex
+
+def formula_to_html(formula):
+    '''
+    HTML rendering of a formula, see :func:`formula_to_markup`.
+    
+    Examples:
+    ==================
+    >>> formula_to_html('.NO2')
+    '&sdot;NO<sub>2</sub>'
+    '''
+    return formula_to_markup(formula).html
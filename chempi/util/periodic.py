@@ -1,154 +1,403 @@
+from array       import array
+from collections import namedtuple
+from sys         import intern
+
+from .._util import get_backend, get_backend_fallback, is_array_backend
+
 # The data in '_relative_atomic_masses' is licensed under the CC-SA license
 # https://en.wikipedia.org/wiki/Standard_atomic_weight#List_of_atomic_weights
 _elements = [
-    # [Symbol: str, Name: str, Relative Atomic Mass: float | str, Uncertainty: float]
-    ['H', 'Hydrogen', 1.008,  1e-4],
-    ['He', 'Helium',  4.002602, 2e-06],
-    ['Li', 'Lithium', 6.94, 0.06],
-    ['Be', 'Beryllium', 9.01221831, 5e-07],
-    ['B', 'Boron', 10.81, 0.02],
-    ['C', 'Carbon', 12.011, 0.002],
-    ['N', 'Nitrogen', 14.007, 0.001],
-    ['O', 'Oxygen', 15.999, 0.001],
-    ['F', 'Fluorine', 18.998403162, 5e-9],
-    ['Ne', 'Neon', 20.1797, 6e-4],
-    ['Na', 'Sodium', 22.98976928, 2e-8],
-    ['Mg', 'Magnesium', 24.305, 0.002],
-    ['Al', 'Aluminium', 26.9815384, 3e-7],
-    ['Si', 'Silicon', 28.085, 0.001],
-    ['P', 'Phosphorus', 30.973761998, 5e-9],
-    ['S', 'Sulfur', 32.06, 0.02],
-    ['Cl', 'Chlorine', 35.45, 0.01],
-    ['Ar', 'Argon', 39.95, 0.16],
-    ['K', 'Potassium', 39.0983, 1e-4],
-    ['Ca', 'Calcium', 40.078, 0.004],
-    ['Sc', 'Scandium', 44.955907, 4e-6],
-    ['Ti', 'Titanium', 47.867, 0.001],
-    ['V', 'Vanadium', 50.9415, 1e-4],
-    ['Cr', 'Chromium', 51.9961, 6e-4],
-    ['Mn', 'Manganese', 54.938, 0.001],
-    ['Fe', 'Iron', 55.845, 0.002],
-    ['Co', 'Cobalt', 58.933194, 3e-6],
-    ['Ni', 'Nickel', 58.693, 0.001],
-    ['Cu', 'Copper', 63.546, 0.003],
-    ['Zn', 'Zinc', 65.38, 0.02],
-    ['Ga', 'Gallium', 69.723, 0.001],
-    ['Ge', 'Germanium', 72.63, 0.008],
-    ['As', 'Arsenic', 74.921595, 6e-6],
-    ['Se', 'Selenium', 78.971, 0.008],
-    ['Br', 'Bromine', 79.904, 0.003],
-    ['Kr', 'Krypton', 83.798, 0.002],
-    ['Rb', 'Rubidium', 85.4678, 3e-4],
-    ['Sr', 'Strontium', 87.62, 0.01],
-    ['Y', 'Yttrium', 88.905838, 2e-6],
-    ['Zr', 'Zirconium', 91.222, 0.003],
-    ['Nb', 'Niobium', 92.90637, 1e-5],
-    ['Mo', 'Molybdenum', 95.95, 0.01],
-    ['Tc', 'Technetium', '[98]', 0.0],
-    ['Ru', 'Ruthenium', 101.07, 0.02],
-    ['Rh', 'Rhodium', 102.90549, 2e-5],
-    ['Pd', 'Palladium', 106.42, 0.01],
-    ['Ag', 'Silver', 107.8682, 2e-4],
-    ['Cd', 'Cadmium', 112.414, 0.004],
-    ['In', 'Indium', 114.818, 0.001],
-    ['Sn', 'Tin', 118.71, 0.01],
-    ['Sb', 'Antimony', 121.76, 0.01],
-    ['Te', 'Tellurium', 127.60, 0.03],
-    ['I', 'Iodine', 126.90447, 3e-5],
-    ['Xe', 'Xenon', 131.293, 0.006],
-    ['Cs', 'Caesium', 132.90545196, 6e-8],
-    ['Ba', 'Barium', 137.327, 0.007],
-    ['La', 'Lanthanum', 138.90547, 7e-5],
-    ['Ce', 'Cerium', 140.12, 0.01],
-    ['Pr', 'Praseodymium', 140.97066, 1e-5],
-    ['Nd', 'Neodymium', 144.24, 0.01],
-    ['Pm', 'Promethium', '[145]', 0.0],
-    ['Sm', 'Samarium', 150.36, 0.02],
-    ['Eu', 'Europium', 151.96, 0.01],
-    ['Gd', 'Gadolinium', 157.249, 0.002],
-    ['Tb', 'Terbium', 158.925354, 7e-6],
-    ['Dy', 'Dysprosium', 162.50, 0.01],
-    ['Ho', 'Holmium', 164.930329, 5e-6],
-    ['Er', 'Erbium', 167.259, 0.003],
-    ['Tm', 'Thulium', 168.934219, 5e-6],
-    ['Yb', 'Ytterbium', 173.05, 0.02],
-    ['Lu', 'Lutetium', 174.97, 0.01],
-    ['Hf', 'Hafnium', 178.49, 0.01],
-    ['Ta', 'Tantalum', 180.95, 0.01],
-    ['W', 'Tungsten', 183.84, 0.01],
-    ['Re', 'Rhenium', 186.21, 0.01],
-    ['Os', 'Osmium', 190.23, 0.03],
-    ['Ir', 'Iridium', 192.22 0.01],
-    ['Pt', 'Platinum', 195.08, 0.02],
-    ['Au', 'Gold', 196.97, 0.01],
-    ['Hg', 'Mercury', 200.59, 0.01],
-    ['Tl', 'Thallium', 204.38, 0.01],
-    ['Pb', 'Lead', 207.20, 1.1],
-    ['Bi', 'Bismuth', 208.98, 0.01],
-    ['Po', 'Polonium', '[209]', 0.0],
-    ['At', 'Astatine', '[210]', 0.0],
-    ['Rn', 'Radon', '[222]', 0.0],
-    ['Fr', 'Francium', '[223]', 0.0],
-    ['Ra', 'Radium', '[226]', 0.0],
-    ['Ac', 'Actinium', '[227]', 0.0],
-    ['Th', 'Thorium', 232.04, 0.01],
-    ['Pa', 'Protactinium', 231.04, 0.01],
-    ['U', 'Uranium', 238.03, 0.01],
-    ['Np', 'Neptunium', '[237]', 0.0],
-    ['Pu', 'Plutonium', '[244]', 0.0],
-    ['Am', 'Americium', '[243]', 0.0],
-    ['Cm', 'Curium', '[247]', 0.0],
-    ['Bk', 'Berkelium', '[247]', 0.0],
-    ['Cf', 'Californium', '[251]', 0.0],
-    ['Es', 'Einsteinium', '[252]', 0.0],
-    ['Fm', 'Fermium', '[257]', 0.0],
-    ['Md', 'Mendelevium', '[258]', 0.0],
-    ['No', 'Nobelium', '[259]', 0.0],
-    ['Lr', 'Lawrencium', '[266]', 0.0],
-    ['Rf', 'Rutherfordium', '[267]', 0.0],
-    ['Db', 'Dubnium', '[268]', 0.0],
-    ['Sg', 'Seaborgium', '[269]', 0.0],
-    ['Bh', 'Bohrium', '[270]', 0.0],
-    ['Hs', 'Hassium', '[271]', 0.0],
-    ['Mt', 'Meitnerium', '[278]', 0.0],
-    ['Ds', 'Darmstadtium', '[281]', 0.0],
-    ['Rg', 'Roentgenium', '[282]', 0.0],
-    ['Cn', 'Copernicium', '[285]', 0.0],
-    ['Nh', 'Nihonium', '[286]', 0.0],
-    ['Fl', 'Flerovium', '[289]', 0.0],
-    ['Mc', 'Moscovium', '[290]', 0.0],
-    ['Lv', 'Livermorium', '[293]', 0.0],
-    ['Ts', 'Tennessine', '[294]', 0.0],
-    ['Og', 'Oganesson', '[294]', 0.0]
+    # [Symbol: str, Name: str, Relative Atomic Mass: float, Uncertainty: float, Mass Number Only: bool]
+    # Elements without a standard atomic weight have the mass number of their
+    # most stable isotope instead (conventionally printed in brackets, e.g.
+    # '[98]'), flagged by the last column.
+    ['H', 'Hydrogen', 1.008,  1e-4, False],
+    ['He', 'Helium',  4.002602, 2e-06, False],
+    ['Li', 'Lithium', 6.94, 0.06, False],
+    ['Be', 'Beryllium', 9.01221831, 5e-07, False],
+    ['B', 'Boron', 10.81, 0.02, False],
+    ['C', 'Carbon', 12.011, 0.002, False],
+    ['N', 'Nitrogen', 14.007, 0.001, False],
+    ['O', 'Oxygen', 15.999, 0.001, False],
+    ['F', 'Fluorine', 18.998403162, 5e-9, False],
+    ['Ne', 'Neon', 20.1797, 6e-4, False],
+    ['Na', 'Sodium', 22.98976928, 2e-8, False],
+    ['Mg', 'Magnesium', 24.305, 0.002, False],
+    ['Al', 'Aluminium', 26.9815384, 3e-7, False],
+    ['Si', 'Silicon', 28.085, 0.001, False],
+    ['P', 'Phosphorus', 30.973761998, 5e-9, False],
+    ['S', 'Sulfur', 32.06, 0.02, False],
+    ['Cl', 'Chlorine', 35.45, 0.01, False],
+    ['Ar', 'Argon', 39.95, 0.16, False],
+    ['K', 'Potassium', 39.0983, 1e-4, False],
+    ['Ca', 'Calcium', 40.078, 0.004, False],
+    ['Sc', 'Scandium', 44.955907, 4e-6, False],
+    ['Ti', 'Titanium', 47.867, 0.001, False],
+    ['V', 'Vanadium', 50.9415, 1e-4, False],
+    ['Cr', 'Chromium', 51.9961, 6e-4, False],
+    ['Mn', 'Manganese', 54.938, 0.001, False],
+    ['Fe', 'Iron', 55.845, 0.002, False],
+    ['Co', 'Cobalt', 58.933194, 3e-6, False],
+    ['Ni', 'Nickel', 58.693, 0.001, False],
+    ['Cu', 'Copper', 63.546, 0.003, False],
+    ['Zn', 'Zinc', 65.38, 0.02, False],
+    ['Ga', 'Gallium', 69.723, 0.001, False],
+    ['Ge', 'Germanium', 72.63, 0.008, False],
+    ['As', 'Arsenic', 74.921595, 6e-6, False],
+    ['Se', 'Selenium', 78.971, 0.008, False],
+    ['Br', 'Bromine', 79.904, 0.003, False],
+    ['Kr', 'Krypton', 83.798, 0.002, False],
+    ['Rb', 'Rubidium', 85.4678, 3e-4, False],
+    ['Sr', 'Strontium', 87.62, 0.01, False],
+    ['Y', 'Yttrium', 88.905838, 2e-6, False],
+    ['Zr', 'Zirconium', 91.222, 0.003, False],
+    ['Nb', 'Niobium', 92.90637, 1e-5, False],
+    ['Mo', 'Molybdenum', 95.95, 0.01, False],
+    ['Tc', 'Technetium', 98.0, 0.0, True],
+    ['Ru', 'Ruthenium', 101.07, 0.02, False],
+    ['Rh', 'Rhodium', 102.90549, 2e-5, False],
+    ['Pd', 'Palladium', 106.42, 0.01, False],
+    ['Ag', 'Silver', 107.8682, 2e-4, False],
+    ['Cd', 'Cadmium', 112.414, 0.004, False],
+    ['In', 'Indium', 114.818, 0.001, False],
+    ['Sn', 'Tin', 118.71, 0.01, False],
+    ['Sb', 'Antimony', 121.76, 0.01, False],
+    ['Te', 'Tellurium', 127.60, 0.03, False],
+    ['I', 'Iodine', 126.90447, 3e-5, False],
+    ['Xe', 'Xenon', 131.293, 0.006, False],
+    ['Cs', 'Caesium', 132.90545196, 6e-8, False],
+    ['Ba', 'Barium', 137.327, 0.007, False],
+    ['La', 'Lanthanum', 138.90547, 7e-5, False],
+    ['Ce', 'Cerium', 140.12, 0.01, False],
+    ['Pr', 'Praseodymium', 140.97066, 1e-5, False],
+    ['Nd', 'Neodymium', 144.24, 0.01, False],
+    ['Pm', 'Promethium', 145.0, 0.0, True],
+    ['Sm', 'Samarium', 150.36, 0.02, False],
+    ['Eu', 'Europium', 151.96, 0.01, False],
+    ['Gd', 'Gadolinium', 157.249, 0.002, False],
+    ['Tb', 'Terbium', 158.925354, 7e-6, False],
+    ['Dy', 'Dysprosium', 162.50, 0.01, False],
+    ['Ho', 'Holmium', 164.930329, 5e-6, False],
+    ['Er', 'Erbium', 167.259, 0.003, False],
+    ['Tm', 'Thulium', 168.934219, 5e-6, False],
+    ['Yb', 'Ytterbium', 173.05, 0.02, False],
+    ['Lu', 'Lutetium', 174.97, 0.01, False],
+    ['Hf', 'Hafnium', 178.49, 0.01, False],
+    ['Ta', 'Tantalum', 180.95, 0.01, False],
+    ['W', 'Tungsten', 183.84, 0.01, False],
+    ['Re', 'Rhenium', 186.21, 0.01, False],
+    ['Os', 'Osmium', 190.23, 0.03, False],
+    ['Ir', 'Iridium', 192.22, 0.01, False],
+    ['Pt', 'Platinum', 195.08, 0.02, False],
+    ['Au', 'Gold', 196.97, 0.01, False],
+    ['Hg', 'Mercury', 200.59, 0.01, False],
+    ['Tl', 'Thallium', 204.38, 0.01, False],
+    ['Pb', 'Lead', 207.20, 1.1, False],
+    ['Bi', 'Bismuth', 208.98, 0.01, False],
+    ['Po', 'Polonium', 209.0, 0.0, True],
+    ['At', 'Astatine', 210.0, 0.0, True],
+    ['Rn', 'Radon', 222.0, 0.0, True],
+    ['Fr', 'Francium', 223.0, 0.0, True],
+    ['Ra', 'Radium', 226.0, 0.0, True],
+    ['Ac', 'Actinium', 227.0, 0.0, True],
+    ['Th', 'Thorium', 232.04, 0.01, False],
+    ['Pa', 'Protactinium', 231.04, 0.01, False],
+    ['U', 'Uranium', 238.03, 0.01, False],
+    ['Np', 'Neptunium', 237.0, 0.0, True],
+    ['Pu', 'Plutonium', 244.0, 0.0, True],
+    ['Am', 'Americium', 243.0, 0.0, True],
+    ['Cm', 'Curium', 247.0, 0.0, True],
+    ['Bk', 'Berkelium', 247.0, 0.0, True],
+    ['Cf', 'Californium', 251.0, 0.0, True],
+    ['Es', 'Einsteinium', 252.0, 0.0, True],
+    ['Fm', 'Fermium', 257.0, 0.0, True],
+    ['Md', 'Mendelevium', 258.0, 0.0, True],
+    ['No', 'Nobelium', 259.0, 0.0, True],
+    ['Lr', 'Lawrencium', 266.0, 0.0, True],
+    ['Rf', 'Rutherfordium', 267.0, 0.0, True],
+    ['Db', 'Dubnium', 268.0, 0.0, True],
+    ['Sg', 'Seaborgium', 269.0, 0.0, True],
+    ['Bh', 'Bohrium', 270.0, 0.0, True],
+    ['Hs', 'Hassium', 271.0, 0.0, True],
+    ['Mt', 'Meitnerium', 278.0, 0.0, True],
+    ['Ds', 'Darmstadtium', 281.0, 0.0, True],
+    ['Rg', 'Roentgenium', 282.0, 0.0, True],
+    ['Cn', 'Copernicium', 285.0, 0.0, True],
+    ['Nh', 'Nihonium', 286.0, 0.0, True],
+    ['Fl', 'Flerovium', 289.0, 0.0, True],
+    ['Mc', 'Moscovium', 290.0, 0.0, True],
+    ['Lv', 'Livermorium', 293.0, 0.0, True],
+    ['Ts', 'Tennessine', 294.0, 0.0, True],
+    ['Og', 'Oganesson', 294.0, 0.0, True]
 ]
 
-_SYMBOLS     = tuple(n[0] for n in _elements)
-_NAMES       = tuple(n[1] for n in _elements)
-_LOWER_NAMES = tuple(n[1].lower() for n in _elements)
-
 _PERIOD_LENGTHS = (2, 8, 8, 18, 18, 32, 32)
 _ACCUM_PERIOD_LENGTHS = (2, 10, 18, 36, 54, 86, 118)
 
-GROUPS     = {g: tuple(x - 18 + g for x in _ACCUM_PERIOD_LENGTHS[1:]) for g in range(13, 18)}
-GROUPS[1]  = (1,) + tuple(x + 1 for x in _ACCUM_PERIOD_LENGTHS[:-1]) # Alkali metals
-GROUPS[2]  = tuple(x + 2 for x in _ACCUM_PERIOD_LENGTHS[:-1]) # Alkaline earth metals
-GROUPS[18] = _ACCUM_PERIOD_LENGTHS # Noble gasses
+def _period_group_block(atomic_number):
+    '''
+    Period, group and block of an element, following the IUPAC layout with
+    lutetium and lawrencium in group 3. Group `0` is used for the f-block.
+    '''
+    for period, accum in enumerate(_ACCUM_PERIOD_LENGTHS, 1):
+        if atomic_number <= accum:
+            break
+    
+    length = _PERIOD_LENGTHS[period - 1]
+    k      = atomic_number - accum + length # 1-based position within the period
+    
+    if k <= 2:
+        return period, (18 if length == 2 and k == 2 else k), 's'
+    
+    if length == 32:
+        if k <= 16:
+            return period, 0, 'f'
+        
+        k -= 14
+    
+    elif length == 8:
+        k += 10
+    
+    return period, k, ('d' if k <= 12 else 'p')
+
+Element = namedtuple(
+    'Element',
+    'atomic_number symbol name mass uncertainty mass_number_only period group block'
+)
+
+class ElementTable(object):
+    '''
+    Structure-of-arrays view of the periodic table.
+    
+    Numeric columns are stored in contiguous :class:`array.array` buffers
+    (position `i` holding atomic number `i + 1`) and string columns as tuples
+    of interned strings.
+    
+    Examples:
+    ==================
+    >>> ELEMENTS.row(43)
+    Element(atomic_number=43, symbol='Tc', name='Technetium', mass=98.0, uncertainty=0.0, mass_number_only=True, period=5, group=7, block='d')
+    >>> ELEMENTS.column('mass')[7]
+    15.999
+    '''
+    _numeric_columns = {
+        'mass'            : 'masses',
+        'uncertainty'     : 'uncertainties',
+        'mass_number_only': 'mass_number_only',
+        'period'          : 'periods',
+        'group'           : 'groups'
+    }
+    _string_columns = {
+        'symbol'    : 'symbols',
+        'name'      : 'names',
+        'lower_name': 'lower_names',
+        'block'     : 'blocks'
+    }
+    
+    __slots__ = (
+        'symbols', 'names', 'lower_names', 'masses', 'uncertainties', 'mass_number_only',
+        'periods', 'groups', 'blocks', '_index'
+    )
+    
+    def __init__(self, rows):
+        self.symbols          = tuple(intern(row[0]) for row in rows)
+        self.names            = tuple(intern(row[1]) for row in rows)
+        self.lower_names      = tuple(intern(row[1].lower()) for row in rows)
+        self.masses           = array('d', (row[2] for row in rows))
+        self.uncertainties    = array('d', (row[3] for row in rows))
+        self.mass_number_only = array('B', (bool(row[4]) for row in rows))
+        
+        layout = [_period_group_block(z) for z in range(1, len(rows) + 1)]
+        self.periods = array('B', (period for period, _, _ in layout))
+        self.groups  = array('B', (group for _, group, _ in layout))
+        self.blocks  = ''.join(block for _, _, block in layout)
+        
+        # Inverted indices, e.g. self._index['group'][2] == (4, 12, 20, 38, 56, 88)
+        self._index = {'period': {}, 'group': {}, 'block': {}}
+        for z, values in enumerate(layout, 1):
+            for index, value in zip(self._index.values(), values):
+                index.setdefault(value, []).append(z)
+        
+        for index in self._index.values():
+            for value in index:
+                index[value] = tuple(index[value])
+    
+    def __len__(self):
+        return len(self.symbols)
+    
+    def __iter__(self):
+        return (self.row(z) for z in range(1, len(self) + 1))
+    
+    def row(self, atomic_number):
+        '''
+        The :class:`Element` record for a given atomic number.
+        '''
+        if not 0 < atomic_number <= len(self):
+            raise IndexError(f'No element with atomic number {atomic_number}')
+        
+        i = atomic_number - 1
+        return Element(
+            atomic_number,
+            self.symbols[i],
+            self.names[i],
+            self.masses[i],
+            self.uncertainties[i],
+            bool(self.mass_number_only[i]),
+            self.periods[i],
+            self.groups[i],
+            self.blocks[i]
+        )
+    
+    def select(self, groups = None, periods = None, blocks = None):
+        '''
+        Atomic numbers (in increasing order) of the elements matching all the
+        given criteria, each of which can be a single value or an iterable.
+        
+        Only the elements of the smallest matching index bucket are visited,
+        so the cost is proportional to the size of the result.
+        
+        Examples:
+        ==================
+        >>> ELEMENTS.select(groups = (2, 13), periods = range(1, 5))
+        (4, 5, 12, 13, 20, 31)
+        >>> ELEMENTS.select(blocks = 'd', periods = 4)[:3]
+        (21, 22, 23)
+        '''
+        criteria = []
+        for key, values in (('group', groups), ('period', periods), ('block', blocks)):
+            if values is None:
+                continue
+            
+            if isinstance(values, (int, str)):
+                values = (values,)
+            
+            buckets = [self._index[key].get(value, ()) for value in values]
+            criteria.append((sum(map(len, buckets)), buckets, set().union(*buckets)))
+        
+        if not criteria:
+            return tuple(range(1, len(self) + 1))
+        
+        criteria.sort(key = lambda criterion: criterion[0])
+        (_, buckets, _), others = criteria[0], [members for _, _, members in criteria[1:]]
+        
+        candidates = buckets[0] if len(buckets) == 1 else sorted(set().union(*buckets))
+        return tuple(z for z in candidates if all(z in members for members in others))
+    
+    def column(self, name, backend = None):
+        '''
+        Read-only view of a column, without copying the underlying buffer.
+        
+        Parameters
+        ==================
+        name: str
+            One of 'mass', 'uncertainty', 'mass_number_only', 'period', 'group',
+            'symbol', 'name', 'lower_name' or 'block'.
+        backend: module or str, optional
+            When given (e.g. ``'numpy'``), numeric columns are returned as
+            arrays of that backend sharing memory with the table, so that
+            they can be indexed by arrays of atomic numbers minus one.
+            Otherwise a :class:`memoryview` is returned.
+        '''
+        if name in self._string_columns:
+            return getattr(self, self._string_columns[name])
+        
+        try:
+            data = getattr(self, self._numeric_columns[name])
+        
+        except KeyError:
+            raise KeyError(f'Unknown column: {name!r}') from None
+        
+        view = memoryview(data).toreadonly()
+        if backend is None:
+            return view
+        
+        view = get_backend(backend).frombuffer(view, dtype = data.typecode)
+        return view.view(bool) if name == 'mass_number_only' else view
+
+ELEMENTS = ElementTable(_elements)
+
+_SYMBOLS     = ELEMENTS.symbols
+_NAMES       = ELEMENTS.names
+_LOWER_NAMES = ELEMENTS.lower_names
+
+GROUPS = {g: ELEMENTS.select(groups = g) for g in range(1, 19)}
+
+# Groups 3-12, with lutetium and lawrencium (but not lanthanum and actinium) in group 3.
+TRANSITION_METALS = ELEMENTS.select(groups = range(3, 13))
+
+class UnknownElementError(KeyError, ValueError):
+    '''
+    Raised when a symbol or name cannot be matched to any element.
+    '''
+    def __str__(self):
+        return f'Unknown element: {self.args[0]!r}'
+
+# Common spellings which differ from the names used in `_elements`.
+_ALTERNATE_NAMES = {
+    'aluminum': 13,
+    'sulphur' : 16,
+    'cesium'  : 55,
+    'wolfram' : 74
+}
+
+# Lower-case symbols, names and alternate spellings mapped to atomic numbers.
+_ATOMIC_NUMBERS = {}
+for _number, (_symbol, _name) in enumerate(zip(_SYMBOLS, _LOWER_NAMES), 1):
+    _ATOMIC_NUMBERS[_symbol.lower()] = _number
+    _ATOMIC_NUMBERS[_name] = _number
+
+_ATOMIC_NUMBERS.update(_ALTERNATE_NAMES)
+del _number, _symbol, _name
 
 def atomic_number(name):
     '''
-    Provides the atomic number for a given element
+    Provides the atomic number for a given element symbol or name
+    (case insensitive).
+    
+    Examples:
+    ==================
+    >>> atomic_number('Fe'), atomic_number('sulphur')
+    (26, 16)
     '''
     try:
-        return _SYMBOLS.index(name.capitalize()) + 1
+        return _ATOMIC_NUMBERS[name.lower()]
     
-    except:
-        return _LOWER_NAMES.index(name.lower()) + 1
+    except KeyError:
+        raise UnknownElementError(name) from None
 
-def _get_relative_atomic_masses():
-    for mass in tuple(element[2] for element in _elements):
-        yield float(mass[1:-1]) if str(mass)[0] == '[' else float(mass)
+def atomic_numbers(names):
+    '''
+    Provides the atomic numbers for an iterable of element symbols or names.
+    
+    Examples:
+    ==================
+    >>> atomic_numbers(['H', 'helium', 'Aluminum'])
+    [1, 2, 13]
+    '''
+    index  = _ATOMIC_NUMBERS
+    result = []
+    for name in names:
+        try:
+            result.append(index[name.lower()])
+        
+        except KeyError:
+            raise UnknownElementError(name) from None
+    
+    return result
+
+RELATIVE_ATOMIC_MASSES = tuple(ELEMENTS.masses)
+
+_ELECTRON_MASS = 5.489e-4
 
-RELATIVE_ATOMIC_MASSES = tuple(_get_relative_atomic_masses())
+def _check_key(k):
+    '''
+    `k`, unless it is negative (which would silently index from the end of
+    the mass tables).
+    '''
+    if k < 0:
+        raise UnknownElementError(k)
+    
+    return k
 
 def mass_from_composition(composition):
     '''
@@ -167,9 +416,142 @@ def mass_from_composition(composition):
     mass = 0.0
     for k, v in composition.items():
         if k == 0:
-            mass -= v * 5.489e-4
+            mass -= v * _ELECTRON_MASS
         
         else:
-            mass += v * RELATIVE_ATOMIC_MASSES[k - 1]
+            mass += v * RELATIVE_ATOMIC_MASSES[_check_key(k) - 1]
     
     return mass
+
+RELATIVE_ATOMIC_MASS_UNCERTAINTIES = tuple(ELEMENTS.uncertainties)
+
+# Indexed by atomic number, with index `0` carrying the charge term.
+_MASS_VECTOR     = (-_ELECTRON_MASS,) + RELATIVE_ATOMIC_MASSES
+_VARIANCE_VECTOR = (0.0,) + tuple(u * u for u in RELATIVE_ATOMIC_MASS_UNCERTAINTIES)
+
+def _counts_from_compositions(compositions):
+    keys, counts, lengths = [], [], []
+    for composition in compositions:
+        keys.extend(composition.keys())
+        counts.extend(composition.values())
+        lengths.append(len(composition))
+    
+    return keys, counts, lengths
+
+def _composition_dots(compositions, vectors, backend):
+    '''
+    Dot products of every row of counts (raised to the paired power) with
+    each of the ``(vector, power)`` pairs in `vectors`, consuming
+    `compositions` only once.
+    '''
+    if not is_array_backend(backend):
+        results = tuple([] for _ in vectors)
+        for row in compositions:
+            items = tuple(row.items() if hasattr(row, 'items') else enumerate(row))
+            for result, (vector, power) in zip(results, vectors):
+                result.append(sum((v ** power * vector[_check_key(k)] for k, v in items), 0.0))
+        
+        return results
+    
+    if hasattr(compositions, 'shape'):
+        # Dense arrays and sparse matrices alike expose ``dot``.
+        results = []
+        for vector, power in vectors:
+            if power == 1:
+                counts = compositions
+            
+            elif hasattr(compositions, 'power'): # sparse, where `**` is the matrix power
+                counts = compositions.power(power)
+            
+            else:
+                counts = compositions ** power
+            
+            vector = backend.asarray(vector[:compositions.shape[1]])
+            results.append(backend.asarray(counts.dot(vector)).ravel())
+        
+        return tuple(results)
+    
+    keys, counts, lengths = _counts_from_compositions(compositions)
+    rows   = backend.repeat(backend.arange(len(lengths)), backend.asarray(lengths, dtype = int))
+    keys   = backend.asarray(keys, dtype = int)
+    if len(keys) and keys.min() < 0:
+        raise UnknownElementError(int(keys.min()))
+    
+    counts = backend.asarray(counts, dtype = float)
+    return tuple(
+        backend.bincount(
+            rows,
+            weights   = counts ** power * backend.asarray(vector)[keys],
+            minlength = len(lengths)
+        ) for vector, power in vectors
+    )
+
+def mass_from_compositions(compositions, backend = None):
+    '''
+    Calculates the molecular masses of many compositions at once.
+    
+    Parameters
+    ==================
+    compositions: iterable of dicts, or a 2D count matrix
+        Either dict objects as accepted by :func:`mass_from_composition`, or
+        a (dense or sparse) matrix with one row per composition and one column
+        per atomic number (column `0` being the charge).
+    backend: module or str, optional
+        Defaults to NumPy, falling back to pure Python when NumPy is missing.
+        Pass ``'math'`` to force the pure Python implementation.
+    
+    Returns
+    ==================
+    An array of masses (a list for the pure Python implementation).
+    
+    Examples:
+    ==================
+    >>> [round(m, 2) for m in mass_from_compositions([{1: 2, 8: 1}, {0: -1, 1: 1, 8: 1}], 'math')]
+    [18.02, 17.01]
+    '''
+    backend = get_backend_fallback(backend)
+    return _composition_dots(compositions, ((_MASS_VECTOR, 1),), backend)[0]
+
+def mass_uncertainty_from_composition(composition):
+    '''
+    Like :func:`mass_from_composition`, but also propagates the standard
+    uncertainties of the relative atomic masses.
+    
+    Returns
+    ==================
+    A ``(mass, uncertainty)`` tuple, which can be passed on as is to
+    :func:`chempi.printing.numbers._float_str_with_uncertainty`.
+    
+    Examples:
+    ==================
+    >>> mass, uncertainty = mass_uncertainty_from_composition({1: 2, 8: 1})
+    >>> round(mass, 3), round(uncertainty, 5)
+    (18.015, 0.00102)
+    '''
+    mass, variance = 0.0, 0.0
+    for k, v in composition.items():
+        mass     += v * _MASS_VECTOR[_check_key(k)]
+        variance += v * v * _VARIANCE_VECTOR[k]
+    
+    return mass, variance ** 0.5
+
+def mass_uncertainty_from_compositions(compositions, backend = None):
+    '''
+    Batched :func:`mass_uncertainty_from_composition`, accepting the same
+    `compositions` and `backend` as :func:`mass_from_compositions`.
+    
+    Returns
+    ==================
+    A ``(masses, uncertainties)`` tuple of arrays (lists for the pure Python
+    implementation).
+    '''
+    backend = get_backend_fallback(backend)
+    masses, variances = _composition_dots(
+        compositions,
+        ((_MASS_VECTOR, 1), (_VARIANCE_VECTOR, 2)),
+        backend
+    )
+    if is_array_backend(backend):
+        return masses, backend.sqrt(variances)
+    
+    return masses, [variance ** 0.5 for variance in variances]
@@ -0,0 +1,11 @@
+from chempi.util._aqueous import name_
+
+def test_group_1_cations():
+    # Hydrogen stays among the group 1 cations.
+    assert name_('H+') == 'hydrogen'
+    assert name_('Na+') == 'sodium'
+    assert name_('Fr+') == 'francium'
+
+def test_group_2_cations():
+    assert name_('Be+2') == 'beryllium'
+    assert name_('Ca+2') == 'calcium'
@@ -0,0 +1,118 @@
+import operator
+import random
+
+import pytest
+
+from chempi.util import composition
+from chempi.util.arithmetic_dict import ArithDict
+from chempi.util.composition import Composition
+
+SIZE = 30
+
+# Both the plain loops and (when NumPy is installed) the vectorized path.
+@pytest.fixture(params = ['loops', 'vectorized'])
+def path(request, monkeypatch):
+    if request.param == 'vectorized':
+        if composition._numpy() is None:
+            pytest.skip('numpy missing')
+        
+        monkeypatch.setattr(composition, 'VECTORIZE_MIN_SIZE', 1)
+    
+    else:
+        monkeypatch.setattr(composition, 'VECTORIZE_MIN_SIZE', 1 << 30)
+    
+    return request.param
+
+def _random_dict(rng, size, floats = False):
+    keys = rng.sample(range(2 * size), size)
+    return {k: rng.uniform(-5, 5) if floats else rng.randint(-5, 5) for k in keys}
+
+OPS = [operator.add, operator.sub, operator.mul]
+
+@pytest.mark.parametrize('op', OPS)
+@pytest.mark.parametrize('floats', [False, True])
+def test_matches_arithdict(path, op, floats):
+    rng = random.Random(0)
+    for _ in range(5):
+        a, b = _random_dict(rng, SIZE, floats), _random_dict(rng, SIZE)
+        expected = op(ArithDict(int, a), ArithDict(int, b))
+        assert op(Composition(a), Composition(b)) == expected
+        assert op(Composition(a), b) == expected
+        assert op(Composition(a), 3) == op(ArithDict(int, a), 3)
+        assert op(3, Composition(a)) == op(3, ArithDict(int, a))
+
+@pytest.mark.parametrize('op, iop', [
+    (operator.add, operator.iadd), (operator.sub, operator.isub), (operator.mul, operator.imul),
+    (operator.truediv, operator.itruediv), (operator.floordiv, operator.ifloordiv)
+])
+def test_inplace(path, op, iop):
+    rng = random.Random(1)
+    a = _random_dict(rng, SIZE)
+    b = {k: rng.choice([-3, -2, -1, 1, 2, 3]) for k in a}
+    for other, reference in ((b, ArithDict(int, b)), (Composition(b), ArithDict(int, b)), (2, 2)):
+        c = Composition(a)
+        values = c._values
+        result = iop(c, other)
+        assert result is c
+        assert c == op(Composition(a), other)
+        assert c == op(ArithDict(int, a), reference)
+        if op is not operator.truediv:
+            # Same keys and no promotion: updated in the same buffer.
+            assert c._values is values
+
+def test_inplace_changes_keys_and_promotes(path):
+    c = Composition({1: 2, 8: 1})
+    c += {6: 1}
+    assert list(c.keys()) == [1, 6, 8]
+    c *= 0.5
+    assert c.values().format == 'd'
+    assert c == {1: 1.0, 6: 0.5, 8: 0.5}
+    c /= 2
+    assert c == {1: 0.5, 6: 0.25, 8: 0.25}
+
+def test_division_by_zero(path):
+    with pytest.raises(ZeroDivisionError):
+        Composition({1: 2}) / {1: 1, 2: 0}
+    
+    with pytest.raises(ZeroDivisionError):
+        Composition({1: 2}) // 0
+
+def test_equality_and_isclose(path):
+    a = Composition({1: 2, 8: 1})
+    assert a == {8: 1, 1: 2, 6: 0}
+    assert a != {1: 2}
+    assert a != Composition({1: 2, 8: 2})
+    assert (a == 5) is False
+    assert a.isclose({1: 2 + 1e-16, 8: 1})
+    assert not a.isclose({1: 2.1, 8: 1})
+    assert a.isclose({1: 2.1, 8: 1}, atol = 0.2)
+
+def test_mapping_interface():
+    c = Composition([(8, 1), (1, 1), (1, 1)])
+    assert list(c) == [1, 8] and len(c) == 2
+    assert c[1] == 2 and c[6] == 0 and c.get(6, None) is None
+    assert 8 in c and 6 not in c
+    c[6] = 1
+    c[8] = 0.5
+    assert dict(c.items()) == {1: 2.0, 6: 1.0, 8: 0.5}
+    assert Composition({1: 0, 2: 1}).prune() == Composition({2: 1})
+    assert len(Composition({1: 0, 2: 1}).prune()) == 1
+    assert Composition({1: 2}).to_arithdict() == ArithDict(int, {1: 2})
+    assert repr(Composition({1: 2})) == 'Composition({1: 2})'
+    assert Composition({1: 1, 2: 0}).all_non_negative()
+    assert not Composition({1: 1, 2: -1}).all_non_negative()
+
+def test_from_arrays():
+    c = Composition.from_arrays([1, 6, 8], [2, 1, 0.5])
+    assert c == {1: 2.0, 6: 1.0, 8: 0.5}
+    with pytest.raises(ValueError):
+        Composition.from_arrays([1, 6], [1])
+    
+    with pytest.raises(ValueError):
+        Composition.from_arrays([6, 1], [1, 1])
+
+def test_periodic_masses():
+    from chempi.util.periodic import mass_from_composition
+    
+    water = {1: 2, 8: 1}
+    assert mass_from_composition(Composition(water)) == mass_from_composition(water)
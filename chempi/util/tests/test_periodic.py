@@ -0,0 +1,39 @@
+import pytest
+
+from chempi.util.periodic import (
+    ELEMENTS, ElementTable, UnknownElementError, mass_from_composition, mass_from_compositions,
+    mass_uncertainty_from_composition, mass_uncertainty_from_compositions
+)
+
+def test_mass_number_only():
+    assert ELEMENTS.row(43).mass_number_only
+    assert ELEMENTS.row(118).mass_number_only
+    assert not ELEMENTS.row(26).mass_number_only
+    assert sum(ELEMENTS.mass_number_only) == 34
+
+def test_mass_number_only_is_explicit():
+    # Neither an integral float nor a non-int type decides the flag.
+    table = ElementTable([['H', 'Hydrogen', 1.0, 1e-4, False], ['He', 'Helium', 4, 2e-6, True]])
+    assert [row.mass_number_only for row in table] == [False, True]
+
+def test_negative_keys_raise():
+    for composition in ({-2: 1}, {-1: 1}, {1: 2, -5: 1}):
+        for func in (mass_from_composition, mass_uncertainty_from_composition):
+            with pytest.raises(UnknownElementError):
+                func(composition)
+        
+        with pytest.raises(UnknownElementError):
+            mass_from_compositions([composition], 'math')
+        
+        with pytest.raises(UnknownElementError):
+            mass_uncertainty_from_compositions([{8: 1}, composition], 'math')
+
+def test_negative_keys_raise_numpy():
+    np = pytest.importorskip('numpy')
+    for composition in ({-2: 1}, {-1: 1}, {1: 2, -5: 1}):
+        with pytest.raises(UnknownElementError):
+            mass_from_compositions([composition], np)
+
+def test_charge_key_is_electron_mass():
+    assert mass_from_composition({0: -1}) == pytest.approx(5.489e-4)
+    assert mass_from_compositions([{0: -1}], 'math') == pytest.approx([5.489e-4])